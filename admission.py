@@ -0,0 +1,313 @@
+"""
+Admission control for model-backed routes.
+
+Two layers keep one noisy user, or one large batch, from starving everyone
+else:
+
+* Token buckets per client IP, checked before a request reaches its route,
+  and per session, charged once by the first model call a request makes
+  (builder turns that only record an answer cost nothing). Batch and export
+  jobs, whose model calls run on pool threads, are charged on admission.
+  Over-limit requests get a 429 with Retry-After.
+* A process-wide cap on in-flight LLM calls. Calls beyond the cap wait in a
+  priority queue (interactive chat and builder turns ahead of analyzer and
+  export work); when the queue is full, or a call waits longer than
+  ADMISSION_QUEUE_TIMEOUT_SECONDS, it fails fast with LLMOverloaded.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+
+import metrics
+from llm import LLMOverloaded
+
+SESSION_RATE = float(os.getenv("RATE_LIMIT_SESSION_PER_SECOND", 0.5))
+SESSION_BURST = float(os.getenv("RATE_LIMIT_SESSION_BURST", 10))
+IP_RATE = float(os.getenv("RATE_LIMIT_IP_PER_SECOND", 2))
+IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", 40))
+LLM_MAX_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", 16))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 64))
+QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 15))
+
+INTERACTIVE, ANALYSIS, BACKGROUND = 0, 1, 2
+
+# LLM call site -> queue priority (lower is served first)
+SITE_PRIORITY = {
+    "chat": INTERACTIVE, "resume_builder": INTERACTIVE,
+    "builder_questions": INTERACTIVE, "builder_resume": INTERACTIVE,
+    "history_summary": INTERACTIVE,
+    "analyze_resume": ANALYSIS,
+    "structured_resume": BACKGROUND,
+}
+
+# Rate-limited routes -> priority used for the queue-full pre-check
+ROUTE_PRIORITY = {
+    "/chat": INTERACTIVE, "/builder": INTERACTIVE, "/resume_builder": INTERACTIVE,
+    "/analyze_resume": ANALYSIS, "/analyze_batch": BACKGROUND,
+    "/generate_resume": BACKGROUND, "/generate_resume_docx": BACKGROUND,
+    "/resume_jobs": BACKGROUND,
+}
+
+# Admitted routes whose model calls run on job or batch pool threads, which
+# never see the request's pending charge; their session is charged up front
+CHARGE_UPFRONT = {"/analyze_batch", "/resume_jobs"}
+
+rejections = metrics.counter(
+    "admission_rejections_total", "Requests or LLM calls turned away by admission control.",
+    ("reason",))
+queue_wait_seconds = metrics.histogram(
+    "llm_queue_wait_seconds", "Time LLM calls waited for a concurrency slot.", ("priority",))
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets; the least recently seen keys are dropped past max_keys."""
+
+    def __init__(self, rate, burst, max_keys=100_000):
+        self.rate, self.burst, self.max_keys = rate, burst, max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def take(self, key, cost=1.0):
+        """0 if admitted, else seconds until enough tokens are available."""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            admitted = tokens >= cost
+            if admitted:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if admitted else (cost - tokens) / self.rate
+
+
+WAITING, GRANTED, ABANDONED = "waiting", "granted", "abandoned"
+
+
+class _Waiter:
+    """A queued acquire; release() hands its slot over by calling wake()."""
+
+    __slots__ = ("entry", "state", "wake")
+
+    def __init__(self, priority, seq, wake):
+        self.entry = (priority, seq, self)
+        self.state = WAITING
+        self.wake = wake
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class PriorityLimiter:
+    """
+    At most max_inflight holders; waiters are admitted by (priority, arrival).
+    Threads and coroutines wait in the same queue: a releasing holder hands
+    its slot straight to the first waiter, waking a thread through an Event
+    and a coroutine through its event loop, so async waiters never occupy a
+    worker thread.
+    """
+
+    def __init__(self, max_inflight, max_queue, queue_timeout):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._waiters = []  # heap of (priority, seq, _Waiter)
+        self._seq = itertools.count()
+        self._avg_hold = 1.0  # EWMA of slot hold time, for Retry-After
+
+    def retry_after(self):
+        """Rough seconds until the current queue drains."""
+        return max(1, math.ceil((len(self._waiters) + 1) * self._avg_hold / max(1, self.max_inflight)))
+
+    def saturated(self, priority):
+        """True if a new call at this priority would be rejected right away."""
+        # background work may only use half the queue, so it is shed first
+        limit = self.max_queue if priority == INTERACTIVE else self.max_queue // 2
+        return self._inflight >= self.max_inflight and len(self._waiters) >= limit
+
+    def _enqueue(self, priority, wake):
+        """Take a free slot (returns None) or queue a waiter; caller holds the lock."""
+        if self._inflight < self.max_inflight and not self._waiters:
+            self._inflight += 1
+            return None
+        if self.saturated(priority):
+            rejections.inc(reason="queue_full")
+            raise LLMOverloaded("Too many requests are waiting for the model", self.retry_after())
+        waiter = _Waiter(priority, next(self._seq), wake)
+        heapq.heappush(self._waiters, waiter.entry)
+        return waiter
+
+    def _abandon(self, waiter):
+        """Drop a waiter that gave up; False if it was granted a slot meanwhile."""
+        with self._lock:
+            if waiter.state != WAITING:
+                return False
+            waiter.state = ABANDONED
+            self._waiters.remove(waiter.entry)
+            heapq.heapify(self._waiters)
+            return True
+
+    def _timed_out(self):
+        rejections.inc(reason="queue_timeout")
+        return LLMOverloaded("Timed out waiting for the model", self.retry_after())
+
+    def _timeout(self, timeout):
+        return self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+
+    def acquire(self, priority, timeout=None):
+        started = time.monotonic()
+        granted = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(priority, granted.set)
+        if waiter is None:
+            return
+        if not granted.wait(max(0.0, self._timeout(timeout))) and self._abandon(waiter):
+            raise self._timed_out()
+        queue_wait_seconds.observe(time.monotonic() - started, priority=priority)
+
+    async def aacquire(self, priority, timeout=None):
+        """acquire() for coroutines; waits on the event loop, not a thread."""
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            waiter = self._enqueue(priority, lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(future), max(0.0, self._timeout(timeout)))
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                raise self._timed_out()
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self.release(0)  # granted as we were cancelled; pass it on
+            raise
+        queue_wait_seconds.observe(time.monotonic() - started, priority=priority)
+
+    def release(self, held):
+        with self._lock:
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.state == WAITING:
+                    waiter.state = GRANTED
+                    waiter.wake()  # the slot changes hands; _inflight stays the same
+                    return
+            self._inflight -= 1
+
+    def hold(self, site, timeout=None):
+        """Take a slot for a call from site; returns its release(), callable from any thread."""
+        charge_session()
+        self.acquire(SITE_PRIORITY.get(site, ANALYSIS), timeout)
+        started = time.monotonic()
+        return lambda: self.release(time.monotonic() - started)
+
+    @contextmanager
+    def slot(self, site, timeout=None):
+        release = self.hold(site, timeout)
+        try:
+            yield
+        finally:
+            release()
+
+    @asynccontextmanager
+    async def aslot(self, site, timeout=None):
+        charge_session()
+        await self.aacquire(SITE_PRIORITY.get(site, ANALYSIS), timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def snapshot(self):
+        with self._lock:
+            return {"inflight": self._inflight, "queued": len(self._waiters)}
+
+
+# ------------------ Request admission ------------------
+
+session_buckets = TokenBucketLimiter(SESSION_RATE, SESSION_BURST)
+ip_buckets = TokenBucketLimiter(IP_RATE, IP_BURST)
+llm_limiter = PriorityLimiter(LLM_MAX_INFLIGHT, LLM_MAX_QUEUE, QUEUE_TIMEOUT)
+
+# [sid] while the current request's session bucket is still to be charged
+_pending_charge = contextvars.ContextVar("admission_pending_charge", default=None)
+
+
+def charge_session():
+    """Charge the current request's session once, on its first model call."""
+    pending = _pending_charge.get()
+    if not pending:
+        return
+    wait = session_buckets.take(pending[0])
+    if wait:
+        rejections.inc(reason="rate_limited")
+        raise LLMOverloaded("Too many requests", max(1, math.ceil(wait)))
+    pending.clear()
+
+
+def check_request(path, method, sid, ip):
+    """None if the request may proceed, else (reason, retry_after_seconds)."""
+    priority = ROUTE_PRIORITY.get(path)
+    limited = priority is not None and method == "POST"
+    upfront = limited and path in CHARGE_UPFRONT
+    # set on every request: threads serve many requests in the same context
+    _pending_charge.set([sid] if limited and sid and not upfront else None)
+    if not limited:
+        return None
+    if llm_limiter.saturated(priority):
+        rejections.inc(reason="queue_full")
+        return "The service is busy", llm_limiter.retry_after()
+    wait = ip_buckets.take(ip) if ip else 0
+    if not wait and upfront and sid:
+        wait = session_buckets.take(sid)
+    if wait:
+        rejections.inc(reason="rate_limited")
+        return "Too many requests", max(1, math.ceil(wait))
+    return None
+
+
+def too_many_requests(jsonify, reason, retry_after):
+    resp = jsonify({"error": f"⚠️ {reason}, please retry in {retry_after}s.", "retry_after": retry_after})
+    resp.status_code = 429
+    resp.headers["Retry-After"] = str(retry_after)
+    return resp
+
+
+def install_flask(app):
+    """Rate-limit model-backed routes of a Flask app and map LLMOverloaded to 429."""
+    from flask import jsonify, request, session
+
+    @app.before_request
+    def _admit():
+        verdict = check_request(request.path, request.method,
+                                getattr(session, "sid", None), request.remote_addr)
+        if verdict is not None:
+            return too_many_requests(jsonify, *verdict)
+
+    @app.errorhandler(LLMOverloaded)
+    def _overloaded(e):
+        return too_many_requests(jsonify, "The service is busy", e.retry_after)
+
+
+@metrics.register_collector
+def _limiter_metrics():
+    snap = llm_limiter.snapshot()
+    yield ("llm_inflight_calls", "LLM calls currently holding a slot.", "gauge", {}, snap["inflight"])
+    yield ("llm_queued_calls", "LLM calls waiting for a slot.", "gauge", {}, snap["queued"])
@@ -0,0 +1,312 @@
+"""
+Async (ASGI) serving mode.
+
+The LLM-bound routes (/chat, /analyze_resume, /resume_builder, /builder,
+/generate_resume) are served by a Quart app that awaits the model through
+the async LLM client, so a waiting conversation costs a coroutine instead of
+a thread. CPU-bound text extraction and PDF rendering run in an executor,
+and blocking store I/O (the SQLite session store, caches and resume
+library) runs on threads, so a writer holding a database lock never stalls
+the event loop.
+Every other route is passed through to the regular Flask app, and both share
+the same server-side session store and session cookie.
+
+Run with:
+    uvicorn asgi:application --workers 2
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.wsgi import WsgiToAsgi
+from quart import Quart, Response, g, jsonify, request, send_file, session
+from quart.sessions import SessionInterface
+from quart.utils import run_sync
+
+import admission
+import main
+import metrics
+from ats_score import score_resume
+from career_kb import direct_answer
+from chat_cache import chat_context
+from chat_history import history_window_flow
+from llm import LLMOverloaded, arun_flow, astart_stream
+from renderer import build_pdf_from_resume
+from uploads import MAX_REQUEST_BYTES, ROUTE_BODY_LIMITS, UploadError
+
+ASYNC_ROUTES = {"/chat", "/analyze_resume", "/resume_builder", "/builder", "/generate_resume"}
+
+# CPU-bound work (extraction waits on its own process pool, PDF rendering)
+_cpu = ThreadPoolExecutor(max_workers=int(os.getenv("ASGI_CPU_WORKERS", 4)),
+                          thread_name_prefix="asgi-cpu")
+
+
+async def run_cpu(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_cpu, fn, *args)
+
+
+async def run_io(fn, *args):
+    """Blocking store calls, on a thread that sees the current request and session."""
+    return await run_sync(fn)(*args)
+
+
+async def run_flow(flow):
+    """arun_flow() with the flow's store lookups kept off the event loop."""
+    return await arun_flow(flow, llm, run_step=run_io)
+
+
+class AsyncSessionAdapter(SessionInterface):
+    """
+    Quart front for main's ServerSideSessionInterface so both apps read and
+    write the same sessions.
+    """
+
+    def __init__(self, sync_interface):
+        self.sync = sync_interface
+
+    async def open_session(self, app, request):
+        return await run_io(self.sync.open_session, app, request)
+
+    async def save_session(self, app, session, response):
+        await run_io(self.sync.save_session, app, session, response)
+
+
+app = Quart(__name__)
+app.secret_key = main.app.secret_key
+app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+app.session_interface = AsyncSessionAdapter(main.app.session_interface)
+llm = main.llm
+
+
+@app.before_request
+async def _start_timer():
+    g._metrics_started = time.perf_counter()
+
+
+@app.before_request
+async def _admit():
+    verdict = admission.check_request(request.path, request.method,
+                                      getattr(session, "sid", None), request.remote_addr)
+    if verdict is not None:
+        return admission.too_many_requests(jsonify, *verdict)
+
+
+@app.before_request
+async def _route_body_limit():
+    # Same per-route limits as the Flask app; MAX_CONTENT_LENGTH stays the backstop
+    limit = ROUTE_BODY_LIMITS.get(request.path)
+    if limit is None:
+        return
+    if request.content_length is None:
+        if "chunked" in request.headers.get("Transfer-Encoding", "").lower():
+            return jsonify({"error": "⚠️ Content-Length is required."}), 411
+    elif request.content_length > limit:
+        return jsonify({"error": "⚠️ Upload is too large."}), 413
+
+
+@app.errorhandler(413)
+async def _too_large(e):
+    return jsonify({"error": "⚠️ Upload is too large."}), 413
+
+
+@app.errorhandler(LLMOverloaded)
+async def _overloaded(e):
+    return admission.too_many_requests(jsonify, "The service is busy", e.retry_after)
+
+
+@app.after_request
+async def _record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe_request(route, request.method, response.status_code, g._metrics_started)
+    return response
+
+
+def get_history(key):
+    return main.app.session_interface.history(session, key)
+
+
+def append_history(key, role, content):
+    main.app.session_interface.append(session, key, {"role": role, "content": content})
+
+
+async def wants_stream():
+    data = await request.get_json(silent=True) or {}
+    return bool(data.get("stream")) or request.args.get("stream") == "1"
+
+
+async def stream_reply(prompt, key, role, site, on_complete=None, user_msg=None):
+    """Async twin of main.stream_reply."""
+    store = main.app.session_interface.store
+    sid = session.sid
+    chunks = await astart_stream(llm.astream(prompt, site=site))
+    # the reply is stored after save_session has run, so save (and set the
+    # cookie of) a new session now
+    main.app.session_interface.reserve(session)
+
+    async def generate():
+        parts = []
+        completed = False
+        try:
+            async for text in chunks:
+                parts.append(text)
+                yield text.encode("utf-8")
+            completed = True
+        except Exception as e:
+            yield f"Error: {str(e)}".encode("utf-8")
+        finally:
+            if parts:
+                if user_msg is not None:
+                    await run_io(store.append, sid, key, {"role": "user", "content": user_msg})
+                await run_io(store.append, sid, key, {"role": role, "content": "".join(parts)})
+            if completed and parts and on_complete:
+                on_complete("".join(parts))
+
+    return Response(generate(), mimetype="text/html",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ------------------ Routes ------------------
+
+@app.route("/chat", methods=["POST"])
+async def chat_with_ai():
+    user_input = ((await request.get_json(silent=True)) or {}).get("message", "").strip()
+    if not user_input:
+        return jsonify({"reply": "⚠️ Please type something."})
+    try:
+        user_turn = {"role": "user", "content": user_input}
+        reply = await run_io(direct_answer, main.career_kb, user_input)
+        if reply is not None:
+            await run_io(append_history, "chat_session", "user", user_input)
+            await run_io(append_history, "chat_session", "assistant", reply)
+            if await wants_stream():
+                return Response(reply, mimetype="text/html")
+            return jsonify({"reply": reply, "source": "career_kb"})
+        hist = await run_io(get_history, "chat_session") + [user_turn]
+        context = chat_context(hist, llm.model_name)
+        reply = main.chat_cache.get(context, user_input) if context is not None else None
+        if reply is not None:
+            await run_io(append_history, "chat_session", "user", user_input)
+            await run_io(append_history, "chat_session", "assistant", reply)
+            if await wants_stream():
+                return Response(reply, mimetype="text/html")
+            return jsonify({"reply": reply, "cached": True})
+        remember = (lambda r: main.chat_cache.set(context, user_input, r)) if context is not None else None
+        summary, recent = await run_flow(history_window_flow(session, "chat_session", hist))
+        prompt = main.chat_prompt(recent, summary)
+        if await wants_stream():
+            return await stream_reply(prompt, "chat_session", "assistant", "chat",
+                                on_complete=remember, user_msg=user_input)
+        reply = await llm.agenerate(prompt, site="chat")
+        await run_io(append_history, "chat_session", "user", user_input)
+        await run_io(append_history, "chat_session", "assistant", reply)
+        if remember:
+            remember(reply)
+        return jsonify({"reply": reply})
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return jsonify({"reply": f"Error: {str(e)}"})
+
+
+@app.route("/analyze_resume", methods=["POST"])
+async def analyze_resume():
+    try:
+        form = await request.form
+        files = await request.files
+        job_desc = (form.get("jobDescription") or "").strip()
+        resume_text = (form.get("resumeText") or "").strip()
+
+        resume_id = None
+
+        upload = files.get("resume")
+        if upload is not None and upload.filename:
+            try:
+                resume_id, resume_text = await run_cpu(main.library_upload, upload, session.get("user"))
+            except UploadError as e:
+                return jsonify({"error": str(e)}), e.status
+        elif form.get("resume_id"):
+            stored = await run_io(main.resume_library.get, session.get("user"), form["resume_id"])
+            if stored is None:
+                return jsonify({"error": "⚠️ Saved resume not found"}), 404
+            resume_id, resume_text = stored["id"], stored["text"]
+
+        if not job_desc or not resume_text:
+            return jsonify({"error": "⚠️ Resume text/file and job description are required"})
+
+        ats = score_resume(resume_text, job_desc)
+        if form.get("detailed", "1") == "0":
+            return jsonify({"ats": ats, "resume_id": resume_id})
+
+        analysis, cached = await run_flow(main.ats_analysis_flow(resume_text, job_desc))
+        if cached:
+            return jsonify({"analysis": analysis, "ats": ats, "resume_id": resume_id, "cached": True})
+        return jsonify({"analysis": analysis, "ats": ats, "resume_id": resume_id})
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)})
+
+
+@app.route("/builder", methods=["POST"])
+async def resume_builder_chat():
+    data = await request.get_json(silent=True) or {}
+    user_msg = (data.get("message") or "").strip()
+    if not user_msg:
+        return jsonify({"reply": "⚠ Please type something."})
+    return jsonify(await run_flow(main.builder_flow(session, user_msg)))
+
+
+@app.route("/resume_builder", methods=["POST"])
+async def resume_builder():
+    msg = ((await request.get_json(silent=True)) or {}).get("message", "").strip()
+    if not msg:
+        return jsonify({"reply": "⚠️ Please type something."})
+    try:
+        conversation = await run_io(get_history, "conversation")
+        conversation.append({"role": "user", "content": msg})
+        summary, recent = await run_flow(history_window_flow(session, "conversation", conversation))
+        prompt = main.resume_builder_prompt(recent, summary)
+        if await wants_stream():
+            return await stream_reply(prompt, "conversation", "ai", "resume_builder", user_msg=msg)
+        reply = await llm.agenerate(prompt, site="resume_builder")
+        await run_io(append_history, "conversation", "user", msg)
+        await run_io(append_history, "conversation", "ai", reply)
+        return jsonify({"reply": reply})
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return jsonify({"reply": f"Error: {str(e)}"})
+
+
+@app.route("/generate_resume", methods=["POST"])
+async def generate_resume():
+    try:
+        conversation = await run_io(get_history, "conversation")
+        if not conversation:
+            return "No conversation yet.", 400
+        resume_json = await arun_flow(main.structured_resume_flow(conversation), llm)
+        session["resume_json"] = resume_json
+        pdf_buf = await run_cpu(build_pdf_from_resume, resume_json)
+        return await send_file(pdf_buf, as_attachment=True,
+                               attachment_filename="My_Resume.pdf",
+                               mimetype="application/pdf")
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return f"Error generating PDF: {str(e)}", 500
+
+
+# ------------------ Dispatcher ------------------
+
+_flask_asgi = WsgiToAsgi(main.app)
+
+
+async def application(scope, receive, send):
+    """LLM-bound routes go to the async app, everything else to Flask."""
+    if scope["type"] == "lifespan" or (
+        scope["type"] == "http" and scope["path"] in ASYNC_ROUTES
+    ):
+        await app(scope, receive, send)
+    else:
+        await _flask_asgi(scope, receive, send)
@@ -0,0 +1,105 @@
+"""
+Local, deterministic ATS pre-scoring.
+
+Resume and job description are tokenized into unigrams and bigrams, weighted
+with sublinear term frequency and a boost for known skill terms, and compared as
+sparse vectors (plain dicts). Everything runs in well under a millisecond for
+typical inputs, so the score can be returned before any LLM call.
+"""
+import math
+import re
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been
+before being below between both but by can could did do does doing down during each
+etc few for from further had has have having he her here hers him his how i if in
+into is it its itself just me more most my no nor not now of off on once only or
+other our ours out over own per same she should so some such than that the their
+them then there these they this those through to too under until up very via was we
+were what when where which while who whom why will with within without would you
+your yours able ability across based using used use work working strong good
+excellent knowledge experience experienced years year role team teams candidate
+candidates including include includes required requirements preferred plus must
+responsibilities responsible skills skill job looking join company well new etc.
+""".split())
+
+# Terms that are almost always skills; they get a boost and are reported
+# separately when missing from the resume. Multi-word skills are matched as
+# bigrams, so they belong in the phrase set, never in the split string.
+SKILL_TERMS = frozenset("""
+python java javascript typescript c c++ c# go golang rust ruby php kotlin swift scala r
+sql mysql postgresql postgres mongodb redis nosql sqlite oracle excel tableau powerbi
+html css react angular vue node node.js django flask fastapi spring express
+aws azure gcp docker kubernetes terraform linux git jenkins rest graphql api
+pandas numpy scikit-learn tensorflow pytorch keras spark hadoop airflow kafka
+nlp statistics figma photoshop illustrator seo marketing agile scrum jira
+communication leadership
+""".split()) | frozenset({
+    "machine learning", "deep learning", "computer vision", "data analysis",
+    "power bi", "project management", "data science", "data visualization",
+    "ci cd",  # "CI/CD" tokenizes as "ci", "cd"
+})
+
+SKILL_BOOST = 2.0
+TOP_KEYWORDS = 25
+
+
+def tokenize(text):
+    """Lowercased unigrams plus bigrams of adjacent non-stopword tokens."""
+    words = _TOKEN_RE.findall((text or "").lower())
+    terms = [w for w in words if (w not in STOPWORDS and len(w) > 1) or w in SKILL_TERMS]
+    bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])
+               if a not in STOPWORDS and b not in STOPWORDS]
+    return terms + bigrams
+
+
+def term_vector(terms):
+    """Sparse {term: weight} vector with sublinear tf and a skill prior."""
+    vec = {}
+    for term, tf in Counter(terms).items():
+        weight = 1.0 + math.log(tf)
+        if term in SKILL_TERMS:
+            weight *= SKILL_BOOST
+        elif " " in term:
+            weight *= 0.5  # bigrams are noisy unless they are known skills
+        vec[term] = weight
+    return vec
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(w * b.get(t, 0.0) for t, w in a.items())
+    if not dot:
+        return 0.0
+    na = math.sqrt(sum(w * w for w in a.values()))
+    nb = math.sqrt(sum(w * w for w in b.values()))
+    return dot / (na * nb)
+
+
+def score_resume(resume_text, job_desc, top_k=TOP_KEYWORDS):
+    """
+    Returns dict with keys: score (0-100), similarity (0-1), coverage (0-1),
+    matched_keywords (list), missing_keywords (list), missing_skills (list).
+    """
+    resume_vec = term_vector(tokenize(resume_text))
+    job_vec = term_vector(tokenize(job_desc))
+
+    keywords = sorted(job_vec, key=lambda t: (-job_vec[t], t))[:top_k]
+    matched = [k for k in keywords if k in resume_vec]
+    missing = [k for k in keywords if k not in resume_vec]
+    total = sum(job_vec[k] for k in keywords)
+    coverage = sum(job_vec[k] for k in matched) / total if total else 0.0
+    similarity = cosine(resume_vec, job_vec)
+
+    return {
+        "score": round(100 * (0.6 * coverage + 0.4 * similarity)),
+        "similarity": round(similarity, 3),
+        "coverage": round(coverage, 3),
+        "matched_keywords": matched,
+        "missing_keywords": missing,
+        "missing_skills": [k for k in missing if k in SKILL_TERMS],
+    }
@@ -0,0 +1,207 @@
+"""
+Batch resume analysis against one job description.
+
+Resumes (individual files and/or zip archives) are extracted in parallel,
+Gemini calls are fanned out under a concurrency limit (retries and backoff
+come from the LLM client), and results are yielded as each resume finishes
+so they can be streamed back as NDJSON. Uploads and unzipped members live in
+a work directory on disk and are extracted by path, so a batch is never held
+in memory.
+
+CLI:
+    python batch_analysis.py --jd job.txt resumes.zip other.pdf > results.ndjson
+"""
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ats_score import score_resume
+from extraction import ExtractionError, extract_file
+from uploads import MAX_UPLOAD_BYTES, UploadError, copy_capped, sniff_file
+
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 500))
+# Every resume, uploaded on its own or inside a zip, is held to MAX_UPLOAD_BYTES;
+# the whole batch, counted after unzipping, to BATCH_MAX_TOTAL_BYTES
+BATCH_MAX_TOTAL_BYTES = int(os.getenv("BATCH_MAX_TOTAL_BYTES", 200 * 1024 * 1024))
+
+TOO_LARGE = "too_large"  # kind of a resume over the per-file limit
+
+
+def _mb(n):
+    return n // (1024 * 1024)
+
+
+def _too_large_batch():
+    return UploadError(f"Batch is larger than the {_mb(BATCH_MAX_TOTAL_BYTES)} MB total limit "
+                       "(counted after unzipping)", 413)
+
+
+def content_kind(path):
+    """"pdf", "docx" or "zip" from the file's magic bytes; None if unsupported."""
+    try:
+        return sniff_file(path)
+    except UploadError:
+        return None
+
+
+def spool_batch(uploads, workdir):
+    """
+    Copy [(name, FileStorage)] into workdir in chunks and return [(name, path)].
+    Reading stops with an UploadError (413) once the batch passes
+    BATCH_MAX_TOTAL_BYTES.
+    """
+    files = []
+    total = 0
+    for i, (name, storage) in enumerate(uploads):
+        path = os.path.join(workdir, f"upload-{i}")
+        try:
+            size, _ = copy_capped(storage.stream, path, BATCH_MAX_TOTAL_BYTES - total)
+        except UploadError:
+            raise _too_large_batch()
+        total += size
+        files.append((name, path))
+    return files
+
+
+def expand_uploads(files, workdir):
+    """
+    Turn [(name, path)] into [(name, kind, path)], unpacking zip archives
+    into workdir. Types come from the content, not the file name.
+    Unsupported entries are kept with kind None, and resumes over
+    MAX_UPLOAD_BYTES with kind TOO_LARGE, so they can be reported (both
+    with path None); a batch over BATCH_MAX_TOTAL_BYTES or BATCH_MAX_FILES
+    raises UploadError (413 and 400).
+    """
+    out = []
+    total = 0
+
+    def count(size):
+        nonlocal total
+        total += size
+        if total > BATCH_MAX_TOTAL_BYTES:
+            raise _too_large_batch()
+
+    for name, path in files:
+        kind = content_kind(path)
+        if kind == "zip":
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                        continue
+                    if info.file_size > MAX_UPLOAD_BYTES:
+                        out.append((info.filename, TOO_LARGE, None))
+                        continue
+                    member = os.path.join(workdir, f"member-{len(out)}")
+                    try:
+                        # capped again as read: the size in the zip header may lie
+                        with zf.open(info) as src:
+                            size, _ = copy_capped(src, member, MAX_UPLOAD_BYTES)
+                    except UploadError:
+                        out.append((info.filename, TOO_LARGE, None))
+                        continue
+                    count(size)
+                    kind = content_kind(member)
+                    if kind == "zip":
+                        kind = None  # no nested archives
+                    out.append((info.filename, kind, member if kind else None))
+        else:
+            size = os.path.getsize(path)
+            if size > MAX_UPLOAD_BYTES:
+                out.append((name, TOO_LARGE, None))
+            else:
+                count(size)
+                out.append((name, kind, path if kind else None))
+        if len(out) > BATCH_MAX_FILES:
+            raise UploadError(f"At most {BATCH_MAX_FILES} resumes per batch", 400)
+    return out
+
+
+def _analyze_one(name, kind, path, job_desc, analyze_fn, detailed):
+    started = time.monotonic()
+    result = {"file": name}
+    try:
+        if kind == TOO_LARGE:
+            raise ExtractionError(f"File is larger than the {_mb(MAX_UPLOAD_BYTES)} MB per-resume limit")
+        if kind is None:
+            raise ExtractionError("Only PDF or DOCX files are supported")
+        resume_text = extract_file(path, kind)
+        if not resume_text:
+            raise ExtractionError("No text could be extracted from this file")
+        result["ats"] = score_resume(resume_text, job_desc)
+        if detailed:
+            analysis, cached = analyze_fn(resume_text, job_desc)
+            result["analysis"] = analysis
+            result["cached"] = cached
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_ms"] = round((time.monotonic() - started) * 1000)
+    return result
+
+
+def analyze_batch(files, job_desc, analyze_fn, workdir, concurrency=BATCH_CONCURRENCY, detailed=True):
+    """
+    Iterator of one result dict per resume in files ([(name, path)]) as it
+    completes, then a summary dict. Zip members are unpacked into workdir,
+    which the caller removes once the iterator is done.
+    analyze_fn(resume_text, job_desc) -> (analysis, cached) does the LLM call.
+    The batch limits are checked before this returns, so an UploadError can
+    still become an error response instead of a line in a started stream.
+    """
+    started = time.monotonic()
+    items = expand_uploads(files, workdir)
+    return _analyze_items(items, job_desc, analyze_fn, concurrency, detailed, started)
+
+
+def _analyze_items(items, job_desc, analyze_fn, concurrency, detailed, started):
+    errors = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    try:
+        futures = [
+            pool.submit(_analyze_one, name, kind, path, job_desc, analyze_fn, detailed)
+            for name, kind, path in items
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            errors += "error" in result
+            yield result
+    finally:
+        # a client that went away stops here: queued analyses are dropped
+        # instead of spending model quota, and nobody waits for running ones
+        pool.shutdown(wait=False, cancel_futures=True)
+    yield {
+        "done": True,
+        "count": len(items),
+        "errors": errors,
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Score many resumes against one job description.")
+    parser.add_argument("--jd", required=True, help="Path to a text file with the job description")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--quick", action="store_true", help="Local score only, no Gemini calls")
+    parser.add_argument("paths", nargs="+", help="Resume files (.pdf/.docx) or .zip archives")
+    args = parser.parse_args()
+
+    from main import run_ats_analysis
+
+    with open(args.jd, encoding="utf-8") as f:
+        jd = f.read().strip()
+    files = [(os.path.basename(path), path) for path in args.paths]
+    with tempfile.TemporaryDirectory(prefix="batch-") as workdir:
+        try:
+            rows = analyze_batch(files, jd, run_ats_analysis, workdir,
+                                 concurrency=args.concurrency, detailed=not args.quick)
+        except UploadError as e:
+            sys.exit(str(e))
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
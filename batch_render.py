@@ -0,0 +1,216 @@
+"""
+Offline batch rendering of structured resumes.
+
+Reads a JSONL file of resume dicts (the output of gemini_structured_resume;
+either one dict per line, or {"id": ..., "resume": {...}}), renders each to
+PDF and/or DOCX across a process pool, and writes the files to a directory
+or a zip archive. A manifest of render keys (a hash of the resume, format
+and RENDERER_VERSION) sits next to the output, so re-running after a partial
+run or on a mostly unchanged export only renders what changed.
+
+CLI:
+    python batch_render.py resumes.jsonl --out exports/ --formats pdf,docx
+    python batch_render.py resumes.jsonl --out placement-drive.zip --workers 8
+"""
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from renderer import RENDERERS, render_key, warm
+
+DEFAULT_CHUNK = 16
+
+
+def read_resumes(path):
+    """
+    Yield (name, resume_dict) for each JSONL line; names fall back to line
+    numbers. A name already taken (ids repeat, or only differ in characters
+    that sanitizing drops, or in case) gets the line number appended, so every
+    resume has its own output file.
+    """
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                print(f"line {lineno}: invalid JSON ({e})", file=sys.stderr)
+                continue
+            if isinstance(row, dict) and isinstance(row.get("resume"), dict):
+                name, resume = str(row.get("id") or f"resume-{lineno:06d}"), row["resume"]
+            else:
+                name, resume = f"resume-{lineno:06d}", row
+            name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+            if name.lower() in seen:
+                unique = f"{name}-{lineno:06d}"
+                while unique.lower() in seen:
+                    unique += "_"
+                print(f"line {lineno}: duplicate name {name!r}, writing it as {unique!r}", file=sys.stderr)
+                name = unique
+            seen.add(name.lower())
+            yield name, resume
+
+
+def _render_chunk(tasks):
+    """Worker: [(name, fmt, key, resume)] -> [(name, fmt, key, bytes or error str)]."""
+    out = []
+    for name, fmt, key, resume in tasks:
+        try:
+            out.append((name, fmt, key, RENDERERS[fmt](resume)))
+        except Exception as e:
+            out.append((name, fmt, key, f"{type(e).__name__}: {e}"))
+    return out
+
+
+class DirSink:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest_path = os.path.join(path, ".render-manifest.json")
+
+    def exists(self, filename):
+        return os.path.exists(os.path.join(self.path, filename))
+
+    def keep(self, filename):
+        pass  # already in place
+
+    def write(self, filename, data):
+        target = os.path.join(self.path, filename)
+        with open(target + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(target + ".tmp", target)
+
+    def close(self):
+        pass
+
+
+class ZipSink:
+    """Writes a fresh archive, copying unchanged members over from the previous one."""
+
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = path + ".manifest.json"
+        self._old = zipfile.ZipFile(path) if os.path.exists(path) else None
+        self._old_names = set(self._old.namelist()) if self._old else set()
+        self._new = zipfile.ZipFile(path + ".tmp", "w", zipfile.ZIP_DEFLATED)
+
+    def exists(self, filename):
+        return filename in self._old_names
+
+    def keep(self, filename):
+        self._new.writestr(self._old.getinfo(filename), self._old.read(filename))
+
+    def write(self, filename, data):
+        self._new.writestr(filename, data)
+
+    def close(self):
+        self._new.close()
+        if self._old:
+            self._old.close()
+        os.replace(self.path + ".tmp", self.path)
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def batch_render(jsonl_path, out, formats=("pdf", "docx"), workers=None, chunk_size=DEFAULT_CHUNK,
+                 force=False):
+    """
+    Render every resume in jsonl_path; returns a stats dict. Work is sent to
+    the pool in chunks of chunk_size renders, with at most two chunks per
+    worker in flight so memory stays flat for large inputs.
+    """
+    workers = workers or os.cpu_count() or 1
+    sink = ZipSink(out) if out.endswith(".zip") else DirSink(out)
+    old_manifest = {} if force else _load_manifest(sink.manifest_path)
+    manifest = {}
+    stats = {"resumes": 0, "rendered": 0, "skipped": 0, "errors": 0, "bytes": 0}
+    started = time.perf_counter()
+
+    def tasks():
+        for name, resume in read_resumes(jsonl_path):
+            stats["resumes"] += 1
+            for fmt in formats:
+                filename = f"{name}.{fmt}"
+                key = render_key(resume, fmt)
+                if old_manifest.get(filename) == key and sink.exists(filename):
+                    sink.keep(filename)
+                    manifest[filename] = key
+                    stats["skipped"] += 1
+                else:
+                    yield name, fmt, key, resume
+
+    def chunks():
+        chunk = []
+        for task in tasks():
+            chunk.append(task)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=warm) as pool:
+            pending = set()
+            for chunk in chunks():
+                pending.add(pool.submit(_render_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _collect(done, sink, manifest, stats)
+            _collect(pending, sink, manifest, stats)
+    finally:
+        sink.close()
+        with open(sink.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=0, sort_keys=True)
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["renders_per_second"] = round(stats["rendered"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    return stats
+
+
+def _collect(futures, sink, manifest, stats):
+    for future in futures:
+        for name, fmt, key, result in future.result():
+            filename = f"{name}.{fmt}"
+            if isinstance(result, str):
+                stats["errors"] += 1
+                print(f"{filename}: {result}", file=sys.stderr)
+                continue
+            sink.write(filename, result)
+            manifest[filename] = key
+            stats["rendered"] += 1
+            stats["bytes"] += len(result)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render structured resumes to PDF/DOCX in bulk.")
+    parser.add_argument("jsonl", help="JSONL file of resume dicts")
+    parser.add_argument("--out", required=True, help="output directory, or a path ending in .zip")
+    parser.add_argument("--formats", default="pdf,docx", help="comma-separated: pdf, docx")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="renders per task")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-render all")
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in RENDERERS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    result = batch_render(args.jsonl, args.out, formats, args.workers, args.chunk_size, args.force)
+    print(f"{result['resumes']} resume(s): {result['rendered']} rendered, {result['skipped']} unchanged, "
+          f"{result['errors']} failed in {result['seconds']:.2f}s "
+          f"({result['renders_per_second']} renders/s, {result['bytes'] / 1e6:.1f} MB written)")
@@ -0,0 +1,95 @@
+"""
+Job matching benchmark.
+
+    python benchmarks/job_match_bench.py [-n 100000] [-q 200] [--json out.json]
+
+Builds a job index over n synthetic postings in a temporary directory, then
+reports build time, the latency of top-10 searches for synthetic resumes, and
+the cost of adding postings to the live index.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ats_score import SKILL_TERMS  # noqa: E402
+from job_index import JobIndex  # noqa: E402
+
+TITLES = ["engineer", "developer", "analyst", "scientist", "manager", "designer", "consultant",
+          "architect", "intern", "specialist", "administrator", "lead"]
+LEVELS = ["junior", "senior", "staff", "principal", "associate", ""]
+
+
+def vocabulary(rng, size=20000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+
+def posting(rng, i, skills, words):
+    picked = rng.sample(skills, rng.randint(4, 10))
+    # word frequencies are skewed, like real text
+    body = [words[min(int(rng.paretovariate(1.1)) - 1, len(words) - 1)] for _ in range(rng.randint(120, 300))]
+    body += rng.choices(picked, k=12)
+    return {
+        "id": f"job-{i}",
+        "title": f"{rng.choice(LEVELS)} {rng.choice(picked)} {rng.choice(TITLES)}".strip(),
+        "company": f"company {rng.randint(1, 5000)}",
+        "skills": picked,
+        "description": " ".join(body),
+    }
+
+
+def resume(rng, skills, words):
+    text = [words[min(int(rng.paretovariate(1.1)) - 1, len(words) - 1)] for _ in range(rng.randint(300, 600))]
+    return " ".join(text + rng.sample(skills, 15))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure job index build and search latency.")
+    parser.add_argument("-n", type=int, default=100_000, help="postings")
+    parser.add_argument("-q", type=int, default=200, help="queries")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    skills = sorted(SKILL_TERMS)
+    words = vocabulary(rng)
+    results = {"postings": args.n}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = JobIndex(os.path.join(tmp, "index"))
+        started = time.perf_counter()
+        index.append(posting(rng, i, skills, words) for i in range(args.n))
+        index.compact()
+        results["build_seconds"] = time.perf_counter() - started
+
+        index = JobIndex(index.path)  # fresh open: memory-mapped, nothing cached
+        queries = [resume(rng, skills, words) for _ in range(args.q)]
+        runs = []
+        for text in queries:
+            started = time.perf_counter()
+            index.search(text, 10)
+            runs.append((time.perf_counter() - started) * 1000)
+        results["search_median_ms"] = statistics.median(runs)
+        results["search_p95_ms"] = statistics.quantiles(runs, n=20)[-1] if len(runs) > 1 else runs[0]
+
+        started = time.perf_counter()
+        index.add((posting(rng, args.n + i, skills, words) for i in range(100)), compact=False)
+        results["add_100_ms"] = (time.perf_counter() - started) * 1000
+
+    print(f"{args.n} postings: built in {results['build_seconds']:.1f}s")
+    print(f"search top-10: median {results['search_median_ms']:.1f} ms, p95 {results['search_p95_ms']:.1f} ms")
+    print(f"add 100 postings to the live index: {results['add_100_ms']:.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
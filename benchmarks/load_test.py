@@ -0,0 +1,294 @@
+"""
+End-to-end load test against the Flask app with a stubbed Gemini.
+
+    python benchmarks/load_test.py [--requests 200] [--concurrency 8]
+                                   [--llm-latency-ms 200] [--history-turns 40]
+                                   [--out benchmarks/results/baseline.json]
+                                   [--compare benchmarks/results/baseline.json]
+
+Runs in-process through Flask's test client with LLM_BACKEND=fake, so no
+network or API key is needed. Every endpoint is driven with realistic
+payloads (generated sample PDF/DOCX resumes, long chat histories) and the
+report gives p50/p95/p99 latency, requests per second, RSS growth per
+endpoint and the process-wide peak RSS so far. --out saves the report as a JSON baseline; --compare prints the
+change against an earlier one.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+JOB_DESCRIPTION = (
+    "We are hiring a Junior Data Engineer to build and maintain batch and streaming "
+    "pipelines. Requirements: Python, SQL, Airflow, Docker, AWS, data modelling, "
+    "experience with Postgres and Spark, good communication and teamwork. "
+) * 6
+
+CHAT_OPENERS = [
+    "I want to become a data scientist",
+    "I don't know what I like, can you show me some fields?",
+    "How do I get into cybersecurity?",
+    "What does a product designer do?",
+]
+
+BUILDER_TURNS = [
+    "Asha Verma", "asha@example.com", "+91 98765 43210", "Data engineering",
+    "python, sql, airflow, docker",
+    "Built an ETL pipeline for a retail dataset",
+    "Won a college hackathon",
+    "AWS Cloud Practitioner",
+    "Python, Postgres, Airflow",
+    "Junior data engineer roles",
+    "/restart_resume",
+]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def peak_rss_mb():
+    """Process-wide high-water mark; it never goes down between endpoints."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def current_rss_mb():
+    """Resident set size right now (Linux), or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def setup_environment(args):
+    """Point every store at a scratch directory and stub the model."""
+    workdir = tempfile.mkdtemp(prefix="careercompass-bench-")
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "LLM_FAKE_LATENCY_MS": str(args.llm_latency_ms),
+        "LLM_FAKE_JITTER_MS": str(args.llm_latency_ms // 5),
+        "FLASK_SECRET_KEY": "bench-secret",
+        "SESSION_DB": os.path.join(workdir, "sessions.db"),
+        "USERS_DB": os.path.join(workdir, "users.db"),
+        "ANALYSIS_CACHE_DB": os.path.join(workdir, "analysis_cache.db"),
+        "JOBS_DB": os.path.join(workdir, "jobs.db"),
+        # every request comes from one IP and a handful of sessions; measure the
+        # app, not the admission limiter
+        "RATE_LIMIT_SESSION_PER_SECOND": "0",
+        "RATE_LIMIT_IP_PER_SECOND": "0",
+    })
+    os.chdir(workdir)
+    return workdir
+
+
+def sample_files():
+    """Sample resume uploads, rendered with the app's own renderers."""
+    from benchmarks.render_bench import SAMPLE_RESUME
+    from renderer import render_docx, render_pdf
+    return {"pdf": render_pdf(SAMPLE_RESUME), "docx": render_docx(SAMPLE_RESUME)}
+
+
+class Scenario:
+    def __init__(self, app, args, files):
+        self.app = app
+        self.args = args
+        self.files = files
+        self.counter = itertools.count()
+
+    def new_client(self, history_turns=0):
+        """A logged-in test client, optionally with long pre-filled histories."""
+        client = self.app.test_client()
+        n = next(self.counter)
+        email = f"bench{n}@example.com"
+        client.post("/register", data={"firstName": "Bench", "lastName": str(n),
+                                       "email": email, "password": "pw"})
+        client.post("/login", data={"email": email, "password": "pw"})
+        if history_turns:
+            with client.session_transaction() as sess:
+                sid = sess.sid
+            store = self.app.session_interface.store
+            for i in range(history_turns):
+                for key, ai_role in (("chat_session", "assistant"), ("conversation", "ai")):
+                    store.append(sid, key, {"role": "user", "content": f"Question {i}: " + CHAT_OPENERS[i % 4]})
+                    store.append(sid, key, {"role": ai_role, "content": "<h2>Roadmap</h2><ul>" +
+                                            "<li>Learn the fundamentals step by step.</li>" * 8 + "</ul>"})
+        return client, email
+
+    # each returns a callable(client, i) -> response
+    def endpoints(self):
+        files = self.files
+
+        def login(client, i):
+            return client.post("/login", data={"email": self.login_email, "password": "pw"})
+
+        def register(client, i):
+            n = next(self.counter)
+            return client.post("/register", data={"firstName": "New", "lastName": str(n),
+                                                  "email": f"new{n}@example.com", "password": "pw"})
+
+        def chat(client, i):
+            return client.post("/chat", json={"message": CHAT_OPENERS[i % len(CHAT_OPENERS)]})
+
+        def builder(client, i):
+            return client.post("/builder", json={"message": BUILDER_TURNS[i % len(BUILDER_TURNS)]})
+
+        def analyze_resume(client, i):
+            kind = "pdf" if i % 2 == 0 else "docx"
+            data = {
+                # unique job description so every request misses the cache
+                "jobDescription": JOB_DESCRIPTION + f" Ref {i}-{time.monotonic_ns()}",
+                "resume": (BytesIO(files[kind]), f"resume.{kind}"),
+            }
+            return client.post("/analyze_resume", data=data, content_type="multipart/form-data")
+
+        def analyze_resume_cached(client, i):
+            data = {"jobDescription": JOB_DESCRIPTION,
+                    "resume": (BytesIO(files["pdf"]), "resume.pdf")}
+            return client.post("/analyze_resume", data=data, content_type="multipart/form-data")
+
+        def generate_resume(client, i):
+            return client.post("/generate_resume")
+
+        def generate_resume_docx(client, i):
+            return client.post("/generate_resume_docx")
+
+        return {
+            "/login": (login, 0),
+            "/register": (register, 0),
+            "/chat": (chat, self.args.history_turns),
+            "/builder": (builder, 0),
+            "/analyze_resume": (analyze_resume, 0),
+            "/analyze_resume (cached)": (analyze_resume_cached, 0),
+            "/generate_resume": (generate_resume, self.args.history_turns),
+            "/generate_resume_docx": (generate_resume_docx, self.args.history_turns),
+        }
+
+    def run_endpoint(self, fn, history_turns):
+        args = self.args
+        clients = [self.new_client(history_turns)[0] for _ in range(args.concurrency)]
+        per_client = max(1, args.requests // args.concurrency)
+
+        def worker(client):
+            samples, errors, non_200 = [], 0, 0
+            for i in range(per_client):
+                start = time.perf_counter()
+                resp = fn(client, i)
+                samples.append((time.perf_counter() - start) * 1000)
+                errors += resp.status_code >= 400
+                non_200 += resp.status_code != 200
+            return samples, errors, non_200
+
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(worker, clients))
+        wall = time.perf_counter() - started
+        rss_after = current_rss_mb()
+
+        samples = [s for r in results for s in r[0]]
+        return {
+            "requests": len(samples),
+            "errors": sum(r[1] for r in results),
+            "non_200": sum(r[2] for r in results),
+            "rps": round(len(samples) / wall, 1),
+            "mean_ms": round(statistics.mean(samples), 2),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "rss_growth_mb": round(rss_after - rss_before, 1) if rss_before is not None else None,
+            "cumulative_peak_rss_mb": peak_rss_mb(),
+        }
+
+    def run(self, only=None):
+        _, self.login_email = self.new_client()
+        report = {}
+        for name, (fn, history_turns) in self.endpoints().items():
+            if only and name not in only:
+                continue
+            report[name] = self.run_endpoint(fn, history_turns)
+            print_row(name, report[name])
+        return report
+
+
+def _rss_growth(r):
+    growth = r.get("rss_growth_mb")
+    return "   n/a" if growth is None else f"{growth:+6.1f}"
+
+
+def print_row(name, r, base=None):
+    line = (f"{name:28s} {r['requests']:6d} req  {r['rps']:8.1f} rps  "
+            f"p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms  "
+            f"rss {_rss_growth(r)} MB (peak so far {r.get('cumulative_peak_rss_mb', r.get('peak_rss_mb')):.1f})  err {r['errors']}  non-200 {r.get('non_200', 0)}")
+    if base:
+        delta = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0
+        line += f"  (p95 {delta:+.1f}% vs baseline)"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CareerCompass end-to-end load test")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=int, default=200)
+    parser.add_argument("--history-turns", type=int, default=40,
+                        help="pre-filled chat turns for /chat and resume export")
+    parser.add_argument("--endpoint", action="append", help="only run these endpoints")
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out) if args.out else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    setup_environment(args)
+
+    files = sample_files()
+    import main as app_module
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+            "history_turns": args.history_turns,
+        },
+        "endpoints": Scenario(app_module.app, args, files).run(args.endpoint),
+        "llm": app_module.llm.snapshot(),
+    }
+
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)["endpoints"]
+        print("\nCompared with", compare)
+        for name, row in report["endpoints"].items():
+            print_row(name, row, baseline.get(name))
+
+    if out:
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2)
+        print("\nSaved", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark.
+
+    python benchmarks/startup_bench.py [-n 5] [--json out.json]
+
+Each measurement runs in a fresh interpreter, so nothing is already in
+sys.modules. Reports the median import time of each heavy library, of
+`import main` (lazy startup), and of `import main` followed by a full
+pre-warm, plus the time each subsystem takes to warm.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SUBSYSTEMS = [
+    ("flask", "import flask"),
+    ("gemini (google.generativeai)", "import google.generativeai"),
+    ("reportlab.platypus", "import reportlab.platypus"),
+    ("PyPDF2", "import PyPDF2"),
+    ("python-docx", "import docx"),
+    ("quart (ASGI mode)", "import quart"),
+    ("main (lazy)", "import main"),
+    ("main + prewarm", "import main; timings = main.startup.warm()"),
+]
+
+PROBE = """
+import json, sys, time
+ns = {}
+started = time.perf_counter()
+exec(sys.argv[1], ns)
+out = {"seconds": time.perf_counter() - started, "warm": ns.get("timings", {})}
+print(json.dumps(out))
+"""
+
+
+def measure(stmt, env):
+    proc = subprocess.run([sys.executable, "-c", PROBE, stmt], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None, proc.stderr.strip().splitlines()[-1:] or ["failed"]
+    return json.loads(proc.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import/startup cost per subsystem.")
+    parser.add_argument("-n", type=int, default=5, help="runs per subsystem")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("SESSION_BACKEND", "memory")
+    env.setdefault("LLM_BACKEND", "gemini")
+    env.setdefault("EXTRACT_WORKERS", "1")
+
+    results = {}
+    print(f"{'subsystem':32} {'median ms':>10} {'min ms':>8}")
+    for name, stmt in SUBSYSTEMS:
+        runs, warm, error = [], {}, None
+        for _ in range(args.n):
+            out, error = measure(stmt, env)
+            if out is None:
+                break
+            runs.append(out["seconds"] * 1000)
+            warm = out.get("warm", warm)
+        if not runs:
+            print(f"{name:32} {'error':>10}  {error[0]}")
+            continue
+        results[name] = {"median_ms": statistics.median(runs), "min_ms": min(runs)}
+        print(f"{name:32} {results[name]['median_ms']:10.1f} {results[name]['min_ms']:8.1f}")
+        for sub, seconds in warm.items():
+            print(f"  warm {sub:27} {seconds * 1000:10.1f}")
+        if warm:
+            results[name]["warm_ms"] = {k: v * 1000 for k, v in warm.items()}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
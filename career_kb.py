@@ -0,0 +1,148 @@
+"""
+Local career knowledge base.
+
+Careers (field, summary, applications, skills, roadmap, project ideas) ship
+as a versioned JSON bundle in data/careers.json. It is loaded once into an
+inverted index, so /careers search and lookups never call the model. The
+chat uses it to answer direct "roadmap for X" / "skills for X" questions
+outright, and to ground other replies that mention a known career.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+from html import escape
+
+from ats_score import tokenize
+
+CAREER_KB_PATH = os.getenv(
+    "CAREER_KB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "careers.json"))
+
+# How much a query term counts depending on where it appears in a career
+FIELD_WEIGHTS = {"title": 3.0, "aliases": 3.0, "field": 2.0, "skills": 1.5, "summary": 1.0}
+
+# Direct questions only: "roadmap for X", "X roadmap?", "how do I become X",
+# "what skills do I need for X". A career named in passing ("next steps after
+# my data scientist interview") is left to the model, with grounding notes.
+ROADMAP_RE = re.compile(
+    r"\b(road ?map|learning path)\s+(to|for|of|into|towards?)\b"
+    r"|\b(road ?map|learning path)\s*\W*$"
+    r"|\bhow (do|can|should|would) i (become|get into|start (a career )?(in|as))\b"
+    r"|\bhow to (become|get into|start (a career )?(in|as))\b"
+    r"|\b(steps|path) (to|for) (become|becoming|get into|getting into)\b"
+    r"|\bwhere (do|should) i start\b")
+SKILLS_RE = re.compile(
+    r"\bwhat (skills|qualifications)\b"
+    r"|\bskills? (do i need|are (needed|required)|needed|required|for|to become)\b"
+    r"|\bwhat (do|should) i (need to )?(learn|know|study)\b"
+    r"|\brequirements? (for|to become)\b"
+    r"|\bskills?\s*\W*$")
+DIRECT_MAX_WORDS = 25  # longer messages are conversation, not a lookup
+
+
+class CareerKB:
+    def __init__(self, bundle):
+        self.version = bundle.get("version", "0")
+        self.careers = {c["id"]: c for c in bundle.get("careers", [])}
+        self._index = {}    # term -> {career_id: weight}
+        self._phrases = []  # (phrase, career_id), longest first
+        for cid, career in self.careers.items():
+            weights = Counter()
+            for name, boost in FIELD_WEIGHTS.items():
+                value = career.get(name) or ""
+                text = " ".join(value) if isinstance(value, list) else value
+                for term in tokenize(text):
+                    weights[term] += boost
+            for term, w in weights.items():
+                self._index.setdefault(term, {})[cid] = w
+            for phrase in [career["title"]] + career.get("aliases", []):
+                if len(phrase) >= 3:  # "pm", "ds" are too ambiguous to match in chat
+                    self._phrases.append((phrase.lower(), cid))
+        self._phrases.sort(key=lambda p: -len(p[0]))
+        n = len(self.careers) or 1
+        self._idf = {t: math.log(1 + n / len(posting)) for t, posting in self._index.items()}
+
+    @classmethod
+    def load(cls, path=CAREER_KB_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def get(self, career_id):
+        return self.careers.get(career_id)
+
+    def search(self, query, limit=10):
+        """[(career_id, score)] ranked by weighted term overlap with the query."""
+        scores = Counter()
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for cid, w in self._index[term].items():
+                scores[cid] += w * idf
+        return [(cid, round(score, 3)) for cid, score in scores.most_common(limit)]
+
+    def match(self, text):
+        """Career whose title or alias is named in text, else None."""
+        text = " " + re.sub(r"[^a-z0-9+#/]+", " ", (text or "").lower()) + " "
+        for phrase, cid in self._phrases:
+            if f" {phrase} " in text:
+                return self.careers[cid]
+        return None
+
+
+# ------------------ Chat helpers ------------------
+
+def summary(career):
+    """Compact listing entry for search results."""
+    return {k: career[k] for k in ("id", "title", "field", "summary")}
+
+
+def _ul(items):
+    return "<ul>" + "".join(f"<li>{escape(i)}</li>" for i in items) + "</ul>"
+
+
+def render_roadmap(career):
+    stages = "".join(f"<h3>{escape(s['stage'])}</h3>{_ul(s['steps'])}" for s in career["roadmap"])
+    return (f"<h2>Roadmap: {escape(career['title'])}</h2>{stages}"
+            f"<h3>Project ideas</h3>{_ul(career.get('projects', []))}"
+            "<p>Would you like me to explain any of these steps in more detail?</p>")
+
+
+def render_skills(career):
+    skills = "".join(f"<li><b>{escape(s)}</b></li>" for s in career["skills"])
+    return (f"<h2>Skills for a {escape(career['title'])}</h2>"
+            f"<p>{escape(career['summary'])}</p><ul>{skills}</ul>"
+            "<p>Would you like me to show you a roadmap to learn these next?</p>")
+
+
+def direct_answer(kb, message):
+    """HTML reply for a roadmap/skills question about a known career, else None."""
+    career = kb.match(message)
+    if career is None:
+        return None
+    text = message.lower()
+    if len(text.split()) > DIRECT_MAX_WORDS:
+        return None
+    if ROADMAP_RE.search(text):
+        return render_roadmap(career)
+    if SKILLS_RE.search(text):
+        return render_skills(career)
+    return None
+
+
+def grounding_notes(kb, history, lookback=3):
+    """Reference notes on the career most recently named by the user, or ''."""
+    user_msgs = [m["content"] for m in history if m.get("role") == "user"][-lookback:]
+    for msg in reversed(user_msgs):
+        career = kb.match(msg)
+        if career is not None:
+            roadmap = "; ".join(f"{s['stage']}: {', '.join(s['steps'])}" for s in career["roadmap"])
+            return (
+                f"Reference notes on {career['title']} ({career['field']}), prefer these facts:\n"
+                f"- What it is: {career['summary']}\n"
+                f"- Applications: {'; '.join(career.get('applications', []))}\n"
+                f"- Key skills: {', '.join(career['skills'])}\n"
+                f"- Roadmap: {roadmap}\n"
+            )
+    return ""
@@ -0,0 +1,147 @@
+"""
+Similarity cache for the opening turns of the career chat.
+
+Most conversations open with one of a few dozen messages, so replies to the
+first and second user turns are cached and served to near-duplicate
+messages. Messages are compared as hashed character-trigram + word vectors
+(cosine similarity, looked up through an inverted index), within a context
+bucket: the first turn has an empty context, and the second turn is keyed
+by the assistant's first reply. Because a cached first reply is shared by
+everyone it was served to, they land in the same second-turn bucket.
+
+Trigram similarity can't see meaning, so a hit also needs the same polarity
+("I know" vs "I don't know") and the same content words, up to typos
+("software" and "hardware engineer" do not match).
+
+The index is process-local and bounded; least recently used entries go first.
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from ats_score import STOPWORDS
+from result_cache import cache_key, normalize_text
+
+CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", 0.9))
+CHAT_CACHE_ENTRIES = int(os.getenv("CHAT_CACHE_ENTRIES", 2000))
+# Longer messages carry personal detail; answer those fresh
+CHAT_CACHE_MAX_CHARS = int(os.getenv("CHAT_CACHE_MAX_CHARS", 200))
+CHAT_CACHE_MAX_TURN = 2
+
+_WORD_RE = re.compile(r"[a-z0-9+#']+")
+
+NEGATIONS = frozenset("not no never nor nothing none neither cannot dont doesnt didnt cant wont".split())
+WORD_MATCH_RATIO = 0.8  # spelling similarity at which two content words count as the same
+
+
+def message_signature(text):
+    """(negated, content_words) of a message; both must agree for a cache hit."""
+    words = [w.strip("'") for w in _WORD_RE.findall(normalize_text(text).lower())]
+    negated = any(w in NEGATIONS or w.endswith("n't") for w in words)
+    content = frozenset(w for w in words if w and w not in STOPWORDS
+                        and w not in NEGATIONS and not w.endswith("n't"))
+    return negated, content
+
+
+def _same_words(a, b):
+    """Every word in each set has a (possibly misspelled) counterpart in the other."""
+    def covered(xs, ys):
+        return all(x in ys or any(SequenceMatcher(None, x, y).ratio() >= WORD_MATCH_RATIO for y in ys)
+                   for x in xs)
+    return covered(a, b) and covered(b, a)
+
+
+def compatible(sig_a, sig_b):
+    return sig_a[0] == sig_b[0] and _same_words(sig_a[1], sig_b[1])
+
+
+def message_vector(text):
+    """L2-normalized sparse {feature_hash: weight} of char trigrams and words."""
+    text = " " + normalize_text(text).lower() + " "
+    feats = {}
+    for i in range(len(text) - 2):
+        h = zlib.crc32(text[i:i + 3].encode("utf-8"))
+        feats[h] = feats.get(h, 0.0) + 1.0
+    for word in _WORD_RE.findall(text):
+        h = zlib.crc32(b"w:" + word.encode("utf-8"))
+        feats[h] = feats.get(h, 0.0) + 2.0  # whole words outweigh shared fragments
+    norm = math.sqrt(sum(w * w for w in feats.values())) or 1.0
+    return {h: w / norm for h, w in feats.items()}
+
+
+def chat_context(history, model_name):
+    """
+    Cache bucket for the reply to the last message of history, or None if
+    this turn should not be cached (later turn, or a long, personal message).
+    """
+    if not history or history[-1].get("role") != "user":
+        return None
+    if len(history[-1].get("content", "")) > CHAT_CACHE_MAX_CHARS:
+        return None
+    if len(history) > 2 * CHAT_CACHE_MAX_TURN - 1:
+        return None
+    return cache_key(model_name, *(m["content"] for m in history[1:-1:2]))
+
+
+class SemanticCache:
+    def __init__(self, threshold=CHAT_CACHE_THRESHOLD, max_entries=CHAT_CACHE_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (context, vector, reply, signature)
+        self._postings = {}            # (context, feature) -> {id: weight}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def get(self, context, message):
+        """Cached reply for a message similar enough to one seen in context, or None."""
+        vec = message_vector(message)
+        signature = message_signature(message)
+        with self._lock:
+            scores = {}
+            for feat, weight in vec.items():
+                for entry_id, w in self._postings.get((context, feat), {}).items():
+                    scores[entry_id] = scores.get(entry_id, 0.0) + weight * w
+            for entry_id, score in sorted(scores.items(), key=lambda kv: -kv[1]):
+                if score < self.threshold:
+                    break
+                if compatible(signature, self._entries[entry_id][3]):
+                    self._entries.move_to_end(entry_id)
+                    self.counters["hits"] += 1
+                    return self._entries[entry_id][2]
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, context, message, reply):
+        vec = message_vector(message)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (context, vec, reply, message_signature(message))
+            for feat, weight in vec.items():
+                self._postings.setdefault((context, feat), {})[entry_id] = weight
+            self.counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        entry_id, (context, vec, _, _) = self._entries.popitem(last=False)
+        for feat in vec:
+            posting = self._postings.get((context, feat))
+            if posting is not None:
+                posting.pop(entry_id, None)
+                if not posting:
+                    del self._postings[(context, feat)]
+        self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
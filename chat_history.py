@@ -0,0 +1,123 @@
+"""
+Bounded conversation history for chat prompts.
+
+Prompts used to carry the whole conversation, so every turn cost more than
+the last. Instead, the latest KEEP_MESSAGES messages are sent verbatim and
+everything older is folded into a running summary kept in the session. The
+summary is refreshed by a model call only once SUMMARY_EVERY more messages
+have fallen out of the verbatim window, and every history is held to
+HISTORY_TOKEN_BUDGET regardless.
+"""
+import logging
+import os
+
+import metrics
+from llm import LLMOverloaded
+from prompt_budget import prompt_chars_saved
+
+logger = logging.getLogger("careercompass.chat_history")
+
+KEEP_MESSAGES = int(os.getenv("CHAT_HISTORY_KEEP_MESSAGES", 8))
+SUMMARY_EVERY = int(os.getenv("CHAT_HISTORY_SUMMARY_EVERY", 6))
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", 3000))
+SUMMARY_TOKENS = int(os.getenv("CHAT_HISTORY_SUMMARY_TOKENS", 300))
+FOLD_MESSAGE_CHARS = 1500  # per message, when feeding old turns to the summarizer
+
+summaries = metrics.counter(
+    "chat_history_summaries_total", "Running summary refreshes by outcome.", ("history", "outcome"))
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a conversation between a user and an AI career assistant.
+Update the summary with the new messages below. Keep what the assistant will need later:
+the user's goals, background, skills, details they have provided, decisions made, and open questions.
+Plain text, at most {words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:
+"""
+
+
+def transcript(messages, max_chars=None):
+    lines = []
+    for m in messages:
+        content = m["content"]
+        if max_chars and len(content) > max_chars:
+            content = content[:max_chars] + " […]"
+        lines.append(f"{m['role']}: {content}")
+    return "\n".join(lines)
+
+
+def render(summary, recent):
+    """History text for a prompt: the summary (if any), then the recent messages."""
+    text = transcript(recent)
+    if summary:
+        text = f"Summary of the earlier conversation:\n{summary}\n\nRecent messages:\n{text}"
+    return text
+
+
+def _fallback_summary(summary, messages):
+    """Extractive stand-in when the model can't summarize: clipped lines, newest kept."""
+    text = "\n".join(filter(None, [summary, transcript(messages, 160)]))
+    max_chars = SUMMARY_TOKENS * 4
+    return text if len(text) <= max_chars else "…" + text[-max_chars:].split("\n", 1)[-1]
+
+
+def _fit(summary, recent, budget):
+    """Hold render(summary, recent) to budget tokens; the newest message is kept last."""
+    recent = list(recent)
+    while len(recent) > 1 and metrics.estimate_tokens(render(summary, recent)) > budget:
+        recent.pop(0)
+    over = (metrics.estimate_tokens(render(summary, recent)) - budget) * 4
+    if over > 0 and summary:
+        cut = min(over, len(summary))
+        summary, over = summary[cut:], over - cut
+    if over > 0:
+        last = recent[-1]
+        recent[-1] = dict(last, content="[…] " + last["content"][over + 5:])
+    return summary, recent
+
+
+def history_window_flow(state, key, history, budget=HISTORY_TOKEN_BUDGET):
+    """
+    (summary, recent_messages) to put in a prompt in place of the full history.
+
+    state is the session mapping; the running summary of history[:upto] is
+    cached in state["history_summaries"][key]. A generator in the style of
+    builder_flow: the summary refresh is yielded as a ("history_summary",
+    prompt) model call.
+    """
+    cached = (state.get("history_summaries") or {}).get(key) or {}
+    summary, upto = cached.get("text", ""), cached.get("upto", 0)
+    if upto > len(history):  # history was cleared or replaced
+        summary, upto = "", 0
+
+    fold_to = max(0, len(history) - KEEP_MESSAGES)
+    overflow = metrics.estimate_tokens(render(summary, history[upto:])) > budget
+    if fold_to - upto >= SUMMARY_EVERY or (overflow and fold_to > upto):
+        folded = history[upto:fold_to]
+        prompt = SUMMARY_PROMPT.format(
+            words=SUMMARY_TOKENS * 3 // 4, summary=summary or "(none yet)",
+            messages=transcript(folded, FOLD_MESSAGE_CHARS))
+        try:
+            summary = (yield "history_summary", prompt).strip()
+            summaries.inc(history=key, outcome="ok")
+        except LLMOverloaded:
+            raise  # shed, not failed: keep the old summary so a retry refreshes it
+        except Exception as e:
+            logger.warning("summarizing %s history failed, using a clipped transcript: %s", key, e)
+            summary = _fallback_summary(summary, folded)
+            summaries.inc(history=key, outcome="fallback")
+        upto = fold_to
+        state["history_summaries"] = dict(state.get("history_summaries") or {},
+                                          **{key: {"text": summary, "upto": upto}})
+
+    summary, recent = _fit(summary, history[upto:], budget)
+    saved = len(transcript(history)) - len(render(summary, recent))
+    if saved > 0:
+        prompt_chars_saved.inc(saved, input=f"{key}_history")
+    return summary, recent
@@ -0,0 +1,318 @@
+"""
+Resume text extraction with hard limits.
+
+PDF pages are split into chunks and extracted across a process pool, every
+upload is capped in pages, characters and wall-clock time, and results are
+cached by the sha256 of the file bytes. An upload's time budget is shared by
+all of its tasks (page count and chunks) and starts when a worker picks up
+the first of them, so waiting behind other uploads doesn't count against it.
+Each task is also interrupted inside its worker once it has run for the
+budget; only one stuck past that (in C code that ignores the alarm) gets the
+pool's processes killed, and the other uploads in flight on that pool are
+resubmitted to its replacement. Spooled uploads are passed to the workers by path and read
+through mmap, so the file bytes are never pickled across the process
+boundary.
+"""
+import hashlib
+import mmap
+import os
+import signal
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import metrics
+from result_cache import ResultCache
+
+MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", 30))
+MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", 60000))
+TIME_BUDGET = float(os.getenv("EXTRACT_TIME_BUDGET_SECONDS", 10))
+PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", 4))
+WORKERS = int(os.getenv("EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))
+# Longest a task may wait for a free worker before the upload is turned away
+QUEUE_BUDGET = float(os.getenv("EXTRACT_QUEUE_BUDGET_SECONDS", 30))
+# A running task the in-worker alarm didn't stop gets its pool killed after this much more
+KILL_GRACE = TIME_BUDGET
+RESUBMITS = 2  # times a task is retried after another task's timeout broke the pool
+POLL_SECONDS = 0.05
+
+TOO_SLOW = "⚠️ This file took too long to read. Please upload a smaller resume."
+BUSY = "⚠️ We're reading a lot of files right now. Please try again in a minute."
+
+
+class ExtractionError(Exception):
+    """Raised when an upload cannot be turned into text within the limits."""
+
+
+# memory-only tier; extracted text is cheap to recompute after a restart
+_text_cache = ResultCache(None, ttl=3600, memory_entries=256)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS)
+        return _pool
+
+
+class _Budget:
+    """One upload's wall-clock budget, started when its first task starts running."""
+
+    __slots__ = ("ends",)
+
+    def __init__(self):
+        self.ends = None
+
+    def start(self, now):
+        if self.ends is None:
+            self.ends = now + TIME_BUDGET
+
+
+def _reset_pool(pool):
+    """
+    Kill pool after a timeout so runaway parses stop burning CPU. The next
+    _get_pool() starts a fresh one. A process pool can't lose one worker
+    without breaking, so other tasks on it fail with BrokenProcessPool and
+    are resubmitted by _wait().
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False)
+
+
+def _submit(fn, *args):
+    """[pool, future] of fn(*args) running under the per-task TIME_BUDGET."""
+    pool = _get_pool()
+    return [pool, pool.submit(_budgeted, TIME_BUDGET, fn, *args)]
+
+
+# ------------------ Worker functions (run in child processes) ------------------
+
+class _Overrun(Exception):
+    """A task ran past its budget and was interrupted in the worker."""
+
+
+def _alarm(signum, frame):
+    raise _Overrun()
+
+
+def _budgeted(budget, fn, *args):
+    """fn(*args), interrupted with _Overrun after budget seconds of running."""
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, budget)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _open(src):
+    """src is upload bytes or the path of a spooled upload file."""
+    if isinstance(src, (bytes, bytearray)):
+        return BytesIO(src)
+    with open(src, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _pdf_page_count(src):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(_open(src)).pages)
+
+
+def _pdf_pages_text(src, start, stop, max_chars):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(_open(src))
+    out, total = [], 0
+    for i in range(start, stop):
+        txt = reader.pages[i].extract_text() or ""
+        out.append(txt)
+        total += len(txt)
+        if total >= max_chars:
+            break
+    return "\f".join(out)  # page breaks, see prompt_budget.dedupe_lines
+
+
+def _docx_text(src, max_chars):
+    from docx import Document
+    doc = Document(_open(src))
+    out, total = [], 0
+    for p in doc.paragraphs:
+        out.append(p.text)
+        total += len(p.text) + 1
+        if total >= max_chars:
+            break
+    return "\n".join(out)
+
+
+def _warm_worker():
+    import docx  # noqa: F401
+    import PyPDF2  # noqa: F401
+    return os.getpid()
+
+
+# ------------------ Public API ------------------
+
+def warm():
+    """Start the worker processes and load the parsers in each of them."""
+    pool = _get_pool()
+    for future in [pool.submit(_warm_worker) for _ in range(WORKERS)]:
+        future.result(timeout=60)
+
+
+def _kill_if_stuck(pool, future, delay):
+    """Reset pool if future is still running after delay (its worker ignored the alarm)."""
+    def check():
+        if not future.done():
+            _reset_pool(pool)
+
+    timer = threading.Timer(max(0.0, delay), check)
+    timer.daemon = True
+    timer.start()
+
+
+def _wait(task, fn, args, budget=None):
+    """
+    Result of task, a [pool, future] from _submit(fn, *args), within budget
+    (a _Budget shared by the upload's tasks; a fresh one if None). Past the
+    budget the upload fails right away; a task still running is left to its
+    worker's alarm, and its pool is only killed if it is running past
+    TIME_BUDGET + KILL_GRACE. A task whose pool was torn down by someone
+    else's timeout is run again on the new pool; task is updated in place,
+    so the caller can cancel it.
+    """
+    budget = budget or _Budget()
+    for attempt in range(RESUBMITS + 1):
+        pool, future = task
+        queued_until = time.monotonic() + QUEUE_BUDGET
+        started = None
+        try:
+            while True:
+                now = time.monotonic()
+                if started is None and future.running():
+                    started = now
+                    budget.start(now)
+                if budget.ends is None:
+                    if now >= queued_until:
+                        raise ExtractionError(BUSY)
+                    timeout = POLL_SECONDS
+                else:
+                    timeout = budget.ends - now
+                    if timeout <= 0:
+                        if started is not None:
+                            _kill_if_stuck(pool, future, started + TIME_BUDGET + KILL_GRACE - now)
+                        raise ExtractionError(TOO_SLOW)
+                    if started is None:
+                        timeout = min(timeout, POLL_SECONDS)  # notice when it starts
+                try:
+                    return future.result(timeout=timeout)
+                except FutureTimeout:
+                    continue
+        except _Overrun:
+            raise ExtractionError(TOO_SLOW)
+        except (BrokenProcessPool, CancelledError):
+            if attempt == RESUBMITS:
+                raise ExtractionError(TOO_SLOW)
+            _reset_pool(pool)  # no-op if it was already replaced
+            task[:] = _submit(fn, *args)
+
+
+def _run(fn, *args, budget=None):
+    task = _submit(fn, *args)
+    try:
+        return _wait(task, fn, args, budget)
+    finally:
+        task[1].cancel()
+
+
+def extract_pdf(src):
+    budget = _Budget()
+    try:
+        pages = _run(_pdf_page_count, src, budget=budget)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"⚠️ Could not read PDF: {e}")
+    pages = min(pages, MAX_PAGES)
+
+    calls = [(src, start, min(start + PAGES_PER_TASK, pages), MAX_CHARS)
+             for start in range(0, pages, PAGES_PER_TASK)]
+    tasks = [_submit(_pdf_pages_text, *args) for args in calls]
+    chunks = []
+    try:
+        for task, args in zip(tasks, calls):
+            chunks.append(_wait(task, _pdf_pages_text, args, budget))
+            if sum(len(c) for c in chunks) >= MAX_CHARS:
+                break
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"⚠️ Could not read PDF: {e}")
+    finally:
+        for _, future in tasks:  # including resubmitted ones, updated in place
+            future.cancel()
+    return "\f".join(chunks)
+
+
+def extract_docx(src):
+    try:
+        return _run(_docx_text, src, MAX_CHARS)
+    except ExtractionError:
+        raise
+    except Exception as e:
+        raise ExtractionError(f"⚠️ Could not read DOCX: {e}")
+
+
+def _extract(src, digest, kind):
+    key = f"{kind}:{digest}"
+    cached = _text_cache.get(key)
+    if cached is not None:
+        return cached
+    if kind not in ("pdf", "docx"):
+        raise ExtractionError("Only PDF or DOCX files are supported")
+    with metrics.span(f"extract_{kind}"):
+        text = extract_pdf(src) if kind == "pdf" else extract_docx(src)
+    text = text.strip()[:MAX_CHARS]
+    _text_cache.set(key, text)
+    return text
+
+
+def extract_text(data, kind):
+    """
+    Extract text from raw upload bytes. kind is "pdf" or "docx".
+    Output is capped at MAX_CHARS and cached by file hash.
+    """
+    return _extract(data, hashlib.sha256(data).hexdigest(), kind)
+
+
+def file_digest(path):
+    """sha256 of a file, hashed through mmap without reading it into memory."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).hexdigest()
+
+
+def extract_file(path, kind, digest=None):
+    """Like extract_text, for an upload spooled to disk (see uploads.py)."""
+    return _extract(path, digest or file_digest(path), kind)
+
+
+def extract_text_from_pdf(file_stream) -> str:
+    """Extract text from an uploaded PDF (file stream)."""
+    return extract_text(file_stream.read(), "pdf")
+
+
+def extract_text_from_docx(file_stream) -> str:
+    """Extract text from an uploaded DOCX (file stream)."""
+    return extract_text(file_stream.read(), "docx")
@@ -0,0 +1,420 @@
+"""
+Job-posting index for resume-to-job matching.
+
+Postings come from a local JSONL file, one posting per line (id, title,
+company, location, url, skills, description), and are kept on disk as:
+
+* docs.jsonl / docs.idx: the postings, append-only, plus the end offset of
+  each line, so any posting can be read back with one seek.
+* seg-<generation>/: an inverted index over hashed TF-IDF features (sorted
+  feature ids, idf, CSR pointers, and per-feature postings of (doc, weight)
+  ordered by weight). The arrays are memory-mapped, so opening the index is
+  cheap and worker processes share the page cache.
+
+A query scores only the heaviest QUERY_TERMS features of the resume, and
+reads at most SCAN_LIMIT postings per feature; since postings are ordered by
+weight, those are the ones that can move a document into the top k.
+
+Postings added after the last build live in an in-memory delta index and are
+searched next to the segment. The writer folds them into a new segment once
+the delta grows past COMPACT_RATIO of the index. Servers pick up new postings
+and segments by checking the files every JOB_INDEX_REFRESH_SECONDS. There is
+one writer, the CLI:
+
+    python job_index.py build postings.jsonl [--index job_index]
+    python job_index.py add more_postings.jsonl
+    python job_index.py compact
+    python job_index.py query resume.txt [-k 10]
+"""
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+
+import metrics
+from ats_score import SKILL_TERMS, term_vector, tokenize
+
+JOB_INDEX_DIR = os.getenv("JOB_INDEX_DIR", "job_index")
+REFRESH_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_SECONDS", 5))
+
+DIM_BITS = 22          # hashed feature space
+DOC_TERMS = 128        # features kept per posting, by tf-idf weight
+QUERY_TERMS = 64       # features of the resume that are scored
+SCAN_LIMIT = 2000      # postings read per query feature
+COMPACT_RATIO = 0.1    # delta size, relative to the segment, that triggers a rebuild
+MIN_COMPACT = 1000
+
+# How much a term counts depending on where it appears in a posting
+FIELD_WEIGHTS = {"title": 3.0, "skills": 2.0, "description": 1.0}
+
+# Fields returned with a match
+SUMMARY_FIELDS = ("id", "title", "company", "location", "url")
+
+match_seconds = metrics.histogram(
+    "job_match_seconds", "Latency of top-k job posting searches.")
+
+
+def feature(term):
+    return zlib.crc32(term.encode("utf-8")) & ((1 << DIM_BITS) - 1)
+
+
+def _field_text(value):
+    return " ".join(value) if isinstance(value, list) else str(value or "")
+
+
+def raw_vector(posting):
+    """{feature: tf weight} of a posting, with title and skills boosted."""
+    vec = Counter()
+    for name, boost in FIELD_WEIGHTS.items():
+        for term, w in term_vector(tokenize(_field_text(posting.get(name)))).items():
+            vec[feature(term)] += w * boost
+    return vec
+
+
+def _weigh(vec, idf, keep):
+    """tf-idf weight vec, keep the heaviest `keep` features, L2-normalize."""
+    weighted = nlargest(keep, ((f, w * idf(f)) for f, w in vec.items()), key=itemgetter(1))
+    norm = math.sqrt(sum(w * w for _, w in weighted)) or 1.0
+    return [(f, w / norm) for f, w in weighted]
+
+
+def _map_array(path, typecode):
+    """Read-only memoryview over a file of packed values."""
+    if os.path.getsize(path) == 0:
+        return memoryview(array(typecode))
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mm).cast(typecode)
+
+
+class Segment:
+    """Immutable, memory-mapped inverted index written by write_segment()."""
+
+    FILES = (("terms", "I"), ("idf_values", "f"), ("ptr", "q"), ("docs", "I"), ("weights", "f"))
+
+    def __init__(self, path, n_docs):
+        self.path = path
+        self.n_docs = n_docs
+        for name, typecode in self.FILES:
+            setattr(self, name, _map_array(os.path.join(path, name), typecode))
+        self._default_idf = math.log(1 + max(n_docs, 1))
+
+    def idf(self, f, unseen=None):
+        """idf of f; a feature the segment lacks gets `unseen`, by default the highest idf."""
+        i = bisect_left(self.terms, f)
+        if i < len(self.terms) and self.terms[i] == f:
+            return self.idf_values[i]
+        return self._default_idf if unseen is None else unseen
+
+    def postings(self, f, limit):
+        i = bisect_left(self.terms, f)
+        if i == len(self.terms) or self.terms[i] != f:
+            return (), ()
+        start = self.ptr[i]
+        end = min(self.ptr[i + 1], start + limit)
+        return self.docs[start:end], self.weights[start:end]
+
+    def ids(self):
+        with open(os.path.join(self.path, "ids.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def empty(cls):
+        seg = cls.__new__(cls)
+        seg.path, seg.n_docs = None, 0
+        for name, typecode in cls.FILES:
+            setattr(seg, name, memoryview(array(typecode)))
+        seg.ptr = memoryview(array("q", [0]))
+        seg._default_idf = 1.0  # no statistics yet: weigh postings by term frequency alone
+        return seg
+
+
+def write_segment(path, vectors, ids):
+    """
+    Write a segment for {doc: raw_vector}; ids is {posting_id: doc} for the
+    same documents. Returns the number of documents indexed.
+    """
+    n = len(vectors)
+    df = Counter()
+    for vec in vectors.values():
+        df.update(vec.keys())
+    idf_of = {f: math.log(1 + n / c) for f, c in df.items()}
+
+    inverted = {}  # feature -> (array of docs, array of weights)
+    for doc in sorted(vectors):
+        for f, w in _weigh(vectors.pop(doc), idf_of.__getitem__, DOC_TERMS):
+            docs, weights = inverted.get(f) or inverted.setdefault(f, (array("I"), array("f")))
+            docs.append(doc)
+            weights.append(w)
+
+    os.makedirs(path)
+    terms = array("I", sorted(inverted))
+    ptr = array("q", [0])
+    with open(os.path.join(path, "docs"), "wb") as fd, open(os.path.join(path, "weights"), "wb") as fw:
+        for f in terms:
+            docs, weights = inverted.pop(f)
+            order = sorted(range(len(docs)), key=weights.__getitem__, reverse=True)
+            array("I", (docs[i] for i in order)).tofile(fd)
+            array("f", (weights[i] for i in order)).tofile(fw)
+            ptr.append(ptr[-1] + len(docs))
+    for name, values in (("terms", terms), ("idf_values", array("f", (idf_of[f] for f in terms))), ("ptr", ptr)):
+        with open(os.path.join(path, name), "wb") as f:
+            values.tofile(f)
+    with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    return n
+
+
+class JobIndex:
+    def __init__(self, path=JOB_INDEX_DIR):
+        self.path = path
+        self.docs_path = os.path.join(path, "docs.jsonl")
+        self.idx_path = os.path.join(path, "docs.idx")
+        self.meta_path = os.path.join(path, "meta.json")
+        self._lock = threading.RLock()  # guards the docs file handle and the delta
+        self._checked = 0.0
+        self._open()
+
+    # --- Loading ---
+
+    def _open(self):
+        os.makedirs(self.path, exist_ok=True)
+        for p in (self.docs_path, self.idx_path):
+            open(p, "ab").close()
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            self.meta = {"generation": 0, "indexed_docs": 0, "segment_docs": 0}
+        self._meta_mtime = os.path.getmtime(self.meta_path) if os.path.exists(self.meta_path) else 0
+        gen = self.meta["generation"]
+        self.segment = (Segment(os.path.join(self.path, f"seg-{gen}"), self.meta["segment_docs"])
+                        if gen else Segment.empty())
+        self._docs_file = open(self.docs_path, "rb")
+        self.offsets = array("q")
+        self._ids = None          # posting id -> doc, loaded on first update
+        self.dead = set()         # docs superseded by a newer posting with the same id
+        self.delta = {}           # feature -> ([docs], [weights]) for docs not in the segment
+        self.delta_docs = 0
+        self._load_new_docs()
+
+    def _load_offsets(self):
+        """Read offsets appended to docs.idx; returns the first new doc."""
+        known = len(self.offsets)
+        size = os.path.getsize(self.idx_path)
+        if size > known * 8:
+            with open(self.idx_path, "rb") as f:
+                f.seek(known * 8)
+                self.offsets.frombytes(f.read((size - known * 8) // 8 * 8))
+        return known
+
+    def _load_new_docs(self):
+        """Index postings appended to docs.jsonl since the last look into the delta."""
+        first = max(self.meta["indexed_docs"], self._load_offsets())
+        for doc in range(first, len(self.offsets)):
+            self._index_delta(doc, self.read(doc))
+
+    def _id_map(self):
+        if self._ids is None:
+            self._ids = self.segment.ids() if self.segment.path else {}
+        return self._ids
+
+    def _index_delta(self, doc, posting):
+        ids = self._id_map()
+        pid = str(posting.get("id") or f"doc-{doc}")
+        previous = ids.get(pid)
+        if previous is not None:
+            self.dead.add(previous)
+        ids[pid] = doc
+        for f, w in _weigh(raw_vector(posting), self.segment.idf, DOC_TERMS):
+            docs, weights = self.delta.setdefault(f, ([], []))
+            docs.append(doc)
+            weights.append(w)
+        self.delta_docs += 1
+
+    def refresh(self, force=False):
+        """Pick up postings or segments written by another process."""
+        now = time.monotonic()
+        if not force and now - self._checked < REFRESH_SECONDS:
+            return
+        self._checked = now
+        mtime = os.path.getmtime(self.meta_path) if os.path.exists(self.meta_path) else 0
+        with self._lock:
+            if mtime != self._meta_mtime:
+                self._docs_file.close()
+                self._open()
+            else:
+                self._load_new_docs()
+
+    # --- Reading ---
+
+    def count(self):
+        """Live postings (a method, so it also works through a startup.Lazy proxy)."""
+        return self.meta["segment_docs"] + self.delta_docs - len(self.dead)
+
+    __len__ = count
+
+    def read(self, doc):
+        start = self.offsets[doc - 1] if doc else 0
+        with self._lock:
+            self._docs_file.seek(start)
+            return json.loads(self._docs_file.read(self.offsets[doc] - start))
+
+    def search(self, text, k=10):
+        """[(doc, score)] of the k postings most similar to text (cosine of tf-idf vectors)."""
+        self.refresh()
+        started = time.perf_counter()
+        vec = Counter()
+        for term, w in term_vector(tokenize(text)).items():
+            vec[feature(term)] += w
+        scores = {}
+        get = scores.get
+        with self._lock:
+            segment, delta, dead = self.segment, self.delta, set(self.dead)
+
+        def query_idf(f):
+            # Names, schools and emails appear in no posting; with the unseen-term idf
+            # they would take every QUERY_TERMS slot from the terms that can match
+            return segment.idf(f, None if f in delta else 0.0)
+
+        for f, qw in _weigh(vec, query_idf, QUERY_TERMS):
+            if qw <= 0:
+                break
+            docs, weights = segment.postings(f, SCAN_LIMIT)
+            for d, w in zip(docs, weights):
+                scores[d] = get(d, 0.0) + qw * w
+            docs, weights = delta.get(f, ((), ()))
+            for d, w in zip(docs, weights):
+                scores[d] = get(d, 0.0) + qw * w
+        for d in dead:
+            scores.pop(d, None)
+        top = nlargest(k, scores.items(), key=itemgetter(1))
+        match_seconds.observe(time.perf_counter() - started)
+        return [(d, round(s, 4)) for d, s in top]
+
+    def match(self, text, k=10):
+        """Top-k postings for a resume, with the skills they share with it."""
+        resume_skills = {t for t in tokenize(text) if t in SKILL_TERMS}
+        results = []
+        for doc, score in self.search(text, k):
+            posting = self.read(doc)
+            posting_terms = set(tokenize(" ".join(_field_text(posting.get(n)) for n in FIELD_WEIGHTS)))
+            result = {name: posting.get(name) for name in SUMMARY_FIELDS if posting.get(name)}
+            result["score"] = score
+            shared = resume_skills & posting_terms
+            # "machine learning" says it all; drop "machine" and "learning"
+            result["matched_skills"] = sorted(
+                t for t in shared if not any(t != o and t in o.split() for o in shared))
+            results.append(result)
+        return results
+
+    # --- Writing (single writer) ---
+
+    def add(self, postings, compact=True):
+        """Append and index postings; same-id postings replace earlier ones. Returns the count added."""
+        added = self.append(postings)
+        with self._lock:
+            self._load_new_docs()
+        # the first add() builds a segment, so the postings get real idf weights
+        if compact and (not self.meta["generation"]
+                        or self.delta_docs > max(MIN_COMPACT, COMPACT_RATIO * self.meta["segment_docs"])):
+            self.compact()
+        return added
+
+    def append(self, postings):
+        """Write postings to docs.jsonl without indexing them (see compact())."""
+        added = 0
+        with self._lock, open(self.docs_path, "ab") as out, open(self.idx_path, "ab") as idx:
+            end = self.offsets[-1] if self.offsets else 0
+            new_offsets = array("q")
+            for posting in postings:
+                if not isinstance(posting, dict) or not (posting.get("title") or posting.get("description")):
+                    continue
+                line = (json.dumps(posting, ensure_ascii=False) + "\n").encode("utf-8")
+                out.write(line)
+                end += len(line)
+                new_offsets.append(end)
+                added += 1
+            out.flush()
+            os.fsync(out.fileno())
+            new_offsets.tofile(idx)  # after the data, so readers never see a torn posting
+        return added
+
+    def compact(self):
+        """Fold every live posting into a new segment and swap it in."""
+        with self._lock:
+            self._load_offsets()
+            n_docs = len(self.offsets)
+        vectors, ids = {}, {}
+        for doc in range(n_docs):
+            posting = self.read(doc)
+            pid = str(posting.get("id") or f"doc-{doc}")
+            vectors.pop(ids.get(pid), None)
+            ids[pid] = doc
+            vectors[doc] = raw_vector(posting)
+
+        gen = self.meta["generation"] + 1
+        segment_docs = write_segment(os.path.join(self.path, f"seg-{gen}"), vectors, ids)
+        meta = {"generation": gen, "indexed_docs": n_docs, "segment_docs": segment_docs}
+        with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+        old = self.meta["generation"]
+        self.refresh(force=True)
+        if old:
+            shutil.rmtree(os.path.join(self.path, f"seg-{old}"), ignore_errors=True)
+        return segment_docs
+
+
+def read_postings(path):
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print(f"line {lineno}: invalid JSON ({e})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build and query the job posting index.")
+    parser.add_argument("command", choices=("build", "add", "compact", "query"))
+    parser.add_argument("file", nargs="?", help="postings JSONL (build/add) or resume text (query)")
+    parser.add_argument("--index", default=JOB_INDEX_DIR, help="index directory")
+    parser.add_argument("-k", type=int, default=10, help="results for query")
+    args = parser.parse_args()
+    if args.command != "compact" and not args.file:
+        parser.error(f"{args.command} needs a file")
+
+    started = time.perf_counter()
+    if args.command == "query":
+        with open(args.file, encoding="utf-8") as f:
+            resume = f.read()
+        for result in JobIndex(args.index).match(resume, args.k):
+            print(json.dumps(result, ensure_ascii=False))
+        sys.exit(0)
+    if args.command == "build":
+        shutil.rmtree(args.index, ignore_errors=True)
+        index = JobIndex(args.index)
+        index.append(read_postings(args.file))
+        summary = f"indexed {index.compact()} posting(s)"
+    elif args.command == "add":
+        index = JobIndex(args.index)
+        summary = f"added {index.add(read_postings(args.file))} posting(s), {index.count()} live"
+    else:
+        summary = f"compacted {JobIndex(args.index).compact()} posting(s)"
+    print(f"{summary} in {time.perf_counter() - started:.2f}s")
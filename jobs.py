@@ -0,0 +1,121 @@
+"""
+Local background job queue.
+
+Jobs run on a thread pool inside the web process and their state is kept in
+SQLite, so any worker process can answer status/download requests. Job
+functions receive their job id and may write artifacts (rendered files) that
+are later served by the download endpoint.
+"""
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobQueue:
+    def __init__(self, db_path, artifact_dir, workers=4, keep_seconds=24 * 3600):
+        self.db_path = db_path
+        self.artifact_dir = os.path.abspath(artifact_dir)
+        self.keep_seconds = keep_seconds
+        os.makedirs(artifact_dir, exist_ok=True)
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._last_purge = 0.0
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created REAL NOT NULL,
+                finished REAL
+            )
+        """)
+        # Jobs left in flight by a dead process never finish; other live
+        # workers share this table, so only give up on ones that are long stale
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished = ? "
+            "WHERE status IN (?, ?) AND created < ?",
+            (FAILED, "Interrupted by a server restart", time.time(), QUEUED, RUNNING,
+             time.time() - 3600),
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def submit(self, kind, owner, fn, *args):
+        """Queue fn(job_id, *args) and return the job id immediately."""
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, owner, kind, status, created) VALUES (?, ?, ?, ?, ?)",
+            (job_id, owner, kind, QUEUED, time.time()),
+        )
+        self._pool.submit(self._run, job_id, fn, args)
+        if time.time() - self._last_purge > 3600:
+            self._last_purge = time.time()
+            self._pool.submit(self.purge)
+        return job_id
+
+    def _run(self, job_id, fn, args):
+        conn = self._conn()
+        conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (RUNNING, job_id))
+        try:
+            result = fn(job_id, *args)
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished = ? WHERE id = ?",
+                (DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+        except Exception as e:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+                (FAILED, str(e), time.time(), job_id),
+            )
+
+    def get(self, job_id):
+        """Return the job as a dict (result decoded), or None."""
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def artifact_path(self, job_id, ext):
+        return os.path.join(self.artifact_dir, f"{job_id}.{ext}")
+
+    def write_artifact(self, job_id, ext, data):
+        """Atomically store a rendered file for job_id."""
+        path = self.artifact_path(job_id, ext)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def purge(self):
+        """Delete finished jobs (and their artifacts) older than keep_seconds."""
+        cutoff = time.time() - self.keep_seconds
+        conn = self._conn()
+        old = [r["id"] for r in conn.execute(
+            "SELECT id FROM jobs WHERE finished IS NOT NULL AND finished < ?", (cutoff,)
+        )]
+        for job_id in old:
+            for path in glob.glob(os.path.join(self.artifact_dir, job_id + ".*")):
+                os.remove(path)
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(old)
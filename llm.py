@@ -0,0 +1,672 @@
+"""
+LLM client layer.
+
+Every Gemini call in the app goes through LLMClient (sync for the Flask app,
+async for the ASGI app), which adds per-call deadlines, retries with jittered
+exponential backoff, optional hedged requests for tail latency,
+single-flight coalescing of identical concurrent calls and
+per-call-site latency accounting. Backends are
+pluggable so the app can run against a deterministic local fake, or replay
+previously recorded responses, for offline load tests and benchmarks.
+
+LLM_BACKEND selects the backend: "gemini" (default), "fake", "record" or
+"replay" (the last two use LLM_REPLAY_FILE).
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import nullcontext
+
+import metrics
+
+
+class LLMError(Exception):
+    """The upstream model call failed after all retries."""
+
+
+class LLMTimeout(LLMError):
+    """The call did not finish within its deadline."""
+
+
+class LLMOverloaded(LLMError):
+    """Admission control turned the call away; retry after retry_after seconds."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Upstream errors worth retrying; matched by class name so the google client
+# libraries stay an implementation detail of GeminiBackend.
+RETRYABLE = {
+    "LLMTimeout", "TimeoutError", "DeadlineExceeded", "ServiceUnavailable",
+    "ResourceExhausted", "InternalServerError", "TooManyRequests", "Aborted",
+    "ConnectionError", "RetryError",
+}
+
+
+def is_retryable(exc):
+    return any(cls.__name__ in RETRYABLE for cls in type(exc).__mro__)
+
+
+def prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+# ------------------ Backends ------------------
+
+class GeminiBackend:
+    """google-generativeai backend. One shared GenerativeModel (and so one
+    pooled gRPC channel) serves every call. The model, and with it the
+    google client libraries, is only created on first use (or warm())."""
+
+    def __init__(self, model_factory, model_name):
+        self.model_factory = model_factory
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self.model_factory()
+        return self._model
+
+    def warm(self):
+        return self.model
+
+    def generate(self, prompt, timeout):
+        response = self.model.generate_content(prompt, request_options={"timeout": timeout})
+        return response.text or ""
+
+    def stream(self, prompt, timeout):
+        for chunk in self.model.generate_content(
+            prompt, stream=True, request_options={"timeout": timeout}
+        ):
+            yield chunk.text or ""
+
+    async def agenerate(self, prompt, timeout):
+        response = await self.model.generate_content_async(
+            prompt, request_options={"timeout": timeout}
+        )
+        return response.text or ""
+
+    async def astream(self, prompt, timeout):
+        response = await self.model.generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        async for chunk in response:
+            yield chunk.text or ""
+
+
+class FakeBackend:
+    """
+    Deterministic offline backend. Replies are derived from a hash of the
+    prompt and arrive after a configurable latency (LLM_FAKE_LATENCY_MS).
+    """
+
+    def __init__(self, model_name="fake", latency_ms=None, jitter_ms=None):
+        self.model_name = model_name
+        self.latency = float(os.getenv("LLM_FAKE_LATENCY_MS", 200) if latency_ms is None else latency_ms) / 1000
+        self.jitter = float(os.getenv("LLM_FAKE_JITTER_MS", 0) if jitter_ms is None else jitter_ms) / 1000
+
+    def _reply(self, prompt):
+        digest = prompt_key(self.model_name, prompt)
+        if "Return ONLY valid JSON" in prompt:
+            return json.dumps({
+                "contact": f"Candidate {digest[:6]} | candidate@example.com",
+                "summary": "Motivated graduate with hands-on project experience.",
+                "education": ["B.Tech Computer Science"],
+                "experience": ["Intern, Example Corp: built internal tools"],
+                "skills": ["Python", "SQL", "Communication"],
+                "projects": ["Career dashboard with Flask"],
+            })
+        if "ATS" in prompt:
+            return (f"- ATS Score: {int(digest[:2], 16) % 41 + 55}\n"
+                    "- Suggestions: - Add measurable results - Mirror the job keywords\n"
+                    "- Job Opportunities: - Junior Developer - Data Analyst")
+        if "Generate 5 short, distinct questions" in prompt:
+            return "\n".join(f"Question {i} ({digest[:4]})?" for i in range(1, 6))
+        return f"<h2>Mentor reply {digest[:8]}</h2><ul><li>Let's explore that together.</li></ul>"
+
+    def _delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def generate(self, prompt, timeout):
+        time.sleep(self._delay())
+        return self._reply(prompt)
+
+    def stream(self, prompt, timeout):
+        text = self._reply(prompt)
+        step = max(1, len(text) // 8)
+        for i in range(0, len(text), step):
+            time.sleep(self.latency / 8)
+            yield text[i:i + step]
+
+    async def agenerate(self, prompt, timeout):
+        await asyncio.sleep(self._delay())
+        return self._reply(prompt)
+
+    async def astream(self, prompt, timeout):
+        text = self._reply(prompt)
+        step = max(1, len(text) // 8)
+        for i in range(0, len(text), step):
+            await asyncio.sleep(self.latency / 8)
+            yield text[i:i + step]
+
+
+class RecordReplayBackend:
+    """
+    mode="record": call the inner backend and append each (prompt hash, reply)
+    to a JSONL file. mode="replay": answer only from that file.
+    """
+
+    def __init__(self, path, mode, inner=None, model_name="replay"):
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.model_name = inner.model_name if inner else model_name
+        self._lock = threading.Lock()
+        self._replies = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self._replies[row["key"]] = row["text"]
+
+    def _replay(self, key):
+        if key not in self._replies:
+            raise LLMError("No recorded response for this prompt")
+        return self._replies[key]
+
+    def _record(self, key, text):
+        with self._lock:
+            self._replies[key] = text
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "text": text}, ensure_ascii=False) + "\n")
+        return text
+
+    def generate(self, prompt, timeout):
+        key = prompt_key(self.model_name, prompt)
+        if self.mode == "replay":
+            return self._replay(key)
+        return self._record(key, self.inner.generate(prompt, timeout))
+
+    def stream(self, prompt, timeout):
+        yield self.generate(prompt, timeout)
+
+    async def agenerate(self, prompt, timeout):
+        key = prompt_key(self.model_name, prompt)
+        if self.mode == "replay":
+            return self._replay(key)
+        return self._record(key, await self.inner.agenerate(prompt, timeout))
+
+    async def astream(self, prompt, timeout):
+        yield await self.agenerate(prompt, timeout)
+
+
+# ------------------ Client ------------------
+
+class LLMClient:
+    def __init__(self, backend, timeout=60.0, retries=2, backoff=0.5, hedge_after=None,
+                 max_workers=32, coalesce=True, limiter=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.coalesce = coalesce
+        # optional admission.PriorityLimiter capping in-flight upstream calls
+        self.limiter = limiter
+        # calls run here so a hung upstream call cannot outlive its deadline
+        # on the request thread
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        # upstream calls still running after their caller gave up on them
+        # (a deadline, or the losing side of a hedge); see _release_when_done
+        self.abandoned = 0
+        self._inflight = {}   # prompt_key -> Future of the leading generate()
+        self._ainflight = {}  # (loop id, prompt_key) -> Task of the leading agenerate()
+        self.stats = {}
+
+    @property
+    def model_name(self):
+        return self.backend.model_name
+
+    def _slot(self, site, deadline):
+        if self.limiter is None:
+            return nullcontext()
+        return self.limiter.slot(site, deadline - time.monotonic())
+
+    def _hold(self, site, deadline):
+        if self.limiter is None:
+            return lambda: None
+        return self.limiter.hold(site, deadline - time.monotonic())
+
+    def _aslot(self, site, deadline):
+        if self.limiter is None:
+            return nullcontext()
+        return self.limiter.aslot(site, deadline - time.monotonic())
+
+    def _site_stats(self, site):
+        # caller holds self._lock
+        return self.stats.setdefault(site, {"calls": 0, "errors": 0, "retries": 0, "hedged": 0,
+                                            "coalesced": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+    def _record_coalesced(self, site):
+        with self._lock:
+            self._site_stats(site)["coalesced"] += 1
+        metrics.llm_coalesced_calls.inc(site=site)
+
+    def _record(self, site, elapsed, ok, attempts, hedged=False):
+        with self._lock:
+            s = self._site_stats(site)
+            s["calls"] += 1
+            s["errors"] += not ok
+            s["retries"] += attempts - 1
+            s["hedged"] += hedged
+            ms = elapsed * 1000
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+        metrics.llm_call_seconds.observe(elapsed, site=site, outcome="ok" if ok else "error")
+
+    def _retry_delay(self, exc, attempts, deadline, produced=False):
+        """Backoff before the next attempt, or None if exc should be raised."""
+        delay = self.backoff * (2 ** (attempts - 1)) * (0.5 + random.random())
+        if (produced or attempts > self.retries or not is_retryable(exc)
+                or time.monotonic() + delay >= deadline):
+            return None
+        return delay
+
+    @staticmethod
+    def _as_llm_error(exc):
+        if isinstance(exc, LLMError):
+            return exc
+        err = LLMError(str(exc))
+        err.__cause__ = exc
+        return err
+
+    def _release_when_done(self, release, futures):
+        """
+        Release an attempt's limiter slot once all of its upstream calls have
+        returned. A pool thread can't be interrupted, so a call abandoned at
+        its deadline (or a hedge that lost) keeps running; it keeps holding
+        the slot until it does, and so keeps counting against
+        LLM_MAX_INFLIGHT instead of letting new calls queue up behind it in
+        the pool. self.abandoned counts such calls.
+        """
+        pending = [f for f in futures if not f.done()]
+        if not pending:
+            release()
+            return
+        remaining = [len(pending)]
+        with self._lock:
+            self.abandoned += len(pending)
+
+        def finished(_):
+            with self._lock:
+                self.abandoned -= 1
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                release()
+
+        for future in pending:
+            future.add_done_callback(finished)
+
+    def _attempt(self, prompt, site, deadline):
+        """One logical attempt, hedged with a second call if it runs long."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeout("LLM deadline exceeded")
+        release = self._hold(site, deadline)
+        futures = set()
+        try:
+            futures.add(self._pool.submit(self.backend.generate, prompt, deadline - time.monotonic()))
+            hedged = False
+            if self.hedge_after and self.hedge_after < remaining:
+                done, _ = wait(futures, timeout=self.hedge_after)
+                if not done:
+                    futures.add(self._pool.submit(
+                        self.backend.generate, prompt, deadline - time.monotonic()))
+                    hedged = True
+            while futures:
+                done, futures = wait(futures, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    raise LLMTimeout("LLM deadline exceeded")
+                for future in done:
+                    if future.exception() is None:
+                        return future.result(), hedged
+                if not futures:
+                    raise next(iter(done)).exception()
+            raise LLMTimeout("LLM deadline exceeded")
+        finally:
+            self._release_when_done(release, futures)
+
+    def generate(self, prompt, site="default", timeout=None):
+        """
+        Return the model's text for prompt, retrying transient failures.
+        Concurrent calls with the same prompt share one upstream call and all
+        get its result or error.
+        """
+        if not self.coalesce:
+            return self._generate(prompt, site, timeout)
+        key = prompt_key(self.model_name, prompt)
+        with self._lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future = self._inflight[key] = Future()
+        if leader is not None:
+            self._record_coalesced(site)
+            try:
+                return leader.result(timeout=timeout or self.timeout)
+            except FutureTimeout:
+                raise LLMTimeout("LLM deadline exceeded")
+        try:
+            text = self._generate(prompt, site, timeout)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(text)
+            return text
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _generate(self, prompt, site, timeout):
+        metrics.observe_prompt(site, prompt)
+        started = time.monotonic()
+        deadline = started + (timeout or self.timeout)
+        attempts = 0
+        hedged = False
+        while True:
+            attempts += 1
+            try:
+                text, h = self._attempt(prompt, site, deadline)
+                hedged = hedged or h
+                self._record(site, time.monotonic() - started, True, attempts, hedged)
+                return text
+            except Exception as e:
+                delay = self._retry_delay(e, attempts, deadline)
+                if delay is None:
+                    self._record(site, time.monotonic() - started, False, attempts, hedged)
+                    raise self._as_llm_error(e)
+                time.sleep(delay)
+
+    def stream(self, prompt, site="default", timeout=None):
+        """
+        Yield text chunks as they arrive. Failures before the first chunk are
+        retried like generate(); once output has started they are raised.
+        """
+        metrics.observe_prompt(site, prompt)
+        started = time.monotonic()
+        deadline = started + (timeout or self.timeout)
+        attempts = 0
+        while True:
+            attempts += 1
+            produced = False
+            try:
+                with self._slot(site, deadline):
+                    for chunk in self.backend.stream(prompt, deadline - time.monotonic()):
+                        if time.monotonic() > deadline:
+                            raise LLMTimeout("LLM deadline exceeded")
+                        if chunk:
+                            produced = True
+                            yield chunk
+                self._record(site, time.monotonic() - started, True, attempts)
+                return
+            except Exception as e:
+                delay = self._retry_delay(e, attempts, deadline, produced)
+                if delay is None:
+                    self._record(site, time.monotonic() - started, False, attempts)
+                    raise self._as_llm_error(e)
+                time.sleep(delay)
+
+    # --- async API (ASGI app) ---
+    async def _aattempt(self, prompt, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeout("LLM deadline exceeded")
+        tasks = {asyncio.ensure_future(self.backend.agenerate(prompt, remaining))}
+        hedged = False
+        try:
+            if self.hedge_after and self.hedge_after < remaining:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+                if not done:
+                    tasks.add(asyncio.ensure_future(
+                        self.backend.agenerate(prompt, deadline - time.monotonic())))
+                    hedged = True
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise LLMTimeout("LLM deadline exceeded")
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), hedged
+                if not tasks:
+                    raise next(iter(done)).exception()
+            raise LLMTimeout("LLM deadline exceeded")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def agenerate(self, prompt, site="default", timeout=None):
+        """
+        Async generate(); the event loop is never blocked on the upstream call.
+        The shared upstream call runs as its own task, so one caller going away
+        does not cancel it for the others.
+        """
+        if not self.coalesce:
+            return await self._agenerate(prompt, site, timeout)
+        key = (id(asyncio.get_running_loop()), prompt_key(self.model_name, prompt))
+        task = self._ainflight.get(key)
+        if task is None:
+            task = self._ainflight[key] = asyncio.ensure_future(
+                self._agenerate(prompt, site, timeout))
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+        else:
+            self._record_coalesced(site)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise LLMTimeout("LLM deadline exceeded")
+
+    async def _agenerate(self, prompt, site, timeout):
+        metrics.observe_prompt(site, prompt)
+        started = time.monotonic()
+        deadline = started + (timeout or self.timeout)
+        attempts = 0
+        hedged = False
+        while True:
+            attempts += 1
+            try:
+                async with self._aslot(site, deadline):
+                    text, h = await self._aattempt(prompt, deadline)
+                hedged = hedged or h
+                self._record(site, time.monotonic() - started, True, attempts, hedged)
+                return text
+            except Exception as e:
+                delay = self._retry_delay(e, attempts, deadline)
+                if delay is None:
+                    self._record(site, time.monotonic() - started, False, attempts, hedged)
+                    raise self._as_llm_error(e)
+                await asyncio.sleep(delay)
+
+    async def astream(self, prompt, site="default", timeout=None):
+        """Async stream()."""
+        metrics.observe_prompt(site, prompt)
+        started = time.monotonic()
+        deadline = started + (timeout or self.timeout)
+        attempts = 0
+        while True:
+            attempts += 1
+            produced = False
+            try:
+                async with self._aslot(site, deadline):
+                    chunks = self.backend.astream(prompt, deadline - time.monotonic())
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise LLMTimeout("LLM deadline exceeded")
+                        if chunk:
+                            produced = True
+                            yield chunk
+                self._record(site, time.monotonic() - started, True, attempts)
+                return
+            except Exception as e:
+                delay = self._retry_delay(e, attempts, deadline, produced)
+                if delay is None:
+                    self._record(site, time.monotonic() - started, False, attempts)
+                    raise self._as_llm_error(e)
+                await asyncio.sleep(delay)
+
+    def snapshot(self):
+        with self._lock:
+            return {site: dict(s) for site, s in self.stats.items()}
+
+    def warm(self):
+        """Load the backend's client libraries ahead of the first call."""
+        backend = getattr(self.backend, "inner", None) or self.backend
+        if hasattr(backend, "warm"):
+            backend.warm()
+
+
+def run_flow(flow, client):
+    """
+    Drive a generator that yields (site, prompt) pairs, answering each with
+    client.generate(); returns the generator's return value. Model errors are
+    thrown back into the generator so it can fall back gracefully.
+    """
+    try:
+        request = next(flow)
+        while True:
+            site, prompt = request
+            try:
+                text = client.generate(prompt, site=site)
+            except Exception as e:
+                request = flow.throw(e)
+            else:
+                request = flow.send(text)
+    except StopIteration as stop:
+        return stop.value
+
+
+def start_stream(chunks):
+    """
+    Pull the first chunk of a stream() now and return an iterator over the
+    whole stream. Admission (the session charge and the limiter slot) and
+    failures before any output then reach the caller while it can still
+    answer with an error status, instead of inside a committed 200.
+    """
+    chunks = iter(chunks)
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return iter(())
+
+    def resume():
+        try:
+            yield first
+            yield from chunks
+        finally:
+            chunks.close()
+
+    return resume()
+
+
+async def astart_stream(chunks):
+    """start_stream() for astream()."""
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def resume():
+        if first is None:
+            return
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    return resume()
+
+
+def _advance(step, *args):
+    """(done, value) of one flow step; StopIteration can't cross an executor future."""
+    try:
+        return False, step(*args)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+async def arun_flow(flow, client, run_step=None):
+    """
+    run_flow() for the async client. If run_step is given, the flow's own
+    code between model calls runs through `await run_step(fn, *args)`, so
+    flows that touch blocking stores can be kept off the event loop.
+    """
+    async def advance(step, *args):
+        if run_step is None:
+            return _advance(step, *args)
+        return await run_step(_advance, step, *args)
+
+    done, value = await advance(next, flow)
+    while not done:
+        site, prompt = value
+        try:
+            text = await client.agenerate(prompt, site=site)
+        except Exception as e:
+            done, value = await advance(flow.throw, e)
+        else:
+            done, value = await advance(flow.send, text)
+    return value
+
+
+def create_llm_client(model_factory, model_name, limiter=None):
+    """
+    Build the client selected by the LLM_* environment variables.
+    model_factory() returns the configured Gemini GenerativeModel; it is only
+    called when a real backend makes its first call.
+    """
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "fake":
+        backend = FakeBackend(model_name)
+    elif kind == "replay":
+        backend = RecordReplayBackend(os.getenv("LLM_REPLAY_FILE", "llm_replay.jsonl"), "replay",
+                                      model_name=model_name)
+    elif kind in ("gemini", "record"):
+        backend = GeminiBackend(model_factory, model_name)
+        if kind == "record":
+            backend = RecordReplayBackend(os.getenv("LLM_REPLAY_FILE", "llm_replay.jsonl"),
+                                          "record", inner=backend)
+    else:
+        raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+    hedge = os.getenv("LLM_HEDGE_AFTER_SECONDS")
+    return LLMClient(
+        backend,
+        timeout=float(os.getenv("LLM_TIMEOUT_SECONDS", 60)),
+        retries=int(os.getenv("LLM_RETRIES", 2)),
+        hedge_after=float(hedge) if hedge else None,
+        coalesce=os.getenv("LLM_COALESCE", "1") != "0",
+        limiter=limiter,
+    )
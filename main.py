@@ -1,33 +1,64 @@
-from flask import Flask, render_template, session, request, jsonify, redirect, url_for, session, send_file
+from flask import Flask, render_template, session, request, jsonify, redirect, url_for, session, send_file, Response, stream_with_context
 from werkzeug.utils import secure_filename
-import google.generativeai as genai
-from PyPDF2 import PdfReader
-from docx import Document
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, HRFlowable, ListFlowable, ListItem
-from reportlab.lib.units import inch
 import os
 import json
+import shutil
+import tempfile
+import uuid
 from dotenv import load_dotenv
+from session_store import ServerSideSessionInterface, create_session_store
+from user_store import UserStore
+from result_cache import ResultCache, cache_key
+from extraction import extract_file, file_digest
+from ats_score import score_resume
+from batch_analysis import analyze_batch, spool_batch
+from jobs import JobQueue, DONE
+from job_index import JOB_INDEX_DIR, JobIndex
+from renderer import build_pdf_from_resume, build_docx_from_resume, render_cache
+import renderer
+import extraction
+import startup
+from llm import LLMOverloaded, create_llm_client, run_flow, start_stream
+import metrics
+import admission
+from question_cache import canonical_skills, skills_key, question_prompt, parse_questions
+from prompt_budget import budget_analyzer_inputs
+from chat_cache import SemanticCache, chat_context
+from chat_history import history_window_flow, render as render_history
+from career_kb import CareerKB, direct_answer, grounding_notes, summary as career_summary
+from resume_library import ResumeLibrary
+from uploads import MAX_REQUEST_BYTES, ROUTE_BODY_LIMITS, UPLOAD_TMP_DIR, UploadError, spool_upload
 
 load_dotenv()
 
 # ------------------ Flask Setup ------------------
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY")
+# Oversized requests get a 413 from the Content-Length header, before parsing
+app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+# Session state lives server-side; the cookie only carries a signed session id.
+# The store (and its SQLite migration) is opened by the first request or by warm().
+app.session_interface = ServerSideSessionInterface(startup.lazy("session_store", create_session_store))
+metrics.instrument_flask(app)
+# Per-session/IP rate limits and a prioritized cap on concurrent model calls
+admission.install_flask(app)
+
+
+@app.before_request
+def _route_body_limit():
+    # upload and JSON routes get tighter limits than the batch-sized app default
+    limit = ROUTE_BODY_LIMITS.get(request.path)
+    if limit is not None:
+        request.max_content_length = limit
+
+
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
 # ------------------ Gemini Setup (Hardcoded as requested) ------------------
-genai.configure(api_key=os.getenv("GENAI_API_KEY"))
-# Model for everything
-model = genai.GenerativeModel(
-    "gemini-1.5-flash",
-    system_instruction="""
+MODEL_NAME = "gemini-1.5-flash"
+MENTOR_INSTRUCTION = """
 You are a friendly mentor for beginners.  
 Your mission is to guide people step by step towards their dreams in an **interactive and engaging conversation**.
 
@@ -69,55 +100,194 @@ Your mission is to guide people step by step towards their dreams in an **intera
 - The main goal is to **either guide them in their chosen field OR help them discover one**. 
 - Dont leave Line where ever line is to be left instead start writing from that line onewards
 """
-)
+
+def create_model():
+    # Model for everything. The google client stack is imported here, on the
+    # first model call (or pre-warm), not when main is imported.
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GENAI_API_KEY"))
+    return genai.GenerativeModel(MODEL_NAME, system_instruction=MENTOR_INSTRUCTION)
+
+# All model calls go through this client (deadlines, retries, fake/replay backends)
+llm = create_llm_client(create_model, MODEL_NAME, limiter=admission.llm_limiter)
+startup.register_warmer("llm", llm.warm)
+startup.register_warmer("renderer", renderer.warm)
+startup.register_warmer("extraction", extraction.warm)
+
+# ------------------ Analysis Cache ------------------
+# Bump when the ATS prompt changes so stale analyses are not served
+ANALYSIS_PROMPT_VERSION = "ats-v1"
+analysis_cache = startup.lazy("analysis_cache", lambda: ResultCache(
+    os.getenv("ANALYSIS_CACHE_DB", "analysis_cache.db"),
+    ttl=int(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+    memory_entries=int(os.getenv("ANALYSIS_CACHE_ENTRIES", 512)),
+    max_disk_bytes=int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+))
+
+# Builder follow-up questions, keyed by canonical skill set
+question_cache = startup.lazy("question_cache", lambda: ResultCache(
+    os.getenv("QUESTION_CACHE_DB", "question_cache.db"),
+    ttl=int(os.getenv("QUESTION_CACHE_TTL_SECONDS", 30 * 24 * 3600)),
+    memory_entries=int(os.getenv("QUESTION_CACHE_ENTRIES", 2048)),
+    max_disk_bytes=int(os.getenv("QUESTION_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+))
+
+# Replies to the first two /chat turns, matched by message similarity
+chat_cache = SemanticCache()
+
+# ------------------ Career Knowledge Base ------------------
+career_kb = startup.lazy("career_kb", CareerKB.load)
+
+# ------------------ Job Postings ------------------
+# Built and updated offline with `python job_index.py build|add postings.jsonl`
+job_index = startup.lazy("job_index", lambda: JobIndex(JOB_INDEX_DIR))
+
+# ------------------ Background Jobs ------------------
+jobs = startup.lazy("jobs", lambda: JobQueue(
+    os.getenv("JOBS_DB", "jobs.db"),
+    os.path.join(UPLOAD_DIR, "jobs"),
+    workers=int(os.getenv("JOB_WORKERS", 4)),
+))
 
 # ------------------ User Store ------------------
-USERS_FILE = "users.json"
+USERS_FILE = "users.json"  # legacy store, imported once into USERS_DB
+USERS_DB = os.getenv("USERS_DB", "users.db")
+users = startup.lazy("users", lambda: UserStore(USERS_DB, legacy_json=USERS_FILE))
+
+# ------------------ Resume Library ------------------
+# Uploaded resumes, stored once per user with their extracted text
+resume_library = startup.lazy("resume_library", lambda: ResumeLibrary(
+    os.getenv("RESUME_LIBRARY_DB", "resume_library.db")))
 
-def load_users():
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    return {}
 
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+# Conversation histories are append-only in the server-side session store
+def get_history(key):
+    return app.session_interface.history(session, key)
 
+def append_history(key, role, content):
+    app.session_interface.append(session, key, {"role": role, "content": content})
 
 # Career chat (kept as-is but isolated per session)
 def get_chat():
-    if "chat_session" not in session:
-        # start a new chat history for this user session
-        session["chat_session"] = []
-    return session["chat_session"]
+    return get_history("chat_session")
 
 def append_chat(role, content):
-    chat_hist = get_chat()
-    chat_hist.append({"role": role, "content": content})
-    session["chat_session"] = chat_hist
+    append_history("chat_session", role, content)
+
+# ------------------ Streaming ------------------
+
+def wants_stream():
+    data = request.get_json(silent=True) or {}
+    return bool(data.get("stream")) or request.args.get("stream") == "1"
+
+def stream_reply(prompt, key, role, site, on_complete=None, user_msg=None):
+    """
+    Stream Gemini's answer chunk by chunk as chunked HTML.
+    The full reply is appended to the `key` history once the stream ends
+    (after user_msg, if given, so a stream that produced nothing leaves no
+    unanswered turn), and passed to on_complete(reply) if the stream
+    finished without error. Errors before the first chunk, LLMOverloaded
+    included, are raised to the route.
+    """
+    store = app.session_interface.store
+    sid = session.sid
+    # admission runs up to the first chunk, so an over-budget or shed request
+    # still gets its 429 (and queues) before the 200 is sent
+    chunks = start_stream(llm.stream(prompt, site=site))
+    # the reply is stored after save_session has run, so save (and set the
+    # cookie of) a new session now
+    app.session_interface.reserve(session)
+
+    def generate():
+        parts = []
+        completed = False
+        try:
+            for text in chunks:
+                parts.append(text)
+                yield text
+            completed = True
+        except Exception as e:
+            yield f"Error: {str(e)}"
+        finally:
+            if parts:
+                if user_msg is not None:
+                    store.append(sid, key, {"role": "user", "content": user_msg})
+                store.append(sid, key, {"role": role, "content": "".join(parts)})
+            if completed and parts and on_complete:
+                on_complete("".join(parts))
+
+    return Response(stream_with_context(generate()),
+                    mimetype="text/html",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # ------------------ Helpers ------------------
 
-def extract_text_from_pdf(file_stream) -> str:
-    """Extract text from an uploaded PDF (file stream)."""
-    reader = PdfReader(file_stream)
-    text = []
-    for page in reader.pages:
-        txt = page.extract_text() or ""
-        text.append(txt)
-    return "\n".join(text).strip()
-
-def extract_text_from_docx(file_stream) -> str:
-    """Extract text from an uploaded DOCX (file stream)."""
-    # python-docx expects a path-like or file-like, BytesIO is fine
-    doc = Document(file_stream)
-    return "\n".join(p.text for p in doc.paragraphs).strip()
+def chat_prompt(hist, summary=""):
+    # build a single prompt from the recent messages and a summary of older ones
+    history_text = render_history(summary, hist)
+    # ground answers about known careers in the local knowledge base
+    notes = grounding_notes(career_kb, hist)
+    return (notes + "\n" if notes else "") + history_text + f"\nassistant: "
 
-def gemini_structured_resume(conversation_messages):
+# Guide the user step-by-step
+RESUME_BUILDER_GUIDE = """
+You are a Resume Builder AI.
+- Ask for details step-by-step (name & contact, summary, education, experience, skills, projects).
+- After each user reply, ask the next most relevant question.
+- Keep answers short. Do NOT dump the full resume at once.
+"""
+
+def resume_builder_prompt(conversation, summary=""):
+    history_text = render_history(summary, conversation)
+    return RESUME_BUILDER_GUIDE + "\n" + history_text + "\nassistant:"
+
+def ats_prompt(resume_text, job_desc):
+    """Gemini ATS prompt for one resume against one job description."""
+    return f"""
+        You are an advanced Applicant Tracking System (ATS) evaluator.
+
+        TASKS:
+        1. Calculate an **ATS Compatibility Score** (0-100) of the resume against the job description.
+        2. Provide **detailed suggestions** on how the resume can be improved to match the job description better (skills, keywords, formatting, etc.).
+        3. Suggest **job opportunities / roles** that the candidate could apply for, based on their resume content and skillset.
+
+        Resume:
+        {resume_text}
+
+        Job Description:
+        {job_desc}
+
+        Respond in the following structured format:
+        - ATS Score: <score out of 100>
+        - Suggestions: <bullet points>
+        - Job Opportunities: <list of possible job roles>
+        """
+
+def ats_analysis_flow(resume_text, job_desc):
+    """
+    Gemini ATS analysis, served from analysis_cache when possible.
+    Flow generator (see builder_flow); returns (analysis_text, was_cached).
+    Inputs are cleaned and trimmed to the prompt budget (see prompt_budget.py)
+    first, so cosmetic differences in extracted text share a cache entry.
+    """
+    resume_text, job_desc = budget_analyzer_inputs(resume_text, job_desc)
+    key = cache_key(llm.model_name, ANALYSIS_PROMPT_VERSION, resume_text, job_desc)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached, True
+    analysis = yield "analyze_resume", ats_prompt(resume_text, job_desc)
+    analysis_cache.set(key, analysis)
+    return analysis, False
+
+def run_ats_analysis(resume_text, job_desc):
+    """Returns (analysis_text, was_cached)."""
+    return run_flow(ats_analysis_flow(resume_text, job_desc), llm)
+
+def structured_resume_flow(conversation_messages):
     """
     Ask Gemini to convert chat conversation into a structured JSON resume.
-    Returns dict with keys: contact, summary, education(list), experience(list), skills(list), projects(list)
+    Flow generator (see builder_flow); returns dict with keys: contact, summary,
+    education(list), experience(list), skills(list), projects(list)
     """
     convo_text = "\n".join(f"{m['role']}: {m['content']}" for m in conversation_messages)
     prompt = f"""
@@ -131,8 +301,7 @@ Rules:
 Conversation:
 {convo_text}
 """
-    response = model.generate_content(prompt)
-    raw = response.text.strip()
+    raw = (yield "structured_resume", prompt).strip()
     try:
         data = json.loads(raw)
         # sanity defaults
@@ -154,132 +323,8 @@ Conversation:
             "projects": []
         }
 
-def build_pdf_from_resume(resume_dict) -> BytesIO:
-    """
-    Build a professional-looking PDF from structured resume data using ReportLab.
-    Returns BytesIO buffer.
-    """
-    buf = BytesIO()
-    doc = SimpleDocTemplate(
-        buf, pagesize=A4,
-        leftMargin=36, rightMargin=36, topMargin=54, bottomMargin=36
-    )
-    styles = getSampleStyleSheet()
-
-    # Custom header styles
-    h_name = ParagraphStyle(
-        "NameHeader", parent=styles["Title"], fontSize=20, leading=24, spaceAfter=8
-    )
-    h_sec = ParagraphStyle(
-        "SectionHeader", parent=styles["Heading2"], textColor=colors.HexColor("#333333"),
-        spaceBefore=10, spaceAfter=6, underlineWidth=0.5
-    )
-    body = styles["Normal"]
-    body.spaceAfter = 2
-
-    story = []
-
-    # Contact / Name line
-    contact = resume_dict.get("contact", "").strip()
-    if contact:
-        story.append(Paragraph(contact, h_name))
-        story.append(HRFlowable(width="100%", color=colors.HexColor("#999999")))
-        story.append(Spacer(1, 0.15*inch))
-
-    # Summary
-    summary = resume_dict.get("summary", "").strip()
-    if summary:
-        story.append(Paragraph("Summary", h_sec))
-        story.append(Paragraph(summary, body))
-        story.append(Spacer(1, 0.1*inch))
-
-    # Education
-    education = resume_dict.get("education", [])
-    if education:
-        story.append(Paragraph("Education", h_sec))
-        edu_list = ListFlowable(
-            [ListItem(Paragraph(e, body), leftIndent=12) for e in education],
-            bulletType="bullet", start="circle"
-        )
-        story.append(edu_list)
-        story.append(Spacer(1, 0.08*inch))
-
-    # Experience
-    experience = resume_dict.get("experience", [])
-    if experience:
-        story.append(Paragraph("Experience", h_sec))
-        exp_list = ListFlowable(
-            [ListItem(Paragraph(x, body), leftIndent=12) for x in experience],
-            bulletType="bullet", start="circle"
-        )
-        story.append(exp_list)
-        story.append(Spacer(1, 0.08*inch))
-
-    # Skills
-    skills = resume_dict.get("skills", [])
-    if skills:
-        story.append(Paragraph("Skills", h_sec))
-        # render skills as comma-separated paragraph
-        story.append(Paragraph(", ".join(skills), body))
-        story.append(Spacer(1, 0.08*inch))
-
-    # Projects
-    projects = resume_dict.get("projects", [])
-    if projects:
-        story.append(Paragraph("Projects", h_sec))
-        proj_list = ListFlowable(
-            [ListItem(Paragraph(p, body), leftIndent=12) for p in projects],
-            bulletType="bullet", start="circle"
-        )
-        story.append(proj_list)
-
-    doc.build(story)
-    buf.seek(0)
-    return buf
-
-def build_docx_from_resume(resume_dict) -> BytesIO:
-    """
-    Build a DOCX resume using python-docx.
-    """
-    doc = Document()
-
-    contact = resume_dict.get("contact", "").strip()
-    if contact:
-        h = doc.add_heading(contact, level=0)
-    doc.add_paragraph("")  # spacer
-
-    summary = resume_dict.get("summary", "").strip()
-    if summary:
-        doc.add_heading("Summary", level=1)
-        doc.add_paragraph(summary)
-
-    education = resume_dict.get("education", [])
-    if education:
-        doc.add_heading("Education", level=1)
-        for e in education:
-            doc.add_paragraph(e, style="List Bullet")
-
-    experience = resume_dict.get("experience", [])
-    if experience:
-        doc.add_heading("Experience", level=1)
-        for x in experience:
-            doc.add_paragraph(x, style="List Bullet")
-
-    skills = resume_dict.get("skills", [])
-    if skills:
-        doc.add_heading("Skills", level=1)
-        doc.add_paragraph(", ".join(skills))
-
-    projects = resume_dict.get("projects", [])
-    if projects:
-        doc.add_heading("Projects", level=1)
-        for p in projects:
-            doc.add_paragraph(p, style="List Bullet")
-
-    buf = BytesIO()
-    doc.save(buf)
-    buf.seek(0)
-    return buf
+def gemini_structured_resume(conversation_messages):
+    return run_flow(structured_resume_flow(conversation_messages), llm)
 
 # ------------------ Routes (Pages) ------------------
 
@@ -292,10 +337,11 @@ def login():
     if request.method == "POST":
         email = request.form.get("email")
         password = request.form.get("password")
-        users = load_users()
+        user = users.get(email)
 
         # simple check
-        if email in users and users[email]["password"] == password:
+        if user and user["password"] == password:
+            app.session_interface.regenerate(session)  # no session fixation
             session["user"] = email
             return redirect(url_for("main"))
         else:
@@ -306,7 +352,8 @@ def login():
 
 @app.route('/logout', methods=['POST'])
 def logout():
-    session.clear()  
+    session.clear()
+    app.session_interface.regenerate(session)
     return redirect(url_for('login')) 
 
 @app.route("/register", methods=["GET", "POST"])
@@ -317,9 +364,7 @@ def register():
         email = request.form.get("email")
         password = request.form.get("password")
 
-        users = load_users()
-        users[email] = {"first": first, "last": last, "password": password}
-        save_users(users)
+        users.put(email, first, last, password)
 
         return redirect(url_for("login"))
     return render_template("register.html")
@@ -329,9 +374,8 @@ def main():
     if "user" not in session:
         return redirect(url_for("login"))
 
-    users = load_users()
     user_email = session["user"]
-    user_data = users.get(user_email, {})
+    user_data = users.get(user_email) or {}
     full_name = f"{user_data.get('first', '')} {user_data.get('last', '')}".strip()
 
     return render_template("main.html",
@@ -350,50 +394,49 @@ def analyzer():
         return redirect(url_for("login"))
     return render_template("analyzer.html")
 
-@app.route("/builder", methods=["POST"])
-def resume_builder_chat():
-    data = request.get_json(silent=True) or {}
-    user_msg = (data.get("message") or "").strip()
-
-    if not user_msg:
-        return jsonify({"reply": "⚠ Please type something."})
-
+def builder_flow(state, user_msg):
+    """
+    One turn of the /builder conversation, independent of the web framework.
+    state is the session mapping. Model calls are yielded as (site, prompt)
+    and answered with the generated text (see llm.run_flow / llm.arun_flow);
+    the JSON reply dict is the generator's return value.
+    """
     # Session state
-    step = session.get("resume_step", 0)              # 0..len(compulsory_qs)
-    answers = session.get("resume_answers", {})       # dict
+    step = state.get("resume_step", 0)              # 0..len(compulsory_qs)
+    answers = state.get("resume_answers", {})       # dict
 
     # Commands
     cmd = user_msg.lower()
     if cmd == "/restart_resume":
         for k in ["resume_step", "resume_answers", "custom_qs", "custom_step", "final_resume"]:
-            session.pop(k, None)
-        session["resume_step"] = 0
-        session["resume_answers"] = {}
-        return jsonify({"reply": "🔄 Restarting… Let's start again. What is your full name?"})
+            state.pop(k, None)
+        state["resume_step"] = 0
+        state["resume_answers"] = {}
+        return {"reply": "🔄 Restarting… Let's start again. What is your full name?"}
 
     if cmd == "/resume":
-        if "final_resume" in session:
-            return jsonify({"reply": "✅ Your resume is ready! Type /download to get your PDF."})
+        if "final_resume" in state:
+            return {"reply": "✅ Your resume is ready! Type /download to get your PDF."}
         # Not ready — tell user what’s missing
         pieces = []
         compulsory_needed = max(0, 5 - step)
         if compulsory_needed:
             pieces.append(f"{compulsory_needed} compulsory question(s) remaining.")
-        custom_qs = session.get("custom_qs", [])
-        custom_step = session.get("custom_step", 0)
+        custom_qs = state.get("custom_qs", [])
+        custom_step = state.get("custom_step", 0)
         if custom_qs and custom_step < len(custom_qs):
             pieces.append(f"{len(custom_qs) - custom_step} follow-up question(s) remaining.")
         if not pieces:
             pieces.append("Say anything to continue and I’ll finalize it.")
-        return jsonify({"reply": "⚠ Your resume isn’t ready yet. " + " ".join(pieces)})
+        return {"reply": "⚠ Your resume isn’t ready yet. " + " ".join(pieces)}
 
     if cmd == "/download":
-        if "final_resume" not in session:
-            return jsonify({"reply": "⚠ No resume generated yet. Type /resume when you're done answering questions."})
+        if "final_resume" not in state:
+            return {"reply": "⚠ No resume generated yet. Type /resume when you're done answering questions."}
         # IMPORTANT: return a link, not the file, so the fetch() in your chat UI doesn't break
-        return jsonify({
+        return {
             "reply": "⬇ Click to download your PDF: <a href='/download_resume' target='_blank'>Download Resume</a>"
-        })
+        }
 
     # Compulsory questions
     compulsory_qs = [
@@ -408,35 +451,27 @@ def resume_builder_chat():
     if step < len(compulsory_qs):
         # Save the answer for the current expected question (including the first one)
         answers[f"Q{step+1}"] = user_msg
-        session["resume_answers"] = answers
-        session["resume_step"] = step + 1
+        state["resume_answers"] = answers
+        state["resume_step"] = step + 1
 
         # Ask next compulsory question if any
         if step + 1 < len(compulsory_qs):
-            return jsonify({"reply": compulsory_qs[step + 1]})
+            return {"reply": compulsory_qs[step + 1]}
         else:
-            # Generate custom questions based on skills
-            skills = answers.get("Q5", "")
-            prompt = (
-                "Generate 5 short, distinct questions (one per line) to ask a candidate "
-                f"with skills: {skills}, to make a strong resume. Do not number them."
-            )
+            # Generate custom questions based on skills (memoized per skill set)
+            skills = canonical_skills(answers.get("Q5", "")) or [answers.get("Q5", "").strip()]
+            key = skills_key(skills)
             try:
-                gen = model.generate_content(prompt)
-                lines = (gen.text or "").splitlines()
-                # Clean bullet/number prefixes
-                import re
-                custom_qs = []
-                for ln in lines:
-                    ln = ln.strip()
-                    if not ln:
-                        continue
-                    ln = re.sub(r'^\s*(?:\d+[\).\s-]|[-•]\s)', '', ln)
-                    if ln:
-                        custom_qs.append(ln)
-                # Fallback if model returns nothing useful
-                if len(custom_qs) < 3:
-                    raise ValueError("Too few generated questions")
+                custom_qs = question_cache.get(key)
+                if custom_qs is None:
+                    custom_qs = parse_questions((yield "builder_questions", question_prompt(skills)))
+                    # Fallback if model returns nothing useful
+                    if len(custom_qs) < 3:
+                        raise ValueError("Too few generated questions")
+                    question_cache.set(key, custom_qs)
+            except LLMOverloaded:
+                state["resume_step"] = step  # so resending the answer retries
+                raise
             except Exception:
                 custom_qs = [
                     "Tell me about a project where you used those skills.",
@@ -445,46 +480,60 @@ def resume_builder_chat():
                     "What tools/technologies do you use most?",
                     "What kind of roles are you targeting next?"
                 ]
-            session["custom_qs"] = custom_qs
-            session["custom_step"] = 0
-            return jsonify({"reply": custom_qs[0]})
+            state["custom_qs"] = custom_qs
+            state["custom_step"] = 0
+            return {"reply": custom_qs[0]}
 
     # Custom, skill-based questions
-    custom_qs = session.get("custom_qs", [])
-    custom_step = session.get("custom_step", 0)
+    custom_qs = state.get("custom_qs", [])
+    custom_step = state.get("custom_step", 0)
 
     if custom_qs and custom_step < len(custom_qs):
         # Save answer to the current custom question
         answers[f"CustomQ{custom_step+1}"] = user_msg
-        session["resume_answers"] = answers
+        state["resume_answers"] = answers
         custom_step += 1
-        session["custom_step"] = custom_step
+        state["custom_step"] = custom_step
 
         # More custom questions remain?
         if custom_step < len(custom_qs):
-            return jsonify({"reply": custom_qs[custom_step]})
+            return {"reply": custom_qs[custom_step]}
         else:
             # Build resume
             try:
                 prompt = (
                     "Create a professional, concise resume in clean text (not code) "
                     "based on the following details:\n"
-                    f"{json.dumps(session['resume_answers'], ensure_ascii=False, indent=2)}"
+                    f"{json.dumps(state['resume_answers'], ensure_ascii=False, indent=2)}"
                 )
-                resume_draft = model.generate_content(prompt).text or ""
+                resume_draft = yield "builder_resume", prompt
+            except LLMOverloaded:
+                state["custom_step"] = custom_step - 1  # keep no draft; resending retries
+                raise
             except Exception:
                 resume_draft = "Resume draft could not be generated automatically. Please try again."
 
-            session["final_resume"] = resume_draft.strip()
-            return jsonify({
+            state["final_resume"] = resume_draft.strip()
+            return {
                 "reply": "✅ Your resume is ready! Type /download to get the PDF or /restart_resume to start again.",
-                "resume": session["final_resume"]
-            })
+                "resume": state["final_resume"]
+            }
 
     # Safety fallback
-    session["custom_qs"] = []
-    session["custom_step"] = 0
-    return jsonify({"reply": "I’m ready to continue. Tell me more about your projects or type /resume to generate your resume."})
+    state["custom_qs"] = []
+    state["custom_step"] = 0
+    return {"reply": "I’m ready to continue. Tell me more about your projects or type /resume to generate your resume."}
+
+@app.route("/builder", methods=["POST"])
+def resume_builder_chat():
+    data = request.get_json(silent=True) or {}
+    user_msg = (data.get("message") or "").strip()
+
+    if not user_msg:
+        return jsonify({"reply": "⚠ Please type something."})
+
+    return jsonify(run_flow(builder_flow(session, user_msg), llm))
+
 # ------------------ API: Career Chat (kept) ------------------
 
 @app.route("/chat", methods=["POST"])
@@ -493,77 +542,250 @@ def chat_with_ai():
     if not user_input:
         return jsonify({"reply": "⚠️ Please type something."})
     try:
-        # keep per-session chat memory using messages array (simple)
+        # the user turn is stored with its reply, so a shed request can be resent as is
+        user_turn = {"role": "user", "content": user_input}
+        # roadmap/skills questions about a known career need no model call
+        reply = direct_answer(career_kb, user_input)
+        if reply is not None:
+            append_chat("user", user_input)
+            append_chat("assistant", reply)
+            if wants_stream():
+                return Response(reply, mimetype="text/html")
+            return jsonify({"reply": reply, "source": "career_kb"})
+        hist = get_chat() + [user_turn]
+        # opening turns are answered from the similarity cache when possible
+        context = chat_context(hist, llm.model_name)
+        reply = chat_cache.get(context, user_input) if context is not None else None
+        if reply is not None:
+            append_chat("user", user_input)
+            append_chat("assistant", reply)
+            if wants_stream():
+                return Response(reply, mimetype="text/html")
+            return jsonify({"reply": reply, "cached": True})
+        remember = (lambda r: chat_cache.set(context, user_input, r)) if context is not None else None
+        # recent turns verbatim, older ones as a running summary
+        summary, recent = run_flow(history_window_flow(session, "chat_session", hist), llm)
+        prompt = chat_prompt(recent, summary)
+        if wants_stream():
+            return stream_reply(prompt, "chat_session", "assistant", "chat",
+                                on_complete=remember, user_msg=user_input)
+        reply = llm.generate(prompt, site="chat")
         append_chat("user", user_input)
-        # generate assistant response using full session history
-        hist = get_chat()
-        # build a single prompt from history (simple approach)
-        history_text = "\n".join(f"{m['role']}: {m['content']}" for m in hist)
-        response = model.generate_content(history_text + f"\nassistant: ")
-        reply = response.text
         append_chat("assistant", reply)
+        if remember:
+            remember(reply)
         return jsonify({"reply": reply})
+    except LLMOverloaded:
+        raise
     except Exception as e:
         return jsonify({"reply": f"Error: {str(e)}"})
 
+# ------------------ API: Career Knowledge Base ------------------
+
+def kb_response(payload, etag):
+    """JSON response that browsers and proxies may cache until the bundle changes."""
+    resp = jsonify(payload)
+    resp.set_etag(f"{career_kb.version}:{etag}")
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 3600
+    return resp.make_conditional(request)
+
+@app.route("/careers/search")
+def careers_search():
+    """?q=<text>&limit=<n> -> careers ranked by relevance."""
+    query = (request.args.get("q") or "").strip()
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 50)
+    if query:
+        results = [dict(career_summary(career_kb.get(cid)), score=score)
+                   for cid, score in career_kb.search(query, limit)]
+    else:
+        results = [career_summary(c) for c in list(career_kb.careers.values())[:limit]]
+    return kb_response({"version": career_kb.version, "results": results}, cache_key("search", query, limit))
+
+@app.route("/careers/<career_id>")
+def career_detail(career_id):
+    career = career_kb.get(career_id)
+    if career is None:
+        return jsonify({"error": "Unknown career"}), 404
+    return kb_response(dict(career, version=career_kb.version), career_id)
+
 # ------------------ API: Resume Analyzer ------------------
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": "⚠️ Upload is too large."}), 413
+
+def library_upload(storage, owner):
+    """
+    Spool an uploaded resume and return (resume_id, text). The file is only
+    extracted if owner has not stored the same bytes before; resume_id is None
+    when there is no logged-in owner to store it for.
+    """
+    with spool_upload(storage) as spooled:
+        digest = file_digest(spooled.path)
+        if owner:
+            resume_id = resume_library.find(owner, digest)
+            if resume_id:
+                return resume_id, resume_library.get(owner, resume_id)["text"]
+        text = extract_file(spooled.path, spooled.kind, digest)
+        if not owner or not text.strip():
+            return None, text
+        resume_id, _ = resume_library.add(owner, digest, text, secure_filename(spooled.filename or ""),
+                                          spooled.kind, spooled.size)
+        return resume_id, text
+
+
 @app.route("/analyze_resume", methods=["POST"])
 def analyze_resume():
+    files = request.files  # parse outside the try so a 413 reaches its handler
     try:
         # --- Get Job Description ---
         job_desc = (request.form.get("jobDescription") or "").strip()
 
         # --- Get Resume Text (pasted) ---
         resume_text = (request.form.get("resumeText") or "").strip()
+        resume_id = None
 
         # --- If File Uploaded, Use That Instead ---
-        if "resume" in request.files and request.files["resume"].filename:
-            f = request.files["resume"]
-            filename = secure_filename(f.filename)
-            ext = (os.path.splitext(filename)[1] or "").lower()
-
-            if ext == ".pdf":
-                resume_text = extract_text_from_pdf(f.stream)
-            elif ext in (".docx", ".doc"):
-                resume_text = extract_text_from_docx(f.stream)
-            else:
-                return jsonify({"error": "Only PDF or DOCX files are supported"})
+        if "resume" in files and files["resume"].filename:
+            try:
+                resume_id, resume_text = library_upload(files["resume"], session.get("user"))
+            except UploadError as e:
+                return jsonify({"error": str(e)}), e.status
+
+        # --- Or a resume already in the library ---
+        elif request.form.get("resume_id"):
+            stored = resume_library.get(session.get("user"), request.form["resume_id"])
+            if stored is None:
+                return jsonify({"error": "⚠️ Saved resume not found"}), 404
+            resume_id, resume_text = stored["id"], stored["text"]
 
         # --- Validate Inputs ---
         if not job_desc or not resume_text:
             return jsonify({"error": "⚠️ Resume text/file and job description are required"})
 
-        # --- Gemini ATS Prompt ---
-        prompt = f"""
-        You are an advanced Applicant Tracking System (ATS) evaluator.
+        # --- Instant local score (no LLM) ---
+        ats = score_resume(resume_text, job_desc)
+        if request.form.get("detailed", "1") == "0":
+            return jsonify({"ats": ats, "resume_id": resume_id})
 
-        TASKS:
-        1. Calculate an **ATS Compatibility Score** (0-100) of the resume against the job description.
-        2. Provide **detailed suggestions** on how the resume can be improved to match the job description better (skills, keywords, formatting, etc.).
-        3. Suggest **job opportunities / roles** that the candidate could apply for, based on their resume content and skillset.
+        # --- Gemini ATS analysis (cached) ---
+        analysis, cached = run_ats_analysis(resume_text, job_desc)
+        if cached:
+            return jsonify({"analysis": analysis, "ats": ats, "resume_id": resume_id, "cached": True})
+        return jsonify({"analysis": analysis, "ats": ats, "resume_id": resume_id})
 
-        Resume:
-        {resume_text}
-
-        Job Description:
-        {job_desc}
-
-        Respond in the following structured format:
-        - ATS Score: <score out of 100>
-        - Suggestions: <bullet points>
-        - Job Opportunities: <list of possible job roles>
-        """
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)})
 
-        # --- Call Gemini ---
-        response = model.generate_content(prompt)
 
-        return jsonify({"analysis": response.text})
+@app.route("/resumes", methods=["GET", "POST"])
+def resumes():
+    """
+    The logged-in user's resume library.
+    GET lists stored resumes; POST (file field "resume") adds one, returning
+    the existing entry if the same file was stored before.
+    """
+    if "user" not in session:
+        return jsonify({"error": "⚠️ Please log in"}), 401
+    owner = session["user"]
+    if request.method == "GET":
+        return jsonify({"resumes": resume_library.list(owner)})
+
+    upload = request.files.get("resume")
+    if upload is None or not upload.filename:
+        return jsonify({"error": "⚠️ No resume file uploaded"}), 400
+    try:
+        resume_id, text = library_upload(upload, owner)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    if resume_id is None:
+        return jsonify({"error": "⚠️ No text could be extracted from this file"}), 422
+    entry = resume_library.get(owner, resume_id, touch=False)
+    return jsonify({"resume_id": resume_id, "filename": entry["filename"],
+                    "sections": sorted(entry["sections"])})
+
+
+@app.route("/resumes/<resume_id>", methods=["GET", "DELETE"])
+def resume_entry(resume_id):
+    """One stored resume: its text and sections, or DELETE to remove it."""
+    if "user" not in session:
+        return jsonify({"error": "⚠️ Please log in"}), 401
+    if request.method == "DELETE":
+        if not resume_library.delete(session["user"], resume_id):
+            return jsonify({"error": "⚠️ Saved resume not found"}), 404
+        return jsonify({"deleted": resume_id})
+    entry = resume_library.get(session["user"], resume_id, touch=False)
+    if entry is None:
+        return jsonify({"error": "⚠️ Saved resume not found"}), 404
+    return jsonify(entry)
 
-    except Exception as e:
-        return jsonify({"error": str(e)})
 
 
+@app.route("/jobs/match", methods=["POST"])
+def jobs_match():
+    """
+    Top-k job postings for a resume, from the local posting index (no LLM).
+    Form fields: resume (file), resume_id, or resumeText; k (default 10).
+    """
+    k = min(max(request.form.get("k", 10, type=int), 1), 50)
+    resume_id = request.form.get("resume_id")
+    resume_text = (request.form.get("resumeText") or "").strip()
+    upload = request.files.get("resume")
+    if upload is not None and upload.filename:
+        try:
+            resume_id, resume_text = library_upload(upload, session.get("user"))
+        except UploadError as e:
+            return jsonify({"error": str(e)}), e.status
+    elif resume_id:
+        stored = resume_library.get(session.get("user"), resume_id)
+        if stored is None:
+            return jsonify({"error": "⚠️ Saved resume not found"}), 404
+        resume_text = stored["text"]
+    if not resume_text:
+        return jsonify({"error": "⚠️ Resume text or file is required"}), 400
+    return jsonify({"results": job_index.match(resume_text, k), "postings": job_index.count(),
+                    "resume_id": resume_id})
+
+
+@app.route("/analyze_batch", methods=["POST"])
+def analyze_batch_route():
+    """
+    Score many resumes against one job description.
+    Form fields: jobDescription, resumes (multiple files and/or .zip), detailed ("0" for local score only).
+    Streams one NDJSON line per resume as it finishes, then a summary line.
+    """
+    job_desc = (request.form.get("jobDescription") or "").strip()
+    uploads = [(secure_filename(f.filename), f) for f in request.files.getlist("resumes") if f.filename]
+    if not job_desc or not uploads:
+        return jsonify({"error": "⚠️ Resume files and job description are required"}), 400
+    detailed = request.form.get("detailed", "1") != "0"
+    # uploads and unzipped members are spooled here and extracted by path
+    workdir = tempfile.mkdtemp(prefix="batch-", dir=UPLOAD_TMP_DIR)
+    try:
+        files = spool_batch(uploads, workdir)
+        rows = analyze_batch(files, job_desc, run_ats_analysis, workdir, detailed=detailed)
+    except UploadError as e:
+        shutil.rmtree(workdir, ignore_errors=True)
+        return jsonify({"error": str(e)}), e.status
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    def generate():
+        try:
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            rows.close()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
 
 # ------------------ API: Resume Builder Chat + Exports ------------------
 
@@ -571,8 +793,9 @@ def analyze_resume():
 def resume_builder():
     """
     Chat endpoint for builder.html.
-    - Stores conversation in session["conversation"]
+    - Stores conversation in the server-side "conversation" history
     - If user types '/resume' in FE, they will call /generate_resume instead
+    - Send {"stream": true} (or ?stream=1) to receive the reply as it is generated
     """
     msg = (request.json or {}).get("message", "").strip()
     if not msg:
@@ -580,24 +803,20 @@ def resume_builder():
 
     try:
         # log conversation for this session
-        conversation = session.get("conversation", [])
+        conversation = get_history("conversation")
         conversation.append({"role": "user", "content": msg})
 
-        # Guide the user step-by-step
-        guide = """
-You are a Resume Builder AI.
-- Ask for details step-by-step (name & contact, summary, education, experience, skills, projects).
-- After each user reply, ask the next most relevant question.
-- Keep answers short. Do NOT dump the full resume at once.
-"""
-        history_text = "\n".join(f"{m['role']}: {m['content']}" for m in conversation)
-        prompt = guide + "\n" + history_text + "\nassistant:"
-        response = model.generate_content(prompt)
-        reply = response.text
+        summary, recent = run_flow(history_window_flow(session, "conversation", conversation), llm)
+        prompt = resume_builder_prompt(recent, summary)
+        if wants_stream():
+            return stream_reply(prompt, "conversation", "ai", "resume_builder", user_msg=msg)
+        reply = llm.generate(prompt, site="resume_builder")
 
-        conversation.append({"role": "ai", "content": reply})
-        session["conversation"] = conversation
+        append_history("conversation", "user", msg)
+        append_history("conversation", "ai", reply)
         return jsonify({"reply": reply})
+    except LLMOverloaded:
+        raise
     except Exception as e:
         return jsonify({"reply": f"Error: {str(e)}"})
 
@@ -607,7 +826,7 @@ def generate_resume():
     Generates a professional PDF from the current conversation.
     """
     try:
-        conversation = session.get("conversation", [])
+        conversation = get_history("conversation")
         if not conversation:
             return "No conversation yet.", 400
 
@@ -618,6 +837,8 @@ def generate_resume():
         return send_file(pdf_buf, as_attachment=True,
                          download_name="My_Resume.pdf",
                          mimetype="application/pdf")
+    except LLMOverloaded:
+        raise
     except Exception as e:
         return f"Error generating PDF: {str(e)}", 500
 
@@ -629,7 +850,7 @@ def generate_resume_docx():
     try:
         resume_json = session.get("resume_json")
         if not resume_json:
-            conversation = session.get("conversation", [])
+            conversation = get_history("conversation")
             if not conversation:
                 return "No data to build resume.", 400
             resume_json = gemini_structured_resume(conversation)
@@ -639,9 +860,129 @@ def generate_resume_docx():
         return send_file(docx_buf, as_attachment=True,
                          download_name="My_Resume.docx",
                          mimetype="application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+    except LLMOverloaded:
+        raise
     except Exception as e:
         return f"Error generating DOCX: {str(e)}", 500
 
+# ------------------ API: Background Resume Export Jobs ------------------
+
+EXPORT_FORMATS = {
+    "pdf": ("My_Resume.pdf", "application/pdf"),
+    "docx": ("My_Resume.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+
+def resume_export_job(job_id, conversation, resume_json=None):
+    """Structure the conversation once, then render every export format from it."""
+    if not resume_json:
+        resume_json = gemini_structured_resume(conversation)
+    jobs.write_artifact(job_id, "pdf", build_pdf_from_resume(resume_json).getvalue())
+    jobs.write_artifact(job_id, "docx", build_docx_from_resume(resume_json).getvalue())
+    return {"resume_json": resume_json, "formats": list(EXPORT_FORMATS)}
+
+def job_owner():
+    """
+    Owner recorded on jobs this session submits: the logged-in user, else an
+    anonymous id kept in the session data. Unlike session.sid, both survive
+    the id rotation on login.
+    """
+    if session.get("user"):
+        return "user:" + session["user"]
+    if "job_owner" not in session:
+        session["job_owner"] = "anon:" + uuid.uuid4().hex
+    return session["job_owner"]
+
+def get_own_job(job_id):
+    job = jobs.get(job_id)
+    # jobs queued before login stay visible to the user who logged in
+    owners = {"user:" + session["user"]} if session.get("user") else set()
+    owners.add(session.get("job_owner"))
+    if job is None or job["owner"] not in owners:
+        return None
+    return job
+
+@app.route("/resume_jobs", methods=["POST"])
+def submit_resume_job():
+    """
+    Queue PDF + DOCX export of the current conversation.
+    Returns {"job_id": ...} immediately; poll /resume_jobs/<job_id>.
+    """
+    conversation = get_history("conversation")
+    if not conversation:
+        return jsonify({"error": "No conversation yet."}), 400
+    job_id = jobs.submit("resume_export", job_owner(), resume_export_job,
+                         conversation, session.get("resume_json"))
+    return jsonify({"job_id": job_id, "status_url": url_for("resume_job_status", job_id=job_id)}), 202
+
+@app.route("/resume_jobs/<job_id>")
+def resume_job_status(job_id):
+    job = get_own_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    body = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == DONE:
+        body["downloads"] = {fmt: url_for("resume_job_download", job_id=job_id, fmt=fmt)
+                             for fmt in job["result"]["formats"]}
+    elif job["error"]:
+        body["error"] = job["error"]
+    return jsonify(body)
+
+@app.route("/resume_jobs/<job_id>/<fmt>")
+def resume_job_download(job_id, fmt):
+    job = get_own_job(job_id)
+    if job is None or fmt not in EXPORT_FORMATS:
+        return "Unknown job.", 404
+    if job["status"] != DONE:
+        return "Resume is not ready yet.", 409
+    # later synchronous exports reuse the structured resume; polls don't touch the session
+    if session.get("resume_json") != job["result"]["resume_json"]:
+        session["resume_json"] = job["result"]["resume_json"]
+    download_name, mimetype = EXPORT_FORMATS[fmt]
+    return send_file(jobs.artifact_path(job_id, fmt), as_attachment=True,
+                     download_name=download_name, mimetype=mimetype)
+
+# ------------------ Metrics ------------------
+
+@metrics.register_collector
+def cache_metrics():
+    caches = (("analysis", analysis_cache), ("questions", question_cache),
+              ("render", render_cache), ("chat", chat_cache))
+    for name, cache in caches:
+        if not getattr(cache, "loaded", True):
+            continue  # scraping should not open a lazy cache
+        stats = cache.stats()
+        for field in ("memory_hits", "disk_hits", "hits", "misses", "evictions"):
+            if field in stats:
+                yield ("cache_events_total", "Cache lookups and evictions by outcome.",
+                       "counter", {"cache": name, "event": field}, stats[field])
+        if "hit_rate" in stats:
+            yield ("cache_hit_ratio", "Share of lookups served from the cache.",
+                   "gauge", {"cache": name}, stats["hit_rate"])
+
+@metrics.register_collector
+def llm_metrics():
+    yield ("llm_abandoned_calls", "Upstream LLM calls still running after their caller gave up.",
+           "gauge", {}, llm.abandoned)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# ------------------ App Factory ------------------
+def create_app(prewarm=None):
+    """
+    Entry point for WSGI servers, e.g. gunicorn "main:create_app()".
+    Subsystems initialize on first use. With prewarm (off unless PREWARM=1
+    is set) they are loaded right away on a background thread, so the first
+    requests do not pay for them; call this in each worker, not before forking.
+    """
+    if prewarm is None:
+        prewarm = os.getenv("PREWARM", "0") == "1"
+    if prewarm:
+        startup.warm_in_background()
+    return app
+
 # ------------------ Run ------------------
 if __name__ == "__main__":
-    app.run(debug=True) 
\ No newline at end of file
+    create_app().run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A deliberately small registry (counters, histograms and scrape-time
+collectors) so the app needs no extra dependency. Values are per process;
+with several workers, scrape each one or aggregate upstream.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("careercompass.metrics")
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))  # 0 disables the slow log
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_labels(self.label_names, key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.label_names)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, row in items:
+            for bound, count in zip(self.buckets, row):
+                yield f"{self.name}_bucket{_labels(self.label_names, key, {'le': bound})} {count}"
+            yield f"{self.name}_bucket{_labels(self.label_names, key, {'le': '+Inf'})} {row[-1]}"
+            yield f"{self.name}_sum{_labels(self.label_names, key)} {row[-2]}"
+            yield f"{self.name}_count{_labels(self.label_names, key)} {row[-1]}"
+
+
+_registry = []
+_collectors = []
+
+
+def counter(name, help, labels=()):
+    metric = Counter(name, help, labels)
+    _registry.append(metric)
+    return metric
+
+
+def histogram(name, help, labels=(), buckets=LATENCY_BUCKETS):
+    metric = Histogram(name, help, labels, buckets)
+    _registry.append(metric)
+    return metric
+
+
+def register_collector(fn):
+    """
+    fn() is called on every scrape and returns an iterable of
+    (name, help, type, {label: value}, value) tuples, e.g. cache counters.
+    """
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    """All metrics in Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    seen = set()
+    for fn in _collectors:
+        try:
+            samples = list(fn())
+        except Exception:
+            logger.exception("metrics collector failed")
+            continue
+        for name, help, kind, labels, value in samples:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_labels(labels.keys(), labels.values())} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ------------------ Standard metrics ------------------
+
+http_request_seconds = histogram(
+    "http_request_duration_seconds", "Time to produce a response (headers for streams).",
+    ("route", "method", "status"))
+span_seconds = histogram(
+    "span_duration_seconds", "Duration of instrumented internal operations.", ("span",))
+llm_call_seconds = histogram(
+    "llm_call_duration_seconds", "LLM call latency including retries.", ("site", "outcome"))
+llm_coalesced_calls = counter(
+    "llm_coalesced_calls_total", "LLM calls served by an identical call already in flight.", ("site",))
+llm_prompt_chars = counter(
+    "llm_prompt_chars_total", "Prompt characters sent to the LLM.", ("site",))
+llm_prompt_tokens = histogram(
+    "llm_prompt_tokens", "Estimated prompt tokens per LLM call.", ("site",), TOKEN_BUCKETS)
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose
+    return (len(text) + 3) // 4
+
+
+def observe_prompt(site, prompt):
+    llm_prompt_chars.inc(len(prompt), site=site)
+    llm_prompt_tokens.observe(estimate_tokens(prompt), site=site)
+
+
+@contextmanager
+def span(name):
+    """Time a block of work under span_duration_seconds{span=name}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_seconds.observe(time.perf_counter() - started, span=name)
+
+
+def observe_request(route, method, status, started):
+    elapsed = time.perf_counter() - started
+    http_request_seconds.observe(elapsed, route=route, method=method, status=status)
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        logger.warning("slow request: %s %s -> %s in %.0f ms", method, route, status, elapsed * 1000)
+
+
+def instrument_flask(app):
+    """Time every request of a Flask app into http_request_duration_seconds."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = getattr(g, "_metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe_request(route, request.method, response.status_code, started)
+        return response
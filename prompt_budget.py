@@ -0,0 +1,183 @@
+"""
+Prompt input budgeting for the analyzer.
+
+Extracted resume text and pasted job descriptions are cleaned up before they
+are pasted into a prompt: hyphenation debris and whitespace runs are fixed,
+page numbers, running page headers/footers and duplicated long lines are
+dropped, and each input is trimmed to a token budget by removing its
+lowest-priority sections first.
+"""
+import logging
+import os
+import re
+
+import metrics
+
+logger = logging.getLogger("careercompass.prompt_budget")
+
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", 2500))
+JOB_TOKEN_BUDGET = int(os.getenv("JOB_TOKEN_BUDGET", 1500))
+
+prompt_chars_saved = metrics.counter(
+    "prompt_input_chars_saved_total", "Characters removed from prompt inputs by budgeting.", ("input",))
+
+# Lower number = more important; unknown sections get DEFAULT_PRIORITY
+RESUME_PRIORITIES = {
+    "contact": 0, "summary": 1, "skills": 1, "experience": 1, "projects": 2,
+    "education": 2, "certifications": 3, "achievements": 3, "publications": 4,
+    "languages": 4, "activities": 5, "interests": 6, "references": 7,
+}
+JOB_PRIORITIES = {
+    "header": 0, "requirements": 0, "qualifications": 0, "responsibilities": 1,
+    "skills": 1, "preferred": 2, "about the role": 2, "benefits": 5,
+    "about us": 5, "company": 5, "equal opportunity": 7, "how to apply": 6,
+}
+DEFAULT_PRIORITY = 3
+
+SECTION_ALIASES = {
+    "professional summary": "summary", "profile": "summary", "objective": "summary",
+    "about me": "summary", "technical skills": "skills", "key skills": "skills",
+    "core competencies": "skills", "work experience": "experience",
+    "professional experience": "experience", "employment history": "experience",
+    "internships": "experience", "internship": "experience", "academic background": "education",
+    "certificates": "certifications", "awards": "achievements", "hobbies": "interests",
+    "what you'll do": "responsibilities", "what you will do": "responsibilities",
+    "duties": "responsibilities", "requirements": "requirements",
+    "what we're looking for": "requirements", "must have": "requirements",
+    "nice to have": "preferred", "preferred qualifications": "preferred",
+    "bonus points": "preferred", "perks": "benefits", "what we offer": "benefits",
+    "about the company": "about us", "who we are": "about us",
+}
+KNOWN_SECTIONS = set(RESUME_PRIORITIES) | set(JOB_PRIORITIES) | set(SECTION_ALIASES)
+
+PAGE_BREAK = "\f"  # extraction puts one between PDF pages
+
+_PAGE_NUMBER_RE = re.compile(r"page\s*\d{1,3}(\s*(of|/)\s*\d{1,3})?|\d{1,3}\s*(of|/)\s*\d{1,3}")
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+EDGE_LINES = 2             # lines at the top and bottom of a page that may be a header/footer
+DUPLICATE_MIN_CHARS = 40   # shorter repeats ("Remote", "Python", dates) are content
+
+_HEADING_RE = re.compile(r"^\s*#*\s*([A-Za-z][A-Za-z '’&/-]{1,40}?)\s*:?\s*$")
+
+
+def _heading(line):
+    """Canonical section name if line is a section heading, else None."""
+    m = _HEADING_RE.match(line)
+    if not m:
+        return None
+    name = m.group(1).lower().replace("’", "'").strip()
+    if name in KNOWN_SECTIONS:
+        return SECTION_ALIASES.get(name, name)
+    return None
+
+
+def normalize_text(text):
+    """Fix hyphenation across line breaks, tidy whitespace and blank lines."""
+    text = (text or "").replace("\r\n", "\n").replace("\r", "\n").replace("­", "")
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)       # "develop-\nment"
+    text = re.sub(r"[ \t ]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\s*\f\s*", "\n\f\n", text)  # page breaks on a line of their own
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _running_lines(pages):
+    """Lines that sit at a page edge on at least half of the pages, about once per page."""
+    if len(pages) < 2:
+        return set()
+    at_edges, total = {}, {}
+    for page in pages:
+        keys = [ln.strip().lower() for ln in page if ln.strip()]
+        for key in keys:
+            total[key] = total.get(key, 0) + 1
+        for key in set(keys[:EDGE_LINES] + keys[-EDGE_LINES:]):
+            at_edges[key] = at_edges.get(key, 0) + 1
+    needed = max(2, (len(pages) + 1) // 2)
+    return {key for key, n in at_edges.items()
+            if n >= needed and total[key] <= len(pages) + 1 and not _YEAR_RE.search(key)}
+
+
+def dedupe_lines(text):
+    """
+    Drop page numbers ("Page 2", "2 of 3"), running headers/footers that repeat
+    at the page breaks, and repeats of long lines (first occurrence kept).
+    Short repeated lines such as locations, dates or skills are left alone.
+    """
+    pages = [[]]
+    for ln in text.replace(PAGE_BREAK, "\n" + PAGE_BREAK + "\n").split("\n"):
+        if ln == PAGE_BREAK:
+            pages.append([])
+        else:
+            pages[-1].append(ln)
+    running = _running_lines(pages)
+    seen = set()
+    out = []
+    for ln in (ln for page in pages for ln in page):
+        key = ln.strip().lower()
+        if not key:
+            out.append(ln)
+            continue
+        if _PAGE_NUMBER_RE.fullmatch(key) or (key in running and _heading(ln) is None):
+            continue
+        if len(key) >= DUPLICATE_MIN_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        out.append(ln)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(out)).strip()
+
+
+def split_sections(text, first="header"):
+    """[(section_name, text)] in document order; text before any heading is `first`."""
+    sections = [[first, []]]
+    for ln in text.split("\n"):
+        name = _heading(ln)
+        if name:
+            sections.append([name, [ln]])
+        else:
+            sections[-1][1].append(ln)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if "\n".join(lines).strip()]
+
+
+def trim_to_budget(text, budget_tokens, priorities, first="header"):
+    """Drop the lowest-priority sections (latest first) until within budget, then cut."""
+    if metrics.estimate_tokens(text) <= budget_tokens:
+        return text
+    sections = split_sections(text, first)
+    keep = list(range(len(sections)))
+    by_priority = sorted(keep, key=lambda i: (priorities.get(sections[i][0], DEFAULT_PRIORITY), i),
+                         reverse=True)
+    total = sum(metrics.estimate_tokens(body) for _, body in sections)
+    for i in by_priority:
+        if total <= budget_tokens or len(keep) == 1:
+            break
+        if priorities.get(sections[i][0], DEFAULT_PRIORITY) == 0:
+            break  # never drop must-keep sections; fall through to the hard cut
+        keep.remove(i)
+        total -= metrics.estimate_tokens(sections[i][1])
+    trimmed = "\n\n".join(sections[i][1] for i in keep)
+    max_chars = budget_tokens * 4
+    if len(trimmed) > max_chars:
+        trimmed = trimmed[:max_chars].rsplit("\n", 1)[0] + "\n[…truncated]"
+    return trimmed
+
+
+def prepare(text, budget_tokens, priorities, label, first="header"):
+    """Normalize, de-duplicate and trim one prompt input; logs and counts savings."""
+    raw_len = len(text or "")
+    cleaned = trim_to_budget(dedupe_lines(normalize_text(text)), budget_tokens, priorities, first)
+    saved = raw_len - len(cleaned)
+    if saved > 0:
+        prompt_chars_saved.inc(saved, input=label)
+        logger.info("%s: trimmed %d -> %d chars (~%d tokens saved)",
+                    label, raw_len, len(cleaned), saved // 4)
+    return cleaned
+
+
+def budget_analyzer_inputs(resume_text, job_desc):
+    """(resume_text, job_desc) ready for the ATS prompt."""
+    return (
+        prepare(resume_text, RESUME_TOKEN_BUDGET, RESUME_PRIORITIES, "resume", first="contact"),
+        prepare(job_desc, JOB_TOKEN_BUDGET, JOB_PRIORITIES, "job_description"),
+    )
@@ -0,0 +1,117 @@
+"""
+Memoized follow-up questions for the /builder flow.
+
+Generated question sets are cached under a canonical form of the user's
+skills answer (lowercased, aliases folded, de-duplicated and sorted), so
+"Python, SQL, excel" and "ms excel and python / sql" share one entry.
+The most common skill combinations can be generated ahead of time:
+
+    python question_cache.py --from-sessions sessions.db --top 200
+    python question_cache.py --from-file skills.txt --top 200
+"""
+import re
+from collections import Counter
+
+# Bump when the question prompt changes so stale sets are not served
+QUESTION_PROMPT_VERSION = "q-v1"
+
+SKILL_ALIASES = {
+    "ms excel": "excel", "microsoft excel": "excel", "advanced excel": "excel",
+    "js": "javascript", "ts": "typescript", "py": "python", "python3": "python",
+    "postgres": "postgresql", "ml": "machine learning", "ai": "artificial intelligence",
+    "dl": "deep learning", "reactjs": "react", "react.js": "react", "nodejs": "node.js",
+    "node": "node.js", "golang": "go", "powerbi": "power bi", "ms word": "word",
+    "microsoft word": "word", "c plus plus": "c++", "cpp": "c++",
+}
+
+_SPLIT_RE = re.compile(r"\s*(?:,|;|(?<!ci)/|\||\n|\band\b|&|\s\+\s)\s*", re.IGNORECASE)
+
+
+def canonical_skills(text):
+    """Sorted, de-duplicated list of normalized skills from a free-text answer."""
+    skills = set()
+    for part in _SPLIT_RE.split(text or ""):
+        skill = " ".join(part.lower().strip(" .-•*").split())
+        if skill:
+            skills.add(SKILL_ALIASES.get(skill, skill))
+    return sorted(skills)
+
+
+def skills_key(skills):
+    return QUESTION_PROMPT_VERSION + ":" + "|".join(skills)
+
+
+def question_prompt(skills):
+    return (
+        "Generate 5 short, distinct questions (one per line) to ask a candidate "
+        f"with skills: {', '.join(skills)}, to make a strong resume. Do not number them."
+    )
+
+
+def parse_questions(text):
+    """Model output -> list of questions with bullet/number prefixes removed."""
+    questions = []
+    for ln in (text or "").splitlines():
+        ln = ln.strip()
+        if not ln:
+            continue
+        ln = re.sub(r'^\s*(?:\d+[\).\s-]|[-•]\s)', '', ln).strip()
+        if ln:
+            questions.append(ln)
+    return questions
+
+
+def most_common(answers, top):
+    """The top most frequent canonical skill sets among raw answers."""
+    counts = Counter(tuple(canonical_skills(a)) for a in answers)
+    counts.pop((), None)
+    return [list(skills) for skills, _ in counts.most_common(top)]
+
+
+def prewarm(skill_sets, cache, generate):
+    """
+    Generate and cache question sets that are not cached yet.
+    generate(prompt) -> model text. Returns the number of new entries.
+    """
+    added = 0
+    for skills in skill_sets:
+        key = skills_key(skills)
+        if cache.get(key) is not None:
+            continue
+        questions = parse_questions(generate(question_prompt(skills)))
+        if len(questions) >= 3:
+            cache.set(key, questions)
+            added += 1
+    return added
+
+
+def _answers_from_sessions(path):
+    import json
+    import sqlite3
+    conn = sqlite3.connect(path)
+    for (data,) in conn.execute("SELECT data FROM sessions"):
+        answer = json.loads(data).get("resume_answers", {}).get("Q5")
+        if answer:
+            yield answer
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-warm the builder question cache.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-sessions", help="session SQLite DB to mine skills answers from")
+    source.add_argument("--from-file", help="text file with one skills answer per line")
+    parser.add_argument("--top", type=int, default=200, help="how many skill sets to warm")
+    args = parser.parse_args()
+
+    from main import llm, question_cache
+
+    if args.from_sessions:
+        answers = list(_answers_from_sessions(args.from_sessions))
+    else:
+        with open(args.from_file, encoding="utf-8") as f:
+            answers = [line for line in f if line.strip()]
+    sets = most_common(answers, args.top)
+    added = prewarm(sets, question_cache, lambda p: llm.generate(p, site="builder_questions"))
+    print(f"{len(sets)} skill set(s) considered, {added} newly cached")
@@ -0,0 +1,265 @@
+"""
+Resume renderers (PDF via ReportLab, DOCX via python-docx).
+
+ReportLab and python-docx are imported on the first render (or warm()), so
+processes that never render do not pay for them. Paragraph styles and the
+blank DOCX template are then built once, and rendered bytes are kept in a
+memory-bounded LRU keyed by a hash of the resume dict and output format, so
+repeat downloads of an unchanged resume skip rendering entirely.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import metrics
+
+# Bump when the layout changes so cached renders are not served
+RENDERER_VERSION = "1"
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", 32 * 1024 * 1024))
+
+
+def _build_styles():
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    return {
+        "name": ParagraphStyle(
+            "NameHeader", parent=styles["Title"], fontSize=20, leading=24, spaceAfter=8
+        ),
+        "section": ParagraphStyle(
+            "SectionHeader", parent=styles["Heading2"], textColor=colors.HexColor("#333333"),
+            spaceBefore=10, spaceAfter=6, underlineWidth=0.5
+        ),
+        # own style instead of mutating the shared sample "Normal"
+        "body": ParagraphStyle("ResumeBody", parent=styles["Normal"], spaceAfter=2),
+    }
+
+
+def _build_docx_template():
+    from docx import Document
+
+    buf = BytesIO()
+    Document().save(buf)
+    return buf.getvalue()
+
+
+_built = {}
+_build_lock = threading.Lock()
+
+
+def _once(name, build):
+    value = _built.get(name)
+    if value is None:
+        with _build_lock:
+            value = _built.get(name)
+            if value is None:
+                value = _built[name] = build()
+    return value
+
+
+def warm():
+    """Import the rendering libraries and build styles/template ahead of time."""
+    _once("styles", _build_styles)
+    _once("docx_template", _build_docx_template)
+
+
+class RenderCache:
+    """LRU of rendered files bounded by total bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self._items), "bytes": self._size}
+
+
+render_cache = RenderCache(RENDER_CACHE_BYTES)
+
+
+def render_key(resume_dict, fmt):
+    raw = json.dumps(resume_dict, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{RENDERER_VERSION}:{fmt}:{raw}".encode("utf-8")).hexdigest()
+
+
+def render_pdf(resume_dict) -> bytes:
+    """
+    Build a professional-looking PDF from structured resume data using ReportLab.
+    Returns the PDF bytes.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import (HRFlowable, ListFlowable, ListItem, Paragraph,
+                                    SimpleDocTemplate, Spacer)
+
+    styles = _once("styles", _build_styles)
+    buf = BytesIO()
+    doc = SimpleDocTemplate(
+        buf, pagesize=A4,
+        leftMargin=36, rightMargin=36, topMargin=54, bottomMargin=36
+    )
+    h_name, h_sec, body = styles["name"], styles["section"], styles["body"]
+
+    story = []
+
+    # Contact / Name line
+    contact = resume_dict.get("contact", "").strip()
+    if contact:
+        story.append(Paragraph(contact, h_name))
+        story.append(HRFlowable(width="100%", color=colors.HexColor("#999999")))
+        story.append(Spacer(1, 0.15*inch))
+
+    # Summary
+    summary = resume_dict.get("summary", "").strip()
+    if summary:
+        story.append(Paragraph("Summary", h_sec))
+        story.append(Paragraph(summary, body))
+        story.append(Spacer(1, 0.1*inch))
+
+    # Education
+    education = resume_dict.get("education", [])
+    if education:
+        story.append(Paragraph("Education", h_sec))
+        edu_list = ListFlowable(
+            [ListItem(Paragraph(e, body), leftIndent=12) for e in education],
+            bulletType="bullet", start="circle"
+        )
+        story.append(edu_list)
+        story.append(Spacer(1, 0.08*inch))
+
+    # Experience
+    experience = resume_dict.get("experience", [])
+    if experience:
+        story.append(Paragraph("Experience", h_sec))
+        exp_list = ListFlowable(
+            [ListItem(Paragraph(x, body), leftIndent=12) for x in experience],
+            bulletType="bullet", start="circle"
+        )
+        story.append(exp_list)
+        story.append(Spacer(1, 0.08*inch))
+
+    # Skills
+    skills = resume_dict.get("skills", [])
+    if skills:
+        story.append(Paragraph("Skills", h_sec))
+        # render skills as comma-separated paragraph
+        story.append(Paragraph(", ".join(skills), body))
+        story.append(Spacer(1, 0.08*inch))
+
+    # Projects
+    projects = resume_dict.get("projects", [])
+    if projects:
+        story.append(Paragraph("Projects", h_sec))
+        proj_list = ListFlowable(
+            [ListItem(Paragraph(p, body), leftIndent=12) for p in projects],
+            bulletType="bullet", start="circle"
+        )
+        story.append(proj_list)
+
+    doc.build(story)
+    return buf.getvalue()
+
+
+def render_docx(resume_dict) -> bytes:
+    """
+    Build a DOCX resume using python-docx.
+    Returns the DOCX bytes.
+    """
+    from docx import Document
+
+    doc = Document(BytesIO(_once("docx_template", _build_docx_template)))
+
+    contact = resume_dict.get("contact", "").strip()
+    if contact:
+        h = doc.add_heading(contact, level=0)
+    doc.add_paragraph("")  # spacer
+
+    summary = resume_dict.get("summary", "").strip()
+    if summary:
+        doc.add_heading("Summary", level=1)
+        doc.add_paragraph(summary)
+
+    education = resume_dict.get("education", [])
+    if education:
+        doc.add_heading("Education", level=1)
+        for e in education:
+            doc.add_paragraph(e, style="List Bullet")
+
+    experience = resume_dict.get("experience", [])
+    if experience:
+        doc.add_heading("Experience", level=1)
+        for x in experience:
+            doc.add_paragraph(x, style="List Bullet")
+
+    skills = resume_dict.get("skills", [])
+    if skills:
+        doc.add_heading("Skills", level=1)
+        doc.add_paragraph(", ".join(skills))
+
+    projects = resume_dict.get("projects", [])
+    if projects:
+        doc.add_heading("Projects", level=1)
+        for p in projects:
+            doc.add_paragraph(p, style="List Bullet")
+
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+RENDERERS = {"pdf": render_pdf, "docx": render_docx}
+
+
+def render_resume(resume_dict, fmt) -> bytes:
+    """Rendered bytes for fmt ("pdf" or "docx"), served from render_cache when possible."""
+    key = render_key(resume_dict, fmt)
+    data = render_cache.get(key)
+    if data is None:
+        with metrics.span(f"render_{fmt}"):
+            data = RENDERERS[fmt](resume_dict)
+        render_cache.set(key, data)
+    return data
+
+
+def build_pdf_from_resume(resume_dict) -> BytesIO:
+    """PDF resume as a BytesIO buffer."""
+    return BytesIO(render_resume(resume_dict, "pdf"))
+
+
+def build_docx_from_resume(resume_dict) -> BytesIO:
+    """DOCX resume as a BytesIO buffer."""
+    return BytesIO(render_resume(resume_dict, "docx"))
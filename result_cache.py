@@ -0,0 +1,150 @@
+"""
+Two-tier result cache: an in-process LRU in front of a size-bounded SQLite
+table with TTL. Values must be JSON-serializable.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Canonical form used for cache keys: NFKC, collapsed whitespace."""
+    text = unicodedata.normalize("NFKC", text or "")
+    return " ".join(text.split())
+
+
+def cache_key(*parts):
+    """sha256 over the given parts, each normalized and length-prefixed."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = normalize_text(str(part)).encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResultCache:
+    PURGE_EVERY = 200  # disk writes between eviction sweeps
+
+    def __init__(self, path, ttl=7 * 24 * 3600, memory_entries=512,
+                 max_disk_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                         "stores": 0, "evictions": 0}
+        if path:
+            self._conn().execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn().execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_access ON cache (last_access)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _remember(self, key, expires, value):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = (expires, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        if self.path:
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] >= now:
+                conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+                value = json.loads(row[0])
+                self._remember(key, row[1], value)
+                self._count("disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl
+        self._remember(key, expires, value)
+        self._count("stores")
+        if not self.path:
+            return
+        raw = json.dumps(value, ensure_ascii=False)
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, expires, last_access) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, raw, len(raw.encode("utf-8")), expires, time.time()),
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.PURGE_EVERY == 1
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows, then least recently used rows until under budget."""
+        conn = self._conn()
+        removed = conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total > self.max_disk_bytes:
+            excess = total - self.max_disk_bytes
+            for key, size in conn.execute(
+                "SELECT key, size FROM cache ORDER BY last_access"
+            ).fetchall():
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                removed += 1
+                excess -= size
+                if excess <= 0:
+                    break
+        if removed:
+            self._count("evictions", removed)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,116 @@
+"""
+Per-user resume library (SQLite, WAL mode).
+
+Each uploaded resume is stored once per owner, keyed by the sha256 of the
+file, together with its extracted text and a section split (contact,
+summary, skills, experience, education, ...). Re-uploading the same file
+returns the existing entry without extracting it again, and analyses can
+refer to a stored resume by resume_id instead of uploading it. Only text is
+kept; the original file is not stored.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+import metrics
+from prompt_budget import dedupe_lines, normalize_text, split_sections
+
+MAX_RESUMES_PER_OWNER = 50
+
+
+def resume_sections(text):
+    """{section_name: text} from a resume; text before any heading is "contact"."""
+    sections = {}
+    for name, body in split_sections(dedupe_lines(normalize_text(text)), first="contact"):
+        sections[name] = (sections[name] + "\n\n" + body) if name in sections else body
+    return sections
+
+
+class ResumeLibrary:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS resumes (
+                id TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                filename TEXT,
+                kind TEXT,
+                size INTEGER,
+                text TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL,
+                UNIQUE (owner, content_hash)
+            );
+            CREATE INDEX IF NOT EXISTS idx_resumes_owner ON resumes (owner, last_used);
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def find(self, owner, content_hash):
+        """resume_id of owner's copy of this file, or None."""
+        row = self._conn().execute(
+            "SELECT id FROM resumes WHERE owner = ? AND content_hash = ?", (owner, content_hash)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def add(self, owner, content_hash, text, filename=None, kind=None, size=None):
+        """Store a resume; returns (resume_id, created). Existing copies are reused."""
+        now = time.time()
+        resume_id = uuid.uuid4().hex[:16]
+        with metrics.span("resume_library_add"):
+            conn = self._conn()
+            cur = conn.execute(
+                "INSERT INTO resumes (id, owner, content_hash, filename, kind, size, text, sections, "
+                "created, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(owner, content_hash) DO NOTHING",
+                (resume_id, owner, content_hash, filename, kind, size, text,
+                 json.dumps(resume_sections(text), ensure_ascii=False), now, now),
+            )
+            if cur.rowcount == 0:
+                return self.find(owner, content_hash), False
+            # keep each owner's library bounded; the least recently used go first
+            conn.execute(
+                "DELETE FROM resumes WHERE owner = ? AND id NOT IN "
+                "(SELECT id FROM resumes WHERE owner = ? ORDER BY last_used DESC LIMIT ?)",
+                (owner, owner, MAX_RESUMES_PER_OWNER),
+            )
+        return resume_id, True
+
+    def get(self, owner, resume_id, touch=True):
+        """{"id", "filename", "text", "sections", ...} if owner has resume_id, else None."""
+        row = self._conn().execute(
+            "SELECT * FROM resumes WHERE id = ? AND owner = ?", (resume_id, owner)
+        ).fetchone()
+        if row is None:
+            return None
+        if touch:
+            self._conn().execute("UPDATE resumes SET last_used = ? WHERE id = ?", (time.time(), resume_id))
+        entry = dict(row)
+        entry["sections"] = json.loads(entry["sections"])
+        entry.pop("owner")
+        return entry
+
+    def list(self, owner):
+        rows = self._conn().execute(
+            "SELECT id, filename, kind, size, length(text) AS chars, created, last_used "
+            "FROM resumes WHERE owner = ? ORDER BY last_used DESC", (owner,)
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def delete(self, owner, resume_id):
+        cur = self._conn().execute("DELETE FROM resumes WHERE id = ? AND owner = ?", (resume_id, owner))
+        return cur.rowcount > 0
+
@@ -0,0 +1,349 @@
+"""
+Server-side session storage for CareerCompass.
+
+The browser cookie only carries a signed session id. Session state lives in a
+pluggable backend (SQLite by default, or process memory), and chat histories
+are stored as append-only rows so every turn writes one small record instead
+of re-serializing the whole conversation.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+import metrics
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its server-side id."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.has_history = False
+        self.rotated_from = None  # previous sid, dropped from the store on save
+
+
+# ------------------ Backends ------------------
+
+class MemorySessionStore:
+    """Process-local backend. Handy for development and single-worker runs."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = {}      # sid -> (expires, dict)
+        self._history = {}   # (sid, key) -> list
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                self._drop(sid)
+                return None
+            return copy.deepcopy(entry[1])
+
+    def save(self, sid, data):
+        with self._lock:
+            self._data[sid] = (time.time() + self.ttl, copy.deepcopy(data))
+
+    def delete(self, sid):
+        with self._lock:
+            self._drop(sid)
+
+    def history(self, sid, key):
+        with self._lock:
+            return list(self._history.get((sid, key), []))
+
+    def append(self, sid, key, item):
+        with self._lock:
+            expires, data = self._data.get(sid, (0, {}))
+            self._data[sid] = (time.time() + self.ttl, data)
+            self._history.setdefault((sid, key), []).append(item)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            for sid in [s for s, (exp, _) in self._data.items() if exp < now]:
+                self._drop(sid)
+
+    def _drop(self, sid):
+        self._data.pop(sid, None)
+        for k in [k for k in self._history if k[0] == sid]:
+            del self._history[k]
+
+
+class SqliteSessionStore:
+    """
+    SQLite backend (WAL mode) with an in-memory LRU front.
+
+    Each cached session carries the version token it was loaded at, and each
+    cached history the last row it has seen, so a hit only costs one indexed
+    lookup and never serves state written by another worker process.
+    """
+
+    PURGE_EVERY = 500  # writes between expiry sweeps
+
+    def __init__(self, path, ttl, cache_size=1024):
+        self.path = path
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # sid -> {"version", "data", "history"}
+        self._writes = 0
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                version TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS session_history (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                sid TEXT NOT NULL,
+                key TEXT NOT NULL,
+                item TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_history_sid_key
+                ON session_history (sid, key, seq);
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires
+                ON sessions (expires);
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # --- LRU front ---
+    def _cached(self, sid):
+        with self._lock:
+            entry = self._cache.get(sid)
+            if entry is not None:
+                self._cache.move_to_end(sid)
+            return entry
+
+    def _remember(self, sid, entry):
+        if not self.cache_size:
+            return
+        with self._lock:
+            self._cache[sid] = entry
+            self._cache.move_to_end(sid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._cache.pop(sid, None)
+
+    # --- Session dict ---
+    def load(self, sid):
+        row = self._conn().execute(
+            "SELECT version, expires FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            self._forget(sid)
+            return None
+        version = row[0]
+        entry = self._cached(sid)
+        if entry is not None and entry["version"] == version:
+            return copy.deepcopy(entry["data"])
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ?", (sid,)
+        ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row[0])
+        history = entry["history"] if entry else {}
+        self._remember(sid, {"version": version, "data": data, "history": history})
+        return copy.deepcopy(data)
+
+    def save(self, sid, data):
+        version = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO sessions (sid, data, version, expires) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, "
+            "version = excluded.version, expires = excluded.expires",
+            (sid, json.dumps(data, ensure_ascii=False), version, time.time() + self.ttl),
+        )
+        entry = self._cached(sid)
+        history = entry["history"] if entry else {}
+        self._remember(sid, {"version": version, "data": copy.deepcopy(data), "history": history})
+        self._maybe_purge()
+
+    def delete(self, sid):
+        conn = self._conn()
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.execute("DELETE FROM session_history WHERE sid = ?", (sid,))
+        self._forget(sid)
+
+    # --- Append-only histories ---
+    def history(self, sid, key):
+        entry = self._cached(sid)
+        last_seq, items = (entry["history"].get(key) if entry else None) or (0, [])
+        rows = self._conn().execute(
+            "SELECT seq, item FROM session_history "
+            "WHERE sid = ? AND key = ? AND seq > ? ORDER BY seq",
+            (sid, key, last_seq),
+        ).fetchall()
+        if rows:
+            items = items + [json.loads(item) for _, item in rows]
+            last_seq = rows[-1][0]
+            if entry is not None:
+                with self._lock:
+                    entry["history"][key] = (last_seq, items)
+        return list(items)
+
+    def append(self, sid, key, item):
+        conn = self._conn()
+        expires = time.time() + self.ttl
+        # make sure the session row exists and slide its expiry
+        conn.execute(
+            "INSERT INTO sessions (sid, data, version, expires) VALUES (?, '{}', ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET expires = excluded.expires",
+            (sid, uuid.uuid4().hex, expires),
+        )
+        conn.execute(
+            "INSERT INTO session_history (sid, key, item) VALUES (?, ?, ?)",
+            (sid, key, json.dumps(item, ensure_ascii=False)),
+        )
+        self._maybe_purge()
+
+    def purge_expired(self):
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "DELETE FROM session_history WHERE sid IN "
+            "(SELECT sid FROM sessions WHERE expires < ?)", (now,)
+        )
+        conn.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+    def _maybe_purge(self):
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.PURGE_EVERY == 0
+        if due:
+            self.purge_expired()
+
+
+def create_session_store():
+    """Build the backend selected by SESSION_BACKEND ("sqlite" or "memory")."""
+    ttl = int(os.getenv("SESSION_TTL_SECONDS", 7 * 24 * 3600))
+    backend = os.getenv("SESSION_BACKEND", "sqlite").lower()
+    if backend == "memory":
+        return MemorySessionStore(ttl)
+    if backend == "sqlite":
+        return SqliteSessionStore(
+            os.getenv("SESSION_DB", "sessions.db"), ttl,
+            cache_size=int(os.getenv("SESSION_CACHE_SIZE", 1024)),
+        )
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+# ------------------ Flask integration ------------------
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keeps only a signed session id in the cookie."""
+
+    salt = "careercompass-session"
+
+    def __init__(self, store):
+        self.store = store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie and app.secret_key:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                with metrics.span("session_load"):
+                    data = self.store.load(sid)
+                if data is not None:
+                    return ServerSession(data, sid=sid)
+        return ServerSession(sid=uuid.uuid4().hex, new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.rotated_from:
+            self.store.delete(session.rotated_from)
+            session.rotated_from = None
+
+        if not session and not session.has_history:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not self.should_set_cookie(app, session):
+            return
+
+        with metrics.span("session_save"):
+            self.store.save(session.sid, dict(session))
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
+
+    def regenerate(self, session):
+        """
+        Give session a fresh id (on login and logout), so an id planted in or
+        read from the browser beforehand is worthless. The data carries over;
+        the old record and its histories are deleted when the session is saved.
+        """
+        session.rotated_from = session.rotated_from or session.sid
+        session.sid = uuid.uuid4().hex
+        session.has_history = False
+        session.modified = True
+
+    # --- History helpers ---
+    def reserve(self, session):
+        """
+        Save session, and issue its cookie, with the response even though
+        its history is only appended after the headers are sent (streamed
+        replies write to the store directly once they finish).
+        """
+        session.has_history = True
+        session.modified = True
+
+    def history(self, session, key):
+        return self.store.history(session.sid, key)
+
+    def append(self, session, key, item):
+        self.store.append(session.sid, key, item)
+        session.has_history = True
+        session.modified = True
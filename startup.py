@@ -0,0 +1,83 @@
+"""
+Lazy subsystem initialization.
+
+Heavy subsystems (stores, caches, the knowledge base, model clients and the
+libraries behind them) are wrapped in Lazy proxies or registered warmers, so
+importing main only costs Flask plus the app's own modules. Each subsystem is
+built the first time something touches it, or all at once by warm() when
+PREWARM=1. Every initialization is timed and logged.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger("careercompass.startup")
+
+_warmers = {}  # name -> fn, in registration order
+
+
+class Lazy:
+    """Proxy that builds its target with factory() on first attribute access."""
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = timed(self._name, self._factory)
+        return self._target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._get(), attr)
+
+    def __repr__(self):
+        return f"<Lazy {self._name} loaded={self.loaded}>"
+
+
+def timed(name, fn):
+    started = time.perf_counter()
+    result = fn()
+    logger.info("initialized %s in %.1f ms", name, (time.perf_counter() - started) * 1000)
+    return result
+
+
+def lazy(name, factory):
+    """A Lazy proxy that warm() also knows how to build."""
+    proxy = Lazy(name, factory)
+    _warmers[name] = proxy._get
+    return proxy
+
+
+def register_warmer(name, fn):
+    _warmers[name] = fn
+    return fn
+
+
+def warm(names=None):
+    """Initialize the named (default: all) subsystems; returns {name: seconds}."""
+    timings = {}
+    for name, fn in list(_warmers.items()):
+        if names is not None and name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            logger.exception("pre-warming %s failed", name)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def warm_in_background(names=None):
+    thread = threading.Thread(target=warm, args=(names,), name="prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,25 @@
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# main's stores default to SQLite files in the working directory
+_DB_ENV = ("SESSION_DB", "USERS_DB", "JOBS_DB", "ANALYSIS_CACHE_DB", "QUESTION_CACHE_DB",
+           "RESUME_LIBRARY_DB")
+_db_dir = None
+
+
+def pytest_configure(config):
+    """Keep test runs from writing databases into the tree; runs before any test imports main."""
+    global _db_dir
+    _db_dir = tempfile.mkdtemp(prefix="careercompass-tests-")
+    os.environ.setdefault("SESSION_BACKEND", "memory")
+    for var in _DB_ENV:
+        os.environ.setdefault(var, os.path.join(_db_dir, var.lower() + ".db"))
+
+
+def pytest_unconfigure(config):
+    if _db_dir:
+        shutil.rmtree(_db_dir, ignore_errors=True)
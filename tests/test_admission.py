@@ -0,0 +1,78 @@
+import pytest
+
+import admission
+from admission import PriorityLimiter, TokenBucketLimiter, charge_session, check_request
+from llm import FakeBackend, LLMClient, LLMOverloaded, start_stream
+
+
+@pytest.fixture
+def buckets(monkeypatch):
+    monkeypatch.setattr(admission, "session_buckets", TokenBucketLimiter(0.001, 3))
+    monkeypatch.setattr(admission, "ip_buckets", TokenBucketLimiter(0, 1))
+    yield
+    check_request("/", "GET", None, None)  # no charge left pending for other tests
+
+
+def test_turns_without_model_calls_are_not_charged(buckets):
+    for _ in range(20):
+        assert check_request("/builder", "POST", "sid-1", "10.0.0.1") is None
+    assert admission.session_buckets.take("sid-1", 3) == 0
+
+
+def test_session_is_charged_once_per_request(buckets):
+    limiter = PriorityLimiter(2, 4, 1)
+    for _ in range(3):
+        assert check_request("/chat", "POST", "sid-1", "10.0.0.1") is None
+        for site in ("history_summary", "chat"):
+            with limiter.slot(site):
+                pass
+    check_request("/chat", "POST", "sid-1", "10.0.0.1")
+    with pytest.raises(LLMOverloaded) as err:
+        charge_session()
+    assert err.value.retry_after >= 1
+
+
+def test_background_routes_are_charged_on_admission(buckets):
+    for _ in range(3):
+        assert check_request("/resume_jobs", "POST", "sid-1", "10.0.0.1") is None
+        charge_session()  # worker threads can't charge; nothing is pending
+    reason, retry_after = check_request("/analyze_batch", "POST", "sid-1", "10.0.0.1")
+    assert reason == "Too many requests" and retry_after >= 1
+
+
+def test_unlimited_routes_clear_the_pending_charge(buckets):
+    check_request("/chat", "POST", "sid-1", "10.0.0.1")
+    check_request("/login", "POST", "sid-1", "10.0.0.1")
+    for _ in range(5):
+        charge_session()
+    assert admission.session_buckets.take("sid-1", 3) == 0
+
+
+def test_streamed_request_over_budget_fails_before_output(buckets):
+    client = LLMClient(FakeBackend(latency_ms=0), limiter=PriorityLimiter(2, 4, 1))
+    check_request("/chat", "POST", "sid-1", "10.0.0.1")
+    assert "".join(start_stream(client.stream("hello", site="chat")))
+    admission.session_buckets.take("sid-1", 2)
+    check_request("/chat", "POST", "sid-1", "10.0.0.1")
+    with pytest.raises(LLMOverloaded):
+        start_stream(client.stream("hello again", site="chat"))
+    assert client.limiter.snapshot() == {"inflight": 0, "queued": 0}
+
+
+def test_streamed_chat_over_budget_gets_429(buckets, monkeypatch):
+    pytest.importorskip("flask")
+    main = pytest.importorskip("main")
+    from session_store import MemorySessionStore, ServerSideSessionInterface
+
+    monkeypatch.setattr(main.app, "secret_key", "test")
+    monkeypatch.setattr(main.app, "session_interface", ServerSideSessionInterface(MemorySessionStore(3600)))
+    monkeypatch.setattr(main, "llm", LLMClient(FakeBackend(latency_ms=0), limiter=admission.llm_limiter))
+    monkeypatch.setattr(admission, "session_buckets", TokenBucketLimiter(0.001, 1))
+    client = main.app.test_client()
+    first = client.post("/chat", json={"message": "where do I start in tech?", "stream": True})
+    assert first.status_code == 200
+    assert "Set-Cookie" in first.headers  # a new session streaming its first turn
+    assert first.get_data(as_text=True)
+    resp = client.post("/chat", json={"message": "what about design work?", "stream": True})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
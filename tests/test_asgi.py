@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("quart")
+asgi = pytest.importorskip("asgi")
+
+from llm import FakeBackend, LLMClient  # noqa: E402
+from session_store import MemorySessionStore, ServerSideSessionInterface  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(asgi.app, "secret_key", "test")
+    monkeypatch.setattr(asgi.app, "session_interface",
+                        asgi.AsyncSessionAdapter(ServerSideSessionInterface(MemorySessionStore(3600))))
+    monkeypatch.setattr(asgi, "llm", LLMClient(FakeBackend(latency_ms=0)))
+    return asgi.app.test_client()
+
+
+def test_generate_resume_downloads_a_pdf(client, monkeypatch):
+    monkeypatch.setattr(asgi, "get_history",
+                        lambda key: [{"role": "user", "content": "I studied CS and know Python."}])
+
+    async def download():
+        resp = await client.post("/generate_resume")
+        return resp, await resp.get_data()
+
+    resp, body = asyncio.run(download())
+    assert resp.status_code == 200
+    assert body.startswith(b"%PDF")
+    assert "My_Resume.pdf" in resp.headers["Content-Disposition"]
@@ -0,0 +1,21 @@
+from ats_score import SKILL_TERMS, score_resume, tokenize
+
+JOB = """
+Machine Learning Engineer. You will build deep learning models in Python and
+PyTorch, ship them with Docker and CI/CD, and report results in Power BI.
+"""
+
+
+def test_multi_word_skills_are_matched_as_phrases():
+    assert not {"machine", "learning", "data", "vision", "bi"} & SKILL_TERMS
+    assert {"machine learning", "ci cd", "power bi"} <= set(tokenize(JOB))
+
+
+def test_score_resume_reports_matched_and_missing_skills():
+    resume = "Built machine learning pipelines in Python with PyTorch; deployed with Docker."
+    result = score_resume(resume, JOB)
+    assert {"machine learning", "python", "pytorch", "docker"} <= set(result["matched_keywords"])
+    assert {"deep learning", "ci cd", "power bi"} <= set(result["missing_skills"])
+    assert not {"learning", "deep", "bi"} & set(result["missing_skills"])
+    assert set(result["missing_skills"]) <= SKILL_TERMS
+    assert 0 < result["score"] < 100
@@ -0,0 +1,99 @@
+import io
+import threading
+import time
+import zipfile
+
+import pytest
+
+import batch_analysis
+from batch_analysis import TOO_LARGE, analyze_batch, expand_uploads, spool_batch
+from uploads import UploadError
+
+PDF = b"%PDF-1.4\n" + b"x" * 100
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    monkeypatch.setattr(batch_analysis, "MAX_UPLOAD_BYTES", 1000)
+    monkeypatch.setattr(batch_analysis, "BATCH_MAX_TOTAL_BYTES", 2500)
+
+
+@pytest.fixture
+def files(tmp_path):
+    """[(name, path)] of the given (name, bytes) uploads, written to tmp_path."""
+    def write(uploads):
+        out = []
+        for i, (name, data) in enumerate(uploads):
+            path = tmp_path / f"in-{i}-{name}"
+            path.write_bytes(data)
+            out.append((name, str(path)))
+        return out
+    return write
+
+
+class _Storage:
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+
+def test_per_resume_limit_is_the_same_zipped_or_not(small_limits, files, tmp_path):
+    big = PDF + b"x" * 2000
+    plain = expand_uploads(files([("big.pdf", big), ("ok.pdf", PDF)]), str(tmp_path))
+    zipped = expand_uploads(files([("batch.zip", _zip({"big.pdf": big, "ok.pdf": PDF}))]), str(tmp_path))
+    assert [(n, k) for n, k, _ in plain] == [("big.pdf", TOO_LARGE), ("ok.pdf", "pdf")]
+    assert [(n, k) for n, k, _ in zipped] == [("big.pdf", TOO_LARGE), ("ok.pdf", "pdf")]
+    with open(zipped[1][2], "rb") as f:  # unzipped to disk, extracted by path
+        assert f.read() == PDF
+
+
+def test_total_limit_counts_plain_and_unzipped_resumes(small_limits, files, tmp_path):
+    resume = PDF + b"x" * 800
+    with pytest.raises(UploadError, match="total limit") as err:
+        expand_uploads(files([("a.pdf", resume), ("b.zip", _zip({"b.pdf": resume, "c.pdf": resume}))]),
+                       str(tmp_path))
+    assert err.value.status == 413
+
+
+def test_spooling_stops_at_the_total_limit(small_limits, tmp_path):
+    resume = PDF + b"x" * 800
+    spooled = spool_batch([("a.pdf", _Storage(resume)), ("b.pdf", _Storage(resume))], str(tmp_path))
+    assert [name for name, _ in spooled] == ["a.pdf", "b.pdf"]
+    with pytest.raises(UploadError, match="total limit") as err:
+        spool_batch([(f"{i}.pdf", _Storage(resume)) for i in range(3)], str(tmp_path))
+    assert err.value.status == 413
+
+
+def test_batch_limits_are_checked_before_streaming(small_limits, files, tmp_path):
+    resume = PDF + b"x" * 800
+    with pytest.raises(UploadError):
+        analyze_batch(files([(f"{i}.pdf", resume) for i in range(3)]), "python developer", None,
+                      str(tmp_path))
+
+
+def test_closing_the_stream_drops_queued_analyses(monkeypatch, files, tmp_path):
+    monkeypatch.setattr(batch_analysis, "extract_file", lambda path, kind: "python developer")
+    calls = []
+    lock = threading.Lock()
+
+    def analyze(resume_text, job_desc):
+        with lock:
+            calls.append(resume_text)
+        time.sleep(0.05)
+        return "analysis", False
+
+    rows = analyze_batch(files([(f"{i}.pdf", PDF) for i in range(10)]), "python developer", analyze,
+                         str(tmp_path), concurrency=1)
+    assert "analysis" in next(rows)
+    started = time.monotonic()
+    rows.close()
+    assert time.monotonic() - started < 0.05
+    time.sleep(0.15)
+    assert len(calls) <= 3
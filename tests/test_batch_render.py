@@ -0,0 +1,15 @@
+import json
+
+from batch_render import read_resumes
+
+
+def test_duplicate_names_are_made_unique(tmp_path):
+    rows = [{"id": "dup", "resume": {"n": 1}}, {"id": "dup", "resume": {"n": 2}},
+            {"id": "DUP", "resume": {"n": 3}}, {"id": "a b", "resume": {"n": 4}},
+            {"id": "a_b", "resume": {"n": 5}}, {"id": "dup-000002", "resume": {"n": 6}}]
+    path = tmp_path / "resumes.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in rows), encoding="utf-8")
+    names = [name for name, _ in read_resumes(str(path))]
+    assert names[:2] == ["dup", "dup-000002"]
+    assert len({n.lower() for n in names}) == len(rows)
+    assert [r["n"] for _, r in read_resumes(str(path))] == [1, 2, 3, 4, 5, 6]
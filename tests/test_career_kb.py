@@ -0,0 +1,31 @@
+import pytest
+
+from career_kb import CareerKB, direct_answer
+
+
+@pytest.fixture(scope="module")
+def kb():
+    return CareerKB.load()
+
+
+@pytest.mark.parametrize("message, heading", [
+    ("Roadmap for data scientist", "Roadmap"),
+    ("data scientist roadmap?", "Roadmap"),
+    ("How do I become a data scientist?", "Roadmap"),
+    ("what are the steps to become a backend developer", "Roadmap"),
+    ("What skills do I need for data science?", "Skills"),
+    ("skills for a frontend developer", "Skills"),
+    ("cybersecurity analyst skills", "Skills"),
+])
+def test_direct_questions_are_answered(kb, message, heading):
+    assert direct_answer(kb, message).startswith(f"<h2>{heading}")
+
+
+@pytest.mark.parametrize("message", [
+    "what are the next steps after my data scientist interview",
+    "I listed my skills, am I ready for a data scientist role?",
+    "the requirements in this backend developer job posting look hard",
+    "can you review my data scientist resume and tell me which skills section to cut",
+])
+def test_careers_named_in_passing_go_to_the_model(kb, message):
+    assert direct_answer(kb, message) is None
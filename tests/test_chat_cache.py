@@ -0,0 +1,34 @@
+import pytest
+
+from chat_cache import SemanticCache
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("I don't know what I like", "I know what I like"),
+    ("I know what I like", "I don't know what I like"),
+    ("I want to become a data scientist", "I do not want to become a data scientist"),
+    ("I do not want to become a data scientist", "I want to become a data scientist"),
+    ("software engineer", "hardware engineer"),
+])
+def test_opposite_or_different_questions_miss(cached, asked):
+    cache = SemanticCache()
+    cache.set("", cached, "reply")
+    assert cache.get("", asked) is None
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("I want to become a data scientist", "i want to become a data scientist!"),
+    ("I don't know what I like, can you show me some fields?",
+     "i dont know what i like can you show me some fields"),
+])
+def test_near_duplicates_hit(cached, asked):
+    cache = SemanticCache()
+    cache.set("", cached, "reply")
+    assert cache.get("", asked) == "reply"
+
+
+def test_hit_skips_incompatible_closer_entry():
+    cache = SemanticCache(threshold=0.5)
+    cache.set("", "I do not know what I like", "negative")
+    cache.set("", "I know what I like", "positive")
+    assert cache.get("", "I know what I like!") == "positive"
@@ -0,0 +1,37 @@
+import pytest
+
+import chat_history
+from chat_history import history_window_flow
+from llm import LLMError, LLMOverloaded
+
+
+def _history(n):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+            for i in range(n)]
+
+
+def _throw_at_summary(exc):
+    state = {}
+    flow = history_window_flow(state, "chat_session", _history(chat_history.KEEP_MESSAGES + 10))
+    site, _ = next(flow)
+    assert site == "history_summary"
+    try:
+        flow.throw(exc)
+    except StopIteration as stop:
+        return state, stop.value
+
+
+def test_failed_summary_falls_back_to_a_clipped_transcript():
+    state, (summary, recent) = _throw_at_summary(LLMError("boom"))
+    assert "message 0" in summary
+    assert state["history_summaries"]["chat_session"]["text"] == summary
+    assert len(recent) == chat_history.KEEP_MESSAGES
+
+
+def test_shed_summary_is_not_saved():
+    state = {}
+    flow = history_window_flow(state, "chat_session", _history(chat_history.KEEP_MESSAGES + 10))
+    next(flow)
+    with pytest.raises(LLMOverloaded):
+        flow.throw(LLMOverloaded("busy", 3))
+    assert "history_summaries" not in state
@@ -0,0 +1,67 @@
+import signal
+import time
+
+import pytest
+
+import extraction
+from extraction import ExtractionError
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _stuck(seconds):
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)  # like a parser stuck in C code
+    time.sleep(seconds)
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    monkeypatch.setattr(extraction, "WORKERS", 1)
+    monkeypatch.setattr(extraction, "TIME_BUDGET", 0.5)
+    monkeypatch.setattr(extraction, "KILL_GRACE", 0.5)
+    monkeypatch.setattr(extraction, "_pool", None)
+    yield
+    if extraction._pool is not None:
+        extraction._pool.shutdown()
+
+
+def test_queued_time_does_not_count_against_the_budget(one_worker):
+    tasks = [extraction._submit(_sleep, 0.3) for _ in range(4)]
+    assert [extraction._wait(task, _sleep, (0.3,)) for task in tasks] == [0.3] * 4
+
+
+def test_overrun_is_stopped_in_the_worker_without_a_pool_reset(one_worker):
+    pool = extraction._get_pool()
+    with pytest.raises(ExtractionError):
+        extraction._run(_sleep, 5)
+    assert extraction._get_pool() is pool
+    assert extraction._run(_sleep, 0.1) == 0.1
+
+
+def test_stuck_task_resets_the_pool_and_innocent_tasks_are_resubmitted(one_worker, monkeypatch):
+    monkeypatch.setattr(extraction, "WORKERS", 2)
+    stuck = extraction._submit(_stuck, 5)
+    innocent = extraction._submit(_sleep, 0.2)
+    time.sleep(0.3)
+    later = extraction._submit(_sleep, 0.2)  # on the pool the stuck task is about to break
+    started = time.monotonic()
+    with pytest.raises(ExtractionError):
+        extraction._wait(stuck, _stuck, (5,))
+    assert time.monotonic() - started < 3
+    assert extraction._wait(innocent, _sleep, (0.2,)) == 0.2
+    assert extraction._wait(later, _sleep, (0.2,)) == 0.2
+
+
+def test_tasks_of_one_upload_share_its_budget(one_worker):
+    budget = extraction._Budget()
+    tasks = [extraction._submit(_sleep, 0.3) for _ in range(4)]
+    started = time.monotonic()
+    with pytest.raises(ExtractionError):
+        for task in tasks:
+            extraction._wait(task, _sleep, (0.3,), budget)
+    assert time.monotonic() - started < 0.8
+    for _, future in tasks:
+        future.cancel()
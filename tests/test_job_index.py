@@ -0,0 +1,78 @@
+import pytest
+
+import startup
+from job_index import JobIndex
+
+POSTINGS = [
+    {"id": "ds", "title": "Data Scientist", "skills": ["python", "machine learning", "sql"],
+     "description": "Build ML models with pandas and scikit-learn."},
+    {"id": "fe", "title": "Frontend Developer", "skills": ["javascript", "react", "css"],
+     "description": "Build web UIs in React."},
+    {"id": "ops", "title": "DevOps Engineer", "skills": ["docker", "kubernetes", "aws"],
+     "description": "Run CI/CD pipelines on AWS."},
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    path = str(tmp_path / "index")
+    index = JobIndex(path)
+    index.append(POSTINGS)
+    index.compact()
+    return path
+
+
+def test_match_through_lazy_proxy(index_dir):
+    index = startup.Lazy("job_index", lambda: JobIndex(index_dir))
+    results = index.match("Python developer with machine learning, pandas and SQL", 2)
+    assert results[0]["id"] == "ds"
+    assert "python" in results[0]["matched_skills"]
+    assert index.count() == 3
+
+
+def test_added_posting_replaces_same_id(index_dir):
+    index = JobIndex(index_dir)
+    index.add([{"id": "ds", "title": "Senior Data Scientist", "skills": ["python", "sql"]}])
+    assert index.count() == 3
+    results = index.match("python pandas sql", 3)
+    assert [r["title"] for r in results if r["id"] == "ds"] == ["Senior Data Scientist"]
+
+
+def test_jobs_match_route_through_lazy_proxy(index_dir, monkeypatch):
+    pytest.importorskip("flask")
+    main = pytest.importorskip("main")
+    monkeypatch.setattr(main, "job_index", startup.Lazy("job_index", lambda: JobIndex(index_dir)))
+    resp = main.app.test_client().post("/jobs/match", data={"resumeText": "react javascript css", "k": "2"})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["postings"] == 3
+    assert body["results"][0]["id"] == "fe"
+
+
+def _unknown_words(n):
+    # stand-ins for names, schools and employers that no posting mentions
+    letters = "bcdfghjklmnpqrstvwxz"
+    return " ".join("qu" + letters[i // 20] + letters[i % 20] + "ox" for i in range(n))
+
+
+def test_unknown_resume_terms_do_not_crowd_out_matches(tmp_path):
+    index = JobIndex(str(tmp_path / "index"))
+    index.append(dict(p, id=f"{p['id']}-{i}") for i in range(40) for p in POSTINGS)
+    index.compact()
+    plain = index.search("python sql docker developer", 5)
+    noisy = index.search("python sql docker developer " + _unknown_words(70), 5)
+    assert plain
+    assert [d for d, _ in noisy] == [d for d, _ in plain]
+
+
+def test_postings_added_without_compaction_are_scored(tmp_path):
+    index = JobIndex(str(tmp_path / "index"))
+    index.add(POSTINGS)
+    assert index.meta["generation"] == 1
+    assert index.match("react javascript css", 1)[0]["id"] == "fe"
+
+    uncompacted = JobIndex(str(tmp_path / "other"))
+    uncompacted.add(POSTINGS, compact=False)
+    results = uncompacted.search("kubernetes docker aws", 3)
+    assert results[0][1] > 0
+    assert uncompacted.read(results[0][0])["id"] == "ops"
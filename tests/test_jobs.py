@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+main = pytest.importorskip("main")
+
+from jobs import DONE, JobQueue  # noqa: E402
+from user_store import UserStore  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main.app, "secret_key", "test")
+    monkeypatch.setattr(main, "jobs", JobQueue(str(tmp_path / "jobs.db"), str(tmp_path / "jobs"), workers=1))
+    users = UserStore(str(tmp_path / "users.db"))
+    users.put("a@example.com", "A", "B", "secret")
+    monkeypatch.setattr(main, "users", users)
+    monkeypatch.setattr(main, "get_history", lambda key: [{"role": "user", "content": "hi"}])
+    monkeypatch.setattr(main, "resume_export_job",
+                        lambda job_id, conversation, resume_json=None: {"resume_json": {"summary": "x"},
+                                                                        "formats": []})
+    return main.app.test_client()
+
+
+def _wait_done(client, url):
+    for _ in range(50):
+        body = client.get(url).get_json()
+        if body["status"] == DONE:
+            return body
+        time.sleep(0.02)
+    raise AssertionError("job did not finish")
+
+
+def test_job_queued_before_login_is_visible_after_login(client):
+    status_url = client.post("/resume_jobs").get_json()["status_url"]
+    client.post("/login", data={"email": "a@example.com", "password": "secret"})
+    assert client.get(status_url).status_code == 200
+    _wait_done(client, status_url)
+    client.post("/logout")
+    assert client.get(status_url).status_code == 404
+
+
+def test_polling_does_not_resave_the_session(client):
+    status_url = client.post("/resume_jobs").get_json()["status_url"]
+    _wait_done(client, status_url)
+    assert "Set-Cookie" not in client.get(status_url).headers
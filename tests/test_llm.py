@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from admission import PriorityLimiter
+from llm import FakeBackend, LLMClient, LLMError, LLMTimeout
+
+
+class ServiceUnavailable(Exception):
+    """Named like the google error, so the client treats it as retryable."""
+
+
+class FlakyBackend(FakeBackend):
+    def __init__(self, failures, exc=ServiceUnavailable):
+        super().__init__(latency_ms=0)
+        self.failures, self.exc, self.calls = failures, exc, 0
+
+    def generate(self, prompt, timeout):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc("upstream failed")
+        return super().generate(prompt, timeout)
+
+
+class SlowFirstBackend(FakeBackend):
+    def __init__(self, first_ms):
+        super().__init__(latency_ms=0)
+        self.first_ms, self.calls = first_ms, 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.first_ms / 1000)
+            return "slow"
+        return "fast"
+
+
+def test_transient_errors_are_retried():
+    backend = FlakyBackend(failures=2)
+    client = LLMClient(backend, retries=2, backoff=0)
+    assert client.generate("hello", site="chat")
+    assert backend.calls == 3
+    assert client.snapshot()["chat"]["retries"] == 2
+
+
+def test_other_errors_are_not_retried():
+    backend = FlakyBackend(failures=1, exc=KeyError)
+    client = LLMClient(backend, retries=2, backoff=0)
+    with pytest.raises(LLMError):
+        client.generate("hello", site="chat")
+    assert backend.calls == 1
+
+
+def test_timed_out_call_holds_its_slot_until_it_returns():
+    limiter = PriorityLimiter(1, 4, 1)
+    client = LLMClient(FakeBackend(latency_ms=200), timeout=0.05, retries=0, limiter=limiter)
+    started = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        client.generate("hello", site="chat")
+    assert time.monotonic() - started < 0.15
+    assert client.abandoned == 1
+    assert limiter.snapshot()["inflight"] == 1
+    time.sleep(0.3)
+    assert client.abandoned == 0
+    assert limiter.snapshot() == {"inflight": 0, "queued": 0}
+
+
+def test_slow_call_is_hedged():
+    backend = SlowFirstBackend(first_ms=300)
+    client = LLMClient(backend, hedge_after=0.02, retries=0)
+    started = time.monotonic()
+    assert client.generate("hello", site="chat") == "fast"
+    assert time.monotonic() - started < 0.2
+    assert backend.calls == 2
+    assert client.snapshot()["chat"]["hedged"] == 1
@@ -0,0 +1,72 @@
+from prompt_budget import dedupe_lines, normalize_text
+from resume_library import resume_sections
+
+# Two extracted PDF pages with a running header and footer; jobs share
+# locations, years and skills, as real resumes do.
+RESUME = "\f".join([
+    """Priya Sharma - Resume
+Priya Sharma
+priya.sharma@example.com | +91 98765 43210 | Bengaluru
+Summary
+Data engineer with four years of experience building batch and streaming pipelines.
+Experience
+Data Engineer, Flipkart
+2022 - 2024
+Remote
+- Built Airflow pipelines moving 2 TB of order data a day into the warehouse.
+- Cut nightly batch runtime from 6 hours to 90 minutes with Spark tuning.
+Software Engineer, Infosys
+2021
+Remote
+- Maintained Python ETL jobs for a banking client.
+Page 1 of 2""",
+    """Priya Sharma - Resume
+Analyst Intern, Deloitte
+2020
+Bengaluru
+- Built Power BI dashboards for the audit team.
+Education
+B.Tech, Computer Science, VIT
+2016 - 2020
+Skills
+Python
+SQL
+Airflow
+Page 2 of 2""",
+])
+
+
+def cleaned(text):
+    return dedupe_lines(normalize_text(text))
+
+
+def test_keeps_years_locations_and_short_repeats():
+    lines = cleaned(RESUME).split("\n")
+    assert lines.count("Remote") == 2
+    assert "Bengaluru" in lines
+    for year_line in ("2022 - 2024", "2021", "2020", "2016 - 2020"):
+        assert year_line in lines
+    for skill in ("Python", "SQL", "Airflow"):
+        assert skill in lines
+
+
+def test_drops_page_numbers_and_running_header():
+    text = cleaned(RESUME)
+    assert "Page 1 of 2" not in text and "Page 2 of 2" not in text
+    assert "Priya Sharma - Resume" not in text
+    assert "Priya Sharma\n" in text
+    assert "\f" not in text
+
+
+def test_drops_repeated_long_lines_only():
+    line = "Built Airflow pipelines moving 2 TB of order data a day into the warehouse."
+    text = cleaned(f"{line}\nRemote\n{line}\nRemote")
+    assert text.split("\n") == [line, "Remote", "Remote"]
+
+
+def test_resume_sections_keep_every_job():
+    sections = resume_sections(RESUME)
+    assert {"contact", "summary", "experience", "education", "skills"} <= set(sections)
+    for job in ("Flipkart", "Infosys", "Deloitte"):
+        assert job in sections["experience"]
+    assert "2021" in sections["experience"]
@@ -0,0 +1,36 @@
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from session_store import MemorySessionStore, ServerSideSessionInterface  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = flask.Flask(__name__)
+    app.secret_key = "test"
+    app.session_interface = ServerSideSessionInterface(MemorySessionStore(3600))
+
+    @app.route("/visit", methods=["POST"])
+    def visit():
+        flask.session["seen"] = True
+        return "ok"
+
+    @app.route("/login", methods=["POST"])
+    def login():
+        app.session_interface.regenerate(flask.session)
+        flask.session["user"] = "a@example.com"
+        return flask.session.sid
+
+    return app
+
+
+def test_login_rotates_the_session_id(app):
+    client = app.test_client()
+    client.post("/visit")
+    store = app.session_interface.store
+    (planted,) = store._data
+    new_sid = client.post("/login").get_data(as_text=True)
+    assert new_sid != planted
+    assert store.load(planted) is None
+    assert store.load(new_sid) == {"seen": True, "user": "a@example.com"}
@@ -0,0 +1,26 @@
+import json
+import threading
+
+from user_store import UserStore
+
+
+def test_concurrent_opens_migrate_users_json_once(tmp_path):
+    legacy = tmp_path / "users.json"
+    legacy.write_text(json.dumps({f"u{i}@example.com": {"first": "U", "password": "x"}
+                                  for i in range(500)}))
+    db, errors = str(tmp_path / "users.db"), []
+
+    def open_store():
+        try:
+            UserStore(db, legacy_json=str(legacy))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_store) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert not legacy.exists() and (tmp_path / "users.json.migrated").exists()
+    assert UserStore(db).get("u7@example.com")["first"] == "U"
@@ -0,0 +1,132 @@
+"""
+Size-capped, content-sniffed resume uploads.
+
+Flask's MAX_CONTENT_LENGTH rejects oversized requests from the Content-Length
+header before the body is parsed. Each accepted file is then copied in small
+chunks to a temp file (never held in memory as one bytes object), capped at
+MAX_UPLOAD_BYTES, and typed from its magic bytes rather than its extension.
+Extraction workers read the spooled file through mmap.
+"""
+import os
+import tempfile
+import zipfile
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 5 * 1024 * 1024))
+# Whole-request cap; must leave room for a batch of resumes
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", 50 * 1024 * 1024))
+# One resume plus form fields
+SINGLE_UPLOAD_REQUEST_BYTES = MAX_UPLOAD_BYTES + 1024 * 1024
+# Chat and builder messages are small JSON bodies
+MAX_JSON_BYTES = int(os.getenv("MAX_JSON_BYTES", 64 * 1024))
+# Routes held below the app-wide MAX_REQUEST_BYTES, in both serving modes
+ROUTE_BODY_LIMITS = {
+    "/analyze_resume": SINGLE_UPLOAD_REQUEST_BYTES,
+    "/resumes": SINGLE_UPLOAD_REQUEST_BYTES,
+    "/jobs/match": SINGLE_UPLOAD_REQUEST_BYTES,
+    "/chat": MAX_JSON_BYTES,
+    "/builder": MAX_JSON_BYTES,
+    "/resume_builder": MAX_JSON_BYTES,
+    "/generate_resume": MAX_JSON_BYTES,
+    "/generate_resume_docx": MAX_JSON_BYTES,
+}
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+CHUNK_SIZE = 64 * 1024
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .doc, .xls, ...
+
+
+class UploadError(ValueError):
+    """Raised for uploads rejected before any parsing; status is the HTTP code."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _sniff(head, zip_source):
+    """kind ("pdf"/"docx"/"zip") from leading bytes; zip_source opens the archive."""
+    if head.startswith(OLE_MAGIC):
+        raise UploadError("Legacy .doc files are not supported. Please save as DOCX or PDF.", 415)
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(zip_source()) as zf:
+                names = set(zf.namelist())
+        except zipfile.BadZipFile:
+            raise UploadError("This file looks corrupted.", 400)
+        return "docx" if "word/document.xml" in names else "zip"
+    if PDF_MAGIC in head[:1024]:  # the spec tolerates junk before the header
+        return "pdf"
+    raise UploadError("Only PDF or DOCX files are supported", 415)
+
+
+def sniff_file(path):
+    """Detect the kind of an upload already on disk (e.g. an unzipped batch member)."""
+    with open(path, "rb") as f:
+        head = f.read(1024)
+    return _sniff(head, lambda: path)
+
+
+def copy_capped(src, path, max_bytes):
+    """
+    Copy the file object src to path in CHUNK_SIZE pieces, stopping with an
+    UploadError (413) as soon as max_bytes is exceeded; returns (size, head).
+    """
+    size = 0
+    head = b""
+    with open(path, "wb") as out:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                return size, head
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadError(
+                    f"File is too large (limit {max_bytes // (1024 * 1024)} MB).", 413)
+            if len(head) < 1024:
+                head += chunk[:1024 - len(head)]
+            out.write(chunk)
+
+
+class SpooledUpload:
+    """A validated upload on disk. Use as a context manager to delete the temp file."""
+
+    def __init__(self, path, size, kind, filename):
+        self.path, self.size, self.kind, self.filename = path, size, kind, filename
+
+    def close(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def spool_upload(storage, max_bytes=MAX_UPLOAD_BYTES, allowed=("pdf", "docx")):
+    """
+    Copy a werkzeug FileStorage to a temp file in CHUNK_SIZE pieces, stopping
+    as soon as max_bytes is exceeded, then sniff its type. Raises UploadError
+    (and removes the temp file) for empty, oversized or unsupported files.
+    """
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=UPLOAD_TMP_DIR)
+    os.close(fd)
+    try:
+        size, head = copy_capped(storage.stream, path, max_bytes)
+        if not size:
+            raise UploadError("The uploaded file is empty.", 400)
+        kind = _sniff(head, lambda: path)
+        if kind not in allowed:
+            raise UploadError("Only PDF or DOCX files are supported", 415)
+        return SpooledUpload(path, size, kind, storage.filename)
+    except BaseException:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,103 @@
+"""
+SQLite-backed user store (WAL mode).
+
+Lookups go through the email primary key and registrations are single-row
+upserts, so neither depends on the number of accounts and concurrent
+registrations cannot overwrite each other. Existing users.json data is
+imported once, the first time the store is opened.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+import metrics
+
+
+class UserStore:
+    def __init__(self, path, legacy_json=None):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                email TEXT PRIMARY KEY,
+                first TEXT,
+                last TEXT,
+                password TEXT
+            )
+        """)
+        if legacy_json:
+            self.migrate_from_json(legacy_json)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, email):
+        """Return {"first", "last", "password"} for email, or None."""
+        if not email:
+            return None
+        with metrics.span("user_store_get"):
+            row = self._conn().execute(
+                "SELECT first, last, password FROM users WHERE email = ?", (email,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def put(self, email, first, last, password):
+        """Insert or replace a single user record atomically."""
+        with metrics.span("user_store_put"):
+            self._conn().execute(
+                "INSERT INTO users (email, first, last, password) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET first = excluded.first, "
+                "last = excluded.last, password = excluded.password",
+                (email, first, last, password),
+            )
+
+    def migrate_from_json(self, json_path):
+        """
+        One-shot import of a legacy users.json file.
+        The file is renamed to <name>.migrated afterwards so it only runs once.
+        Every worker opens the store at startup, so the check, import and rename
+        run under the database write lock; a file that is already gone was
+        migrated by someone else. Returns the number of imported users.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        renamed = False
+        try:
+            try:
+                with open(json_path, "r") as f:
+                    users = json.load(f)
+            except FileNotFoundError:
+                conn.execute("ROLLBACK")
+                return 0
+            # Records already in the database win over the legacy file
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (email, first, last, password) VALUES (?, ?, ?, ?)",
+                [(email, u.get("first"), u.get("last"), u.get("password"))
+                 for email, u in users.items()],
+            )
+            os.replace(json_path, json_path + ".migrated")
+            renamed = True
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            if renamed:
+                os.replace(json_path + ".migrated", json_path)
+            raise
+        return len(users)
+
+if __name__ == "__main__":
+    import sys
+    src = sys.argv[1] if len(sys.argv) > 1 else "users.json"
+    dst = sys.argv[2] if len(sys.argv) > 2 else "users.db"
+    count = UserStore(dst).migrate_from_json(src)
+    print(f"Imported {count} user(s) from {src} into {dst}")